@@ -0,0 +1,153 @@
+"""Connection setup overhead and batch upsert cost, before and after pooling and prepared statements.
+
+Connection setup compares what every task did before, a fresh
+PostgresHook(...).get_conn() per operation (Airflow connection lookup plus a
+new backend), with borrowing from the process pool. Each operation runs one
+SELECT 1. Batch upserts load the same synthetic articles into a throwaway
+schema, once with the multi-row VALUES statement and once with the prepared
+array statements. Both a fresh insert and a re-run with unchanged rows are
+timed.
+
+Usage: python benchmarks/bench_connections.py [--dsn postgresql://...] [--connections 200] [--rows 10000]
+The DSN defaults to ETL_TEST_POSTGRES_DSN.
+"""
+
+import argparse
+from datetime import datetime, timedelta
+import logging
+import os
+import statistics
+import sys
+import time
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+
+from include.news_etl.db import ConnectionPool
+from include.news_etl.loading import load_articles
+from include.news_etl.migrations import migrate
+from include.news_etl.stubs import ARTICLES_DDL
+
+CONN_ID = 'bench_connections'
+
+
+def _airflow_uri(dsn, schema):
+    parts = urlsplit(dsn)
+    query = parse_qsl(parts.query) + [('options', f'-c search_path={schema}')]
+    return urlunsplit(('postgresql', parts.netloc, parts.path, urlencode(query), ''))
+
+
+def _latencies_ms(operation, count):
+    latencies = []
+    for _ in range(count):
+        began = time.perf_counter()
+        operation()
+        latencies.append((time.perf_counter() - began) * 1000)
+    latencies.sort()
+    return statistics.mean(latencies), latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+
+
+def measure_connections(count):
+    from airflow.providers.postgres.hooks.postgres import PostgresHook
+
+    def select_one(conn):
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+        conn.commit()
+
+    def per_operation():
+        conn = PostgresHook(postgres_conn_id=CONN_ID).get_conn()
+        try:
+            select_one(conn)
+        finally:
+            conn.close()
+
+    pool = ConnectionPool(lambda: PostgresHook(postgres_conn_id=CONN_ID).get_conn())
+
+    def pooled():
+        with pool.connection() as conn:
+            select_one(conn)
+
+    try:
+        return {'connect per operation': _latencies_ms(per_operation, count), 'pooled': _latencies_ms(pooled, count)}
+    finally:
+        pool.close()
+
+
+def make_articles(rows):
+    started = datetime(2025, 1, 1)
+    return [{
+        'publishDate': started + timedelta(minutes=i),
+        'extractedDate': started + timedelta(days=1),
+        'url': f'https://example.com/bench-{i}',
+        'headline': f'Bench headline {i} about climate policy',
+        'body': ' '.join(['Synthetic body text about energy, water and wildlife.'] * 40),
+        'section': 'Environment',
+        'source': 'bench',
+    } for i in range(rows)]
+
+
+def measure_loads(conn, articles, batch_size, repeats):
+    results = {}
+    for prepared in (False, True):
+        inserted, unchanged = [], []
+        for _ in range(repeats):
+            with conn.cursor() as cursor:
+                cursor.execute('TRUNCATE articles')
+            conn.commit()
+            for timings in (inserted, unchanged):
+                began = time.perf_counter()
+                load_articles(conn, articles, batch_size=batch_size, prepared=prepared)
+                timings.append(time.perf_counter() - began)
+        results['prepared' if prepared else 'VALUES list'] = (statistics.median(inserted), statistics.median(unchanged))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', default=os.environ.get('ETL_TEST_POSTGRES_DSN'))
+    parser.add_argument('--connections', type=int, default=200, help='operations timed per connection strategy')
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('--dsn or ETL_TEST_POSTGRES_DSN is required')
+
+    schema = f"bench_connections_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(args.dsn, options=f'-c search_path={schema}')
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            cursor.execute(f"SET search_path TO {schema}")
+            cursor.execute(ARTICLES_DDL)
+        conn.commit()
+        migrate(conn)
+
+        os.environ[f'AIRFLOW_CONN_{CONN_ID.upper()}'] = _airflow_uri(args.dsn, schema)
+        # the hook logs every connection lookup
+        logging.disable(logging.INFO)
+        print(f"{'connection setup':<24}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for name, (mean, p50, p95) in measure_connections(args.connections).items():
+            print(f"{name:<24}{mean:>10.3f}{p50:>10.3f}{p95:>10.3f}")
+
+        articles = make_articles(args.rows)
+        print(f"\n{args.rows:,} rows in batches of {args.batch_size}, median of {args.repeats}")
+        print(f"{'batch upsert':<24}{'insert s':>10}{'rows/s':>10}{'unchanged s':>13}{'rows/s':>10}")
+        for name, (inserted, unchanged) in measure_loads(conn, articles, args.batch_size, args.repeats).items():
+            print(f"{name:<24}{inserted:>10.2f}{args.rows / inserted:>10,.0f}"
+                  f"{unchanged:>13.2f}{args.rows / unchanged:>10,.0f}")
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Near-duplicate lookups against a persisted LSH index of 1M signatures.
+
+Fills a throwaway schema with random MinHash signatures and their band
+buckets, then probes it in load-sized chunks through the same query path the
+dedup task uses. Half of the probes are perturbed copies of stored signatures
+(true near duplicates), half are fresh. Reports chunk latency, recall and the
+cost of a brute-force comparison against every stored signature.
+
+Usage: python benchmarks/bench_dedup.py [--dsn postgresql://...] [--stored 1000000]
+The DSN defaults to ETL_TEST_POSTGRES_DSN.
+"""
+
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+import psycopg2
+
+from include.news_etl.dedup import (
+    BUCKET_ARRAY_DDL,
+    DEDUP_DDL,
+    DEFAULT_THRESHOLD,
+    NUM_PERM,
+    _stored_matches,
+    article_signature,
+    band_buckets,
+)
+from include.news_etl.stubs import synthetic_article
+
+FILL_CHUNK = 50000
+
+# signature positions changed in a near-duplicate probe, ~0.9 similarity
+PERTURBED_POSITIONS = 12
+
+
+def _url(i):
+    return f'https://example.com/stored-{i}'
+
+
+def fill_index(conn, signatures):
+    """COPY signatures and their band buckets into the index table"""
+    with conn.cursor() as cursor:
+        for start in range(0, len(signatures), FILL_CHUNK):
+            chunk = signatures[start:start + FILL_CHUNK]
+            rows = io.StringIO()
+            for offset, signature in enumerate(chunk):
+                buckets = ','.join(map(str, band_buckets(signature)))
+                rows.write(f'{_url(start + offset)}\t\\\\x{signature.tobytes().hex()}\t2025-01-01\t{{{buckets}}}\n')
+            rows.seek(0)
+            cursor.copy_expert('COPY article_signatures (url, signature, "publishDate", buckets) FROM STDIN', rows)
+            conn.commit()
+        cursor.execute('ANALYZE article_signatures')
+    conn.commit()
+
+
+def make_probes(rng, signatures, count):
+    """(signature, expected match url or None) pairs"""
+    probes = []
+    for i in range(count):
+        if i % 2 == 0:
+            target = int(rng.integers(len(signatures)))
+            signature = signatures[target].copy()
+            positions = rng.choice(NUM_PERM, PERTURBED_POSITIONS, replace=False)
+            signature[positions] = rng.integers(0, 2 ** 32, PERTURBED_POSITIONS, dtype=np.uint32)
+            probes.append((signature, _url(target)))
+        else:
+            probes.append((rng.integers(0, 2 ** 32, NUM_PERM, dtype=np.uint32), None))
+    return probes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', default=os.environ.get('ETL_TEST_POSTGRES_DSN'))
+    parser.add_argument('--stored', type=int, default=1000000)
+    parser.add_argument('--probes', type=int, default=10000)
+    parser.add_argument('--chunk', type=int, default=1000)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('--dsn or ETL_TEST_POSTGRES_DSN is required')
+
+    articles = [synthetic_article(i) for i in range(2000)]
+    rows = [{'headline': a['fields']['headline'], 'body': a['fields']['bodyText']} for a in articles]
+    start = time.perf_counter()
+    for row in rows:
+        article_signature(row)
+    elapsed = time.perf_counter() - start
+    print(f"signatures: {len(rows) / elapsed:,.0f} articles/s")
+
+    rng = np.random.default_rng(7)
+    signatures = rng.integers(0, 2 ** 32, (args.stored, NUM_PERM), dtype=np.uint32)
+
+    schema = f"bench_dedup_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(args.dsn)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            cursor.execute(f"SET search_path TO {schema}")
+            cursor.execute(DEDUP_DDL + BUCKET_ARRAY_DDL)
+        conn.commit()
+
+        start = time.perf_counter()
+        fill_index(conn, signatures)
+        print(f"index: {args.stored:,} signatures stored in {time.perf_counter() - start:.0f}s")
+
+        probes = make_probes(rng, signatures, args.probes)
+        latencies, found, expected = [], 0, 0
+        for start in range(0, len(probes), args.chunk):
+            chunk = [({'url': f'probe-{start + i}'}, signature, band_buckets(signature))
+                     for i, (signature, _) in enumerate(probes[start:start + args.chunk])]
+            began = time.perf_counter()
+            with conn.cursor() as cursor:
+                matches = _stored_matches(cursor, chunk, DEFAULT_THRESHOLD)
+            conn.commit()
+            latencies.append(time.perf_counter() - began)
+            for position, (_, target) in enumerate(probes[start:start + args.chunk]):
+                if target is not None:
+                    expected += 1
+                    found += matches.get(position, (None,))[0] == target
+                elif position in matches:
+                    print(f"unexpected match for fresh probe {start + position}")
+
+        per_article = sum(latencies) / len(probes) * 1000
+        print(f"lookup: {args.chunk}-article chunks p50 {statistics.median(latencies) * 1000:.0f} ms, "
+              f"max {max(latencies) * 1000:.0f} ms, {per_article:.3f} ms/article, "
+              f"recall {found / expected:.3f}")
+
+        began = time.perf_counter()
+        for signature, _ in probes[:20]:
+            (signatures == signature).mean(axis=1).argmax()
+        brute = (time.perf_counter() - began) / 20 * 1000
+        print(f"brute force: {brute:.0f} ms/article against {args.stored:,} in-memory signatures")
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,59 @@
+"""Wall-clock benchmark for paginated Guardian extraction against a local stub.
+
+Usage: python benchmarks/bench_extract.py [--latency 0.05] [--workers 8]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import requests
+
+from include.news_etl.guardian import (
+    GUARDIAN_MAX_PAGE_SIZE,
+    SEARCH_ENDPOINT,
+    fetch_all_pages,
+    mount_connection_pool,
+)
+from include.news_etl.stubs import GuardianStubServer
+
+
+def run_once(stub, pages, max_workers, page_size):
+    stub.total_articles = pages * page_size
+    session = mount_connection_pool(requests.Session(), max_workers)
+    params = {'section': 'environment', 'page-size': str(page_size)}
+    try:
+        start = time.perf_counter()
+        data = fetch_all_pages(session, stub.url + SEARCH_ENDPOINT, params, max_workers=max_workers)
+        elapsed = time.perf_counter() - start
+    finally:
+        session.close()
+
+    fetched = len(data['response']['results'])
+    assert fetched == stub.total_articles, f"expected {stub.total_articles} articles, got {fetched}"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--latency', type=float, default=0.05, help='simulated seconds per request')
+    parser.add_argument('--workers', type=int, default=8, help='concurrent page fetches')
+    parser.add_argument('--page-size', type=int, default=GUARDIAN_MAX_PAGE_SIZE)
+    parser.add_argument('--pages', type=int, nargs='+', default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"latency={args.latency}s page-size={args.page_size}")
+    print(f"{'pages':>6} {'sequential (s)':>15} {'concurrent (s)':>15} {'speedup':>8}")
+
+    with GuardianStubServer(latency=args.latency) as stub:
+        for pages in args.pages:
+            sequential = run_once(stub, pages, 1, args.page_size)
+            concurrent = run_once(stub, pages, args.workers, args.page_size)
+            print(f"{pages:>6} {sequential:>15.3f} {concurrent:>15.3f} {sequential / concurrent:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+"""End-to-end extract -> transform -> dedup -> load benchmark against a local Guardian stub and Postgres.
+
+Runs the real DAG task callables for each dataset size in a fresh process:
+extract pages from a local /search stub serving synthetic articles, transform
+and dedup them through the artifact store, and load them into a throwaway
+schema holding the Prisma articles table plus the pipeline migrations. Each
+repeat starts from empty tables, so every run takes the insert path.
+
+For each size it reports throughput, p50/p95/p99 latency of every stage and
+of the whole run over the repeats, peak RSS, and the HTTP calls, bytes and
+DB round trips the stage instrumentation counted. Results are written as
+JSON; with --baseline, a throughput drop or a p95 latency / peak memory rise
+beyond --threshold against a previous results file exits non-zero.
+
+Usage: python benchmarks/bench_pipeline.py [--dsn postgresql://...] [--sizes 1000 10000 100000]
+                                           [--repeats 5] [--baseline results.json] [--threshold 0.2]
+The DSN defaults to ETL_TEST_POSTGRES_DSN. Variables the pipeline reads fall
+back to Airflow's metastore, so AIRFLOW_HOME must point at an initialised home.
+"""
+
+import argparse
+from datetime import datetime, timezone
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.join(BENCH_DIR, '..')
+sys.path.insert(0, PROJECT_DIR)
+
+DAG_ID = 'env_etl_pipeline_dag'
+STAGES = ['extract_source', 'transform_source', 'dedup_articles', 'load_sources']
+PERCENTILES = (50, 95, 99)
+
+# every repeat loads into empty tables
+RESET_SQL = 'TRUNCATE articles, etl_watermarks, article_signatures, article_duplicates CASCADE'
+
+
+def percentile(values, pct):
+    """Linearly interpolated percentile of a non-empty list"""
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def summarize_latencies(values):
+    summary = {f'p{pct}': round(percentile(values, pct), 4) for pct in PERCENTILES}
+    summary['max'] = round(max(values), 4)
+    return summary
+
+
+def _airflow_uri(dsn, schema):
+    """Airflow connection URI for the DSN, with the throwaway schema first on the search path"""
+    parts = urlsplit(dsn)
+    query = parse_qsl(parts.query) + [('options', f'-c search_path={schema}')]
+    return urlunsplit(('postgresql', parts.netloc, parts.path, urlencode(query), ''))
+
+
+def _run(size, repeats, dsn, latency, queue):
+    import psycopg2
+
+    from include.news_etl import metrics as stage_metrics
+    from include.news_etl.metrics import peak_rss_bytes
+    from include.news_etl.stubs import ARTICLES_DDL, GuardianStubServer
+
+    schema = f"bench_pipeline_{uuid.uuid4().hex[:8]}"
+    artifacts = tempfile.mkdtemp(prefix='bench_pipeline_')
+    conn = psycopg2.connect(dsn, options=f'-c search_path={schema}')
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        cursor.execute(ARTICLES_DDL)
+    conn.commit()
+
+    # collect each stage's metrics instead of sending them to StatsD
+    collected = []
+    stage_metrics.emit_stage_metrics = collected.append
+    os.environ.pop(stage_metrics.METRICS_DIR_ENV, None)
+    os.environ.pop('NEWS_ETL_HTTP_CACHE_DIR', None)
+
+    try:
+        with GuardianStubServer(total_articles=size, latency=latency) as stub:
+            os.environ['AIRFLOW_CONN_GUARDIAN_DEFAULT'] = stub.url
+            os.environ['AIRFLOW_CONN_POSTGRES_DEFAULT'] = _airflow_uri(dsn, schema)
+            os.environ['AIRFLOW_VAR_GUARDIAN_API_KEY'] = 'bench'
+            os.environ['AIRFLOW_VAR_GUARDIAN_RATE_LIMIT'] = '0'
+            os.environ['NEWS_ETL_ARTIFACT_ROOT'] = f'file://{artifacts}'
+
+            from airflow.models import DagBag
+
+            bag = DagBag(os.path.join(PROJECT_DIR, 'dags'), include_examples=False)
+            if bag.import_errors:
+                raise RuntimeError(f"DAG import errors: {bag.import_errors}")
+            dag = bag.dags[DAG_ID]
+            # task logs would swamp the report
+            logging.disable(logging.INFO)
+
+            def call(task_id, run, *args, **kwargs):
+                ti = SimpleNamespace(dag_id=DAG_ID, run_id=run, task_id=task_id, map_index=-1)
+                task = dag.get_task(task_id)
+                # per-source tasks are mapped, their callable sits in the partial kwargs
+                callable_ = getattr(task, 'python_callable', None) or task.partial_kwargs['python_callable']
+                return callable_(*args, ti=ti, **kwargs)
+
+            call('verify_table', 'bench_setup')
+            baseline_rss = peak_rss_bytes()
+
+            latencies = {stage: [] for stage in STAGES + ['total']}
+            for repeat in range(repeats):
+                with conn.cursor() as cursor:
+                    cursor.execute(RESET_SQL)
+                conn.commit()
+                del collected[:]
+                run = f'bench_{size}_{repeat}'
+
+                began = time.perf_counter()
+                manifest = call(
+                    'extract_source', run, 'guardian', data_interval_start=datetime(2025, 1, 1),
+                    data_interval_end=datetime(2025, 1, 2), params={'ignore_watermark': True}
+                )
+                manifest = call('transform_source', run, manifest)
+                manifests = call('dedup_articles', run, [manifest])
+                summary = call('load_sources', run, manifests)
+                latencies['total'].append(time.perf_counter() - began)
+
+                if summary['inserted'] != size:
+                    raise RuntimeError(f"expected {size} inserted rows, got {summary}")
+                for metrics in collected:
+                    latencies[metrics.stage].append(metrics.duration_seconds)
+
+            counters = {
+                metrics.stage: {
+                    'http_calls': metrics.http_calls,
+                    'bytes_fetched': metrics.bytes_fetched,
+                    'db_round_trips': metrics.db_round_trips,
+                }
+                for metrics in collected
+            }
+        queue.put({
+            'articles': size,
+            'repeats': repeats,
+            'throughput_rows_per_s': round(size / statistics.median(latencies['total']), 1),
+            'latency_seconds': {stage: summarize_latencies(values) for stage, values in latencies.items()},
+            'peak_rss_mb': round(peak_rss_bytes() / 2 ** 20, 1),
+            'baseline_rss_mb': round(baseline_rss / 2 ** 20, 1),
+            'counters': counters,
+        })
+    except Exception as e:
+        queue.put({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.commit()
+        conn.close()
+        shutil.rmtree(artifacts, ignore_errors=True)
+
+
+def measure(size, repeats, dsn, latency):
+    """Benchmark one dataset size in a fresh interpreter, so peak RSS is its own"""
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(size, repeats, dsn, latency, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    if 'error' in result:
+        raise RuntimeError(f"{size} articles: {result['error']}")
+    return result
+
+
+def find_regressions(baseline, current, threshold):
+    """Messages for every size where current is worse than baseline by more than `threshold`"""
+    regressions = []
+    for size, now in current['results'].items():
+        before = baseline.get('results', {}).get(size)
+        if before is None:
+            continue
+        checks = [
+            ('throughput rows/s', before['throughput_rows_per_s'], now['throughput_rows_per_s'], False),
+            ('p95 total seconds', before['latency_seconds']['total']['p95'],
+             now['latency_seconds']['total']['p95'], True),
+            ('peak RSS MB', before['peak_rss_mb'], now['peak_rss_mb'], True),
+        ]
+        for name, old, new, higher_is_worse in checks:
+            if not old:
+                continue
+            change = (new - old) / old
+            if (change if higher_is_worse else -change) > threshold:
+                regressions.append(f"{size} articles: {name} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=PROJECT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', default=os.environ.get('ETL_TEST_POSTGRES_DSN'))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0, help='simulated seconds per API request')
+    parser.add_argument('--output', help='results file, defaults to benchmarks/results/pipeline-<time>.json')
+    parser.add_argument('--baseline', help='previous results file to compare against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('--dsn or ETL_TEST_POSTGRES_DSN is required')
+
+    created = datetime.now(timezone.utc)
+    report = {
+        'created': created.isoformat(),
+        'git_commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'settings': {'repeats': args.repeats, 'latency': args.latency},
+        'results': {},
+    }
+
+    print(f"{'articles':>9} {'rows/s':>9} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'peak RSS MB':>12}   "
+          + ' '.join(f'{stage.split("_")[0] + " p95":>14}' for stage in STAGES))
+    for size in args.sizes:
+        result = measure(size, args.repeats, args.dsn, args.latency)
+        report['results'][str(size)] = result
+        total = result['latency_seconds']['total']
+        stages = ' '.join(f"{result['latency_seconds'][stage]['p95']:>14.3f}" for stage in STAGES)
+        print(f"{size:>9} {result['throughput_rows_per_s']:>9.0f} {total['p50']:>8.3f} {total['p95']:>8.3f} "
+              f"{total['p99']:>8.3f} {result['peak_rss_mb']:>12.1f}   {stages}")
+
+    output = args.output or os.path.join(BENCH_DIR, 'results', f"pipeline-{created:%Y%m%dT%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(baseline, report, args.threshold)
+        if regressions:
+            print(f"regressions beyond {args.threshold:.0%} against {args.baseline}:")
+            for message in regressions:
+                print(f"  {message}")
+            sys.exit(1)
+        print(f"no regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Keyword search latency over a synthetic 1M-row articles table, before and after the GIN index.
+
+Builds a throwaway schema with the Prisma articles table plus the pipeline
+migrations and fills it server-side with generated headlines and bodies drawn
+from a fixed vocabulary (a few rare words make selective queries). Each query
+is timed first as the ILIKE scan the API runs today, then again once the
+search backfill has filled search_vector, through the GIN index.
+
+Usage: python benchmarks/bench_search.py [--dsn postgresql://...] [--rows 1000000]
+The DSN defaults to ETL_TEST_POSTGRES_DSN.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import psycopg2
+
+from include.news_etl.migrations import migrate
+from include.news_etl.search import SEARCH_SQL, backfill_search_vectors, plan_backfill_ranges
+from include.news_etl.stubs import ARTICLES_DDL
+
+
+COMMON_WORDS = (
+    'climate carbon energy emissions policy government report water forest ocean '
+    'temperature wildlife species coal solar wind power farm river city plastic'
+).split()
+# one of these ends every 1000th body
+RARE_WORDS = ['axolotl', 'permafrost', 'geothermal', 'mangrove']
+
+FILL_SQL = """
+INSERT INTO articles (id, "publishDate", "extractedDate", url, headline, body, section, source, "updatedAt")
+SELECT md5(i::text || 'id')::uuid::text,
+       TIMESTAMP '2020-01-01' + i * INTERVAL '2 minutes',
+       TIMESTAMP '2020-01-01' + i * INTERVAL '2 minutes',
+       'https://example.com/bench-' || i,
+       initcap(array_to_string(ARRAY(SELECT (%(common)s::text[])[1 + ((i * 7 + w * 13) %% %(common_count)s)]
+                                     FROM generate_series(1, 6) AS w), ' ')),
+       array_to_string(ARRAY(SELECT (%(common)s::text[])[1 + ((i * 31 + w * w * 17) %% %(common_count)s)]
+                             FROM generate_series(1, %(words)s) AS w), ' ')
+           || CASE WHEN i %% 1000 = 0 THEN ' ' || (%(rare)s::text[])[1 + (i / 1000) %% %(rare_count)s] ELSE '' END,
+       'Environment', 'bench', CURRENT_TIMESTAMP
+FROM generate_series(%(start)s, %(stop)s) AS i
+"""
+
+ILIKE_SQL = """
+SELECT id, headline FROM articles
+WHERE headline ILIKE %(pattern)s OR body ILIKE %(pattern)s
+ORDER BY "publishDate" DESC
+LIMIT %(limit)s
+"""
+
+# three selective words and one that is in most bodies
+QUERIES = ['axolotl', 'permafrost', 'mangrove', 'solar']
+
+
+def _time_query(conn, sql, params, repeats):
+    latencies = []
+    with conn.cursor() as cursor:
+        for _ in range(repeats):
+            began = time.perf_counter()
+            cursor.execute(sql, params)
+            rows = cursor.fetchall()
+            latencies.append((time.perf_counter() - began) * 1000)
+    conn.commit()
+    return statistics.median(latencies), len(rows)
+
+
+def fill(conn, rows, words, chunk=100000):
+    with conn.cursor() as cursor:
+        for start in range(1, rows + 1, chunk):
+            cursor.execute(FILL_SQL, {
+                'common': COMMON_WORDS, 'common_count': len(COMMON_WORDS),
+                'rare': RARE_WORDS, 'rare_count': len(RARE_WORDS),
+                'words': words, 'start': start, 'stop': min(rows, start + chunk - 1),
+            })
+            conn.commit()
+        cursor.execute('ANALYZE articles')
+    conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dsn', default=os.environ.get('ETL_TEST_POSTGRES_DSN'))
+    parser.add_argument('--rows', type=int, default=1000000)
+    parser.add_argument('--words', type=int, default=80, help='words per synthetic body')
+    parser.add_argument('--ranges', type=int, default=4, help='id ranges backfilled concurrently')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error('--dsn or ETL_TEST_POSTGRES_DSN is required')
+
+    schema = f"bench_search_{uuid.uuid4().hex[:8]}"
+    options = f'-c search_path={schema}'
+    conn = psycopg2.connect(args.dsn, options=options)
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"CREATE SCHEMA {schema}")
+            cursor.execute(f"SET search_path TO {schema}")
+            cursor.execute(ARTICLES_DDL)
+        conn.commit()
+        migrate(conn)
+
+        began = time.perf_counter()
+        fill(conn, args.rows, args.words)
+        print(f"table: {args.rows:,} rows filled in {time.perf_counter() - began:.0f}s")
+
+        before = {}
+        for query in QUERIES:
+            before[query] = _time_query(conn, ILIKE_SQL, {'pattern': f'%{query}%', 'limit': args.limit}, args.repeats)
+
+        # the same one-off job the search backfill DAG runs, one connection per range
+        def backfill(bounds):
+            range_conn = psycopg2.connect(args.dsn, options=options)
+            try:
+                return backfill_search_vectors(range_conn, **bounds)
+            finally:
+                range_conn.close()
+
+        began = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.ranges) as pool:
+            filled = sum(pool.map(backfill, plan_backfill_ranges(args.ranges)))
+        elapsed = time.perf_counter() - began
+        with conn.cursor() as cursor:
+            cursor.execute('ANALYZE articles')
+        conn.commit()
+        print(f"backfill: {filled:,} vectors in {elapsed:.0f}s ({filled / elapsed:,.0f} rows/s, "
+              f"{args.ranges} ranges)")
+
+        print(f"{'query':<24}{'ILIKE ms':>10}{'rows':>6}{'GIN ms':>10}{'rows':>6}{'speedup':>9}")
+        for query in QUERIES:
+            ilike_ms, ilike_rows = before[query]
+            gin_ms, gin_rows = _time_query(conn, SEARCH_SQL, {'query': query, 'limit': args.limit}, args.repeats)
+            print(f"{query:<24}{ilike_ms:>10.1f}{ilike_rows:>6}{gin_ms:>10.1f}{gin_rows:>6}{ilike_ms / gin_ms:>8.1f}x")
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""Tagging throughput of the vectorized sparse path against a per-article loop.
+
+Both paths score the same synthetic articles against one vocabulary fitted
+on them. The loop path is the straightforward version: a Counter and a dict
+of weights per article, then a sort for keywords and a sum per topic. The
+vectorized path is tags.tag_texts on chunks of the size the task uses. The
+results are checked to agree before timing is reported.
+
+Usage: python benchmarks/bench_tags.py [--sizes 1000 10000 50000] [--chunk-size 1000]
+"""
+
+import argparse
+from collections import Counter
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from include.news_etl.tags import (
+    DEFAULT_CHUNK_SIZE,
+    KEYWORD,
+    KEYWORDS,
+    MAX_TOPICS,
+    TOPIC,
+    TOPIC_TERMS,
+    TOPIC_THRESHOLD,
+    document_text,
+    fit_vocabulary,
+    tag_texts,
+    tokenize,
+)
+
+# words per body, about a Guardian article
+BODY_WORDS = 600
+FILLER_WORDS = 5000
+
+
+def make_texts(count, seed=20250101):
+    rng = random.Random(seed)
+    topic_words = [term for terms in TOPIC_TERMS.values() for term in terms]
+    filler = [''.join(rng.choices('abcdefghijklmnopqrstuvwxyz', k=rng.randint(4, 9))) for _ in range(FILLER_WORDS)]
+    # zipf-like: a few filler words are everywhere, most are rare
+    weights = [1 / (rank + 1) for rank in range(FILLER_WORDS)]
+    texts = []
+    for _ in range(count):
+        topical = rng.sample(topic_words, 6)
+        words = rng.choices(filler, weights, k=BODY_WORDS) + rng.choices(topical, k=BODY_WORDS // 20)
+        rng.shuffle(words)
+        texts.append(document_text(' '.join(rng.sample(topical, 3)), ' '.join(words)))
+    return texts
+
+
+def tag_texts_loop(vocabulary, texts, keywords=KEYWORDS):
+    """Per-article reference, same output as tags.tag_texts"""
+    topic_of = {term: topic for topic, terms in TOPIC_TERMS.items() for term in terms}
+    found = []
+    for row, text in enumerate(texts):
+        counts = Counter(term for term in tokenize(text) if term in vocabulary.index)
+        weights = {term: (1 + math.log(n)) * vocabulary.idf[vocabulary.index[term]] for term, n in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values()))
+        ranked = sorted(weights.items(), key=lambda item: (-item[1], vocabulary.index[item[0]]))
+        found.extend((row, KEYWORD, term, weight / norm) for term, weight in ranked[:keywords])
+        scores = Counter()
+        for term, weight in weights.items():
+            if term in topic_of:
+                scores[topic_of[term]] += (weight / norm) ** 2
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:MAX_TOPICS]
+        found.extend((row, TOPIC, topic, score) for topic, score in best if score >= TOPIC_THRESHOLD)
+    return found
+
+
+def tag_texts_chunked(vocabulary, texts, chunk_size):
+    found = []
+    for start in range(0, len(texts), chunk_size):
+        chunk = tag_texts(vocabulary, texts[start:start + chunk_size])
+        found.extend((row + start, kind, tag, score) for row, kind, tag, score in chunk)
+    return found
+
+
+def _timed(function, *args):
+    began = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - began
+
+
+def _same(left, right):
+    key = lambda tag: (tag[0], tag[1], tag[2])
+    return sorted(map(key, left)) == sorted(map(key, right)) and all(
+        math.isclose(a[3], b[3], rel_tol=1e-9) for a, b in zip(sorted(left, key=key), sorted(right, key=key))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print(f"{'articles':>10} {'terms':>7} {'fit s':>7} {'loop s':>8} {'loop/s':>9} {'vector s':>9} {'vector/s':>9} {'speedup':>8}")
+    for size in args.sizes:
+        texts = make_texts(size)
+        vocabulary, fitted = _timed(fit_vocabulary, texts)
+        looped, loop_seconds = _timed(tag_texts_loop, vocabulary, texts)
+        vectorized, vector_seconds = _timed(tag_texts_chunked, vocabulary, texts, args.chunk_size)
+        assert _same(looped, vectorized), "vectorized tags differ from the per-article loop"
+        print(f"{size:>10} {len(vocabulary):>7} {fitted:>7.2f} {loop_seconds:>8.2f} {size / loop_seconds:>9.0f} "
+              f"{vector_seconds:>9.2f} {size / vector_seconds:>9.0f} {loop_seconds / vector_seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Throughput and peak memory of the row and columnar transform paths.
+
+Each (path, size) runs in a fresh process so peak RSS is not polluted by the
+previous run. Articles are cycled lazily from a small pool of synthetic
+results (so generation cost stays out of the timing) and the transformed
+rows are consumed as they stream out, like transform_source does between
+artifacts.
+
+Usage: python benchmarks/bench_transform.py [--sizes 1000 100000 1000000]
+"""
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from include.news_etl.stubs import synthetic_article
+from include.news_etl.transform import TransformStats, iter_transform, iter_transform_columnar
+
+# distinct synthetic articles cycled through to build each dataset
+POOL_SIZE = 1000
+
+PATHS = {
+    'rows': iter_transform,
+    'columnar': iter_transform_columnar,
+}
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _run(path, size, queue):
+    pool = [synthetic_article(i) for i in range(POOL_SIZE)]
+    articles = (pool[i % POOL_SIZE] for i in range(size))
+    baseline = _peak_rss_mb()
+
+    stats = TransformStats()
+    start = time.perf_counter()
+    for _ in stats.track(PATHS[path](articles, datetime.now())):
+        pass
+    elapsed = time.perf_counter() - start
+
+    queue.put((stats.count, elapsed, _peak_rss_mb(), baseline))
+
+
+def measure(path, size):
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    process = ctx.Process(target=_run, args=(path, size, queue))
+    process.start()
+    result = queue.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--paths', nargs='+', choices=sorted(PATHS), default=['rows', 'columnar'])
+    args = parser.parse_args()
+
+    print(f"{'path':>9} {'articles':>10} {'seconds':>9} {'rows/s':>10} {'peak RSS MB':>12} {'baseline MB':>12}")
+    for size in args.sizes:
+        for path in args.paths:
+            count, elapsed, peak, baseline = measure(path, size)
+            assert count == size, f"{path} produced {count} rows, expected {size}"
+            print(f"{path:>9} {size:>10} {elapsed:>9.2f} {count / elapsed:>10.0f} {peak:>12.1f} {baseline:>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,15 +1,100 @@
 from airflow import DAG
-from airflow.providers.http.hooks.http import HttpHook
-from airflow.providers.postgres.hooks.postgres import PostgresHook
 from airflow.decorators import task
 from airflow.models import Variable
+from airflow.models.param import Param
+from airflow.timetables.interval import CronDataIntervalTimetable
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 import logging
 import json
+import os
+
+from include.news_etl.archive import (
+    DEFAULT_ARCHIVE_BATCH_SIZE,
+    DEFAULT_PRECREATE_MONTHS,
+    DEFAULT_RETENTION_MONTHS,
+    archive_articles,
+)
+from include.news_etl.artifacts import (
+    DEFAULT_ARTIFACT_RETENTION_DAYS,
+    PageCheckpoint,
+    artifact_prefix,
+    delete_run_artifacts,
+    prune_artifacts,
+    read_all_records,
+    read_records,
+    write_records,
+)
+from include.news_etl.checkpoints import LoadCheckpoint, checkpoint_key, input_fingerprint
+from include.news_etl.daily_stats import DEFAULT_REFRESH_DAYS, refresh_daily_stats, update_run_stats
+from include.news_etl.db import PREPARED_STATEMENTS_VARIABLE, ConnectionHook, get_pool, prepared_statements_enabled
+from include.news_etl.dead_letters import DEFAULT_MAX_ATTEMPTS, DEFAULT_REPLAY_MAX_ROWS, replay_dead_letters
+from include.news_etl.dedup import (
+    DEFAULT_RETENTION_DAYS,
+    DEFAULT_THRESHOLD,
+    DedupStats,
+    choose_dedup_mode,
+    deduplicate,
+    prune_index,
+)
+from include.news_etl.images import (
+    DEFAULT_CACHE_TTL,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_FAILURE_TTL,
+    enrich_images,
+)
+from include.news_etl.loading import (
+    COPY_THRESHOLD,
+    DEFAULT_BATCH_SIZE,
+    choose_load_mode,
+    copy_load_articles,
+    empty_summary,
+    etl_run_id,
+    load_articles,
+)
+from include.news_etl.metrics import instrument, track_connection
+from include.news_etl.migrations import LATEST_VERSION, ensure_schema
+from include.news_etl.quality import MIN_BODY_LENGTH, emit_quality_metrics, run_quality_checks
+from include.news_etl.search import (
+    DEFAULT_BACKFILL_BATCH_SIZE,
+    DEFAULT_BACKFILL_RANGES,
+    backfill_search_vectors,
+    plan_backfill_ranges,
+)
+from include.news_etl.summaries import DEFAULT_BACKEND, DEFAULT_CHUNK_SIZE, summarize_pending
+from include.news_etl.tags import DEFAULT_VOCABULARY_MAX_AGE_DAYS, KEYWORDS, tag_pending
+from include.news_etl.transform import (
+    COLUMNAR_THRESHOLD,
+    DEFAULT_TRANSFORM_MODE,
+    TransformStats,
+    choose_transform_mode,
+)
+from include.news_etl.watermark import (
+    advance_watermark,
+    filter_after_watermark,
+    get_watermark,
+    narrow_window,
+)
+from include.news_etl.sources import DEFAULT_SOURCES, SOURCES_ENV, get_source, parse_source_names
+from include.news_etl.windows import interval_to_window, split_date_range
 
-API_CONN_ID = 'guardian_default'
 POSTGRES_CONN_ID = 'postgres_default'
 
+# one extract/transform branch is mapped per enabled source adapter
+SOURCE_NAMES = parse_source_names(os.environ.get(SOURCES_ENV, DEFAULT_SOURCES))
+
+# mapped backfill chunks allowed to run at once, per task
+BACKFILL_MAX_PARALLEL = int(os.environ.get('NEWS_ETL_BACKFILL_MAX_PARALLEL', '4'))
+
+
+@contextmanager
+def borrowed_connection(metrics):
+    """Connection from this process's pool whose statements count into the stage metrics"""
+    # the pool opens connections through PostgresHook at task run time, never while the scheduler parses this file
+    with get_pool(POSTGRES_CONN_ID).connection() as conn:
+        yield track_connection(conn, metrics)
+
+
 default_args = {
     'owner': 'airflow',
     'start_date': datetime(2025, 1, 1),
@@ -21,311 +106,501 @@ default_args = {
 with DAG(
     dag_id='env_etl_pipeline_dag',
     default_args=default_args,
-    schedule='@daily',
+    # each run covers the whole previous UTC day; '@daily' alone is a zero-width trigger in Airflow 3
+    schedule=CronDataIntervalTimetable('@daily', timezone='UTC'),
     catchup=False,
     description='Extract environmental news from Guardian API and load to Postgres',
-    tags=['environment', 'news', 'guardian']
+    tags=['environment', 'news', 'guardian'],
+    params={
+        'ignore_watermark': Param(False, type='boolean'),
+        'rebuild_daily_stats': Param(False, type='boolean'),
+    }
 ) as dag:
     
     @task
-    def verify_table():
-        """Verify that the articles table exists and is accessible"""
+    def verify_table(ti=None):
+        """Verify that the articles table exists and bring the pipeline schema up to date"""
         logger = logging.getLogger(__name__)
         
         try:
-            postgres_hook = PostgresHook(postgres_conn_id=POSTGRES_CONN_ID)
-            
-            #  cheking if table exists and get its structure
-            check_table_sql = """
-            SELECT column_name, data_type 
-            FROM information_schema.columns 
-            WHERE table_name = 'articles' 
-            ORDER BY ordinal_position;
-            """
-            
-            columns = postgres_hook.get_records(check_table_sql)
-            if not columns:
-                raise Exception("Table 'articles' not found in database")
-            
-            logger.info(f"Table 'articles' found with {len(columns)} columns")
-            for col_name, col_type in columns:
-                logger.info(f"Column: {col_name} ({col_type})")
-            
-            # create indexes if they dont exist
-            index_sql = """
-            CREATE INDEX IF NOT EXISTS idx_articles_publish_date ON articles("publishDate");
-            CREATE INDEX IF NOT EXISTS idx_articles_section ON articles(section);
-            CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url);
-            """
-            
-            postgres_hook.run(index_sql)
-            logger.info("Indexes verified/created successfully")
+            with instrument(ti) as metrics:
+                # DDL only runs for migrations newer than the stored schema version
+                with borrowed_connection(metrics) as conn:
+                    applied = ensure_schema(conn)
+
+            if applied:
+                logger.info(f"Applied schema migrations {applied}, now at version {LATEST_VERSION}")
+            else:
+                logger.info(f"Schema up to date at version {LATEST_VERSION}")
             
         except Exception as e:
             logger.error(f"Table verification failed: {str(e)}")
             raise
     
     @task
-    def extract_guardian():
-        """Extract environment news articles from Guardian API"""
+    def extract_source(source, window=None, data_interval_start=None, data_interval_end=None, ti=None, params=None):
+        """Extract news articles from one source adapter's API.
+
+        Backfill runs pass an explicit window; scheduled runs query the run's
+        data interval, narrowed by the source's stored watermark unless the run
+        sets ignore_watermark (e.g. to re-run a missed day).
+        """
         logger = logging.getLogger(__name__)
         
         try:
-            # API key
-            api_key = Variable.get("GUARDIAN_API_KEY")
-            
-            # HttpHook to get connection details from airflow
-            http_hook = HttpHook(http_conn_id=API_CONN_ID, method='GET')
+            with instrument(ti, source=source) as metrics:
+                adapter = get_source(source)
 
-            yesterday = (datetime.now() - timedelta(days=1)).strftime('%Y-%m-%d') 
-            today = datetime.now().strftime('%Y-%m-%d')
-            
-            # build endpoint - just the path- not full URL
-            endpoint = '/search'
-
-            # query parameters for URL
-            query_params = {
-                'section': 'environment',
-                'from-date': yesterday,
-                'to-date': today,
-                'show-fields': 'headline,bodyText',
-                'api-key': api_key,
-                'page-size': '20'
-            }
+                # API key
+                api_key = Variable.get(adapter.api_key_variable)
             
-            logger.info(f"Fetching articles from {yesterday} to {today}")
-            
-            # HTTP request via endpoint
-            response = http_hook.run(
-                endpoint=endpoint,
-                data=query_params,
-                headers={'Accept': 'application/json'}
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                article_count = len(data.get('response', {}).get('results', []))
-                logger.info(f"Successfully extracted {article_count} articles")
-                return data
-            else:
-                logger.error(f"API request failed with status code: {response.status_code}")
-                raise Exception(f"Guardian API request failed: {response.status_code}")
+                # HttpHook to get connection details from airflow
+                from airflow.providers.http.hooks.http import HttpHook
+
+                http_hook = HttpHook(http_conn_id=adapter.conn_id, method='GET')
+
+                # requests per second for this key, shared by the task's page fetches
+                if adapter.rate_limit_variable:
+                    adapter.rate_limit = float(Variable.get(adapter.rate_limit_variable, adapter.rate_limit))
+
+                watermark = None
+                if window is None:
+                    window = interval_to_window(data_interval_start, data_interval_end)
+                    if not (params or {}).get('ignore_watermark'):
+                        with borrowed_connection(metrics) as conn:
+                            watermark = get_watermark(ConnectionHook(conn), adapter.source)
+                        window, watermark = narrow_window(window, watermark)
+
+                logger.info(f"{source}: fetching articles from {window['from_date']} to {window['to_date']}")
+                # a retry only fetches the pages an earlier attempt did not store
+                pages_checkpoint = PageCheckpoint(f"{artifact_prefix(ti)}/pages")
+                results, total, pages = adapter.fetch(http_hook, window, api_key, checkpoint=pages_checkpoint)
+                metrics.add_http(adapter.transport_stats or {})
+                metrics.rows_in = len(results)
+
+                # drop articles at or before the watermark, they are already loaded
+                results, skipped = filter_after_watermark(results, watermark, date_field=adapter.date_field)
+                logger.info(f"{source}: extracted {len(results)} articles ({skipped} already loaded, skipped)")
+
+                # article bodies go to object storage, only the manifest goes through XCom
+                manifest = write_records(
+                    results,
+                    artifact_prefix(ti),
+                    source=source,
+                    total=total,
+                    pages=pages,
+                    skipped=skipped
+                )
+                logger.info(f"Wrote {manifest['count']} raw articles ({manifest['bytes']} bytes) in {len(manifest['parts'])} parts")
+                pages_checkpoint.clear()
+                metrics.rows_out = manifest['count']
+                return manifest
         
         except Exception as e:
             logger.error(f"Extract task failed: {str(e)}")
             raise
 
     @task
-    def transform_guardian(data):
-        """Transform guardian data into PostgreSQL-appropriate format"""
+    def transform_source(manifest, ti=None):
+        """Transform one source's raw results into PostgreSQL-appropriate rows"""
         logger = logging.getLogger(__name__)
         
         try:
-            # validate input data
-            if not data or 'response' not in data:
-                raise ValueError("Invalid data structure from Guardian API")
-            
-            response_data = data['response']
-            results = response_data.get('results', [])
-            
-            if not results:
-                logger.warning("No articles found in API response")
-                return []
-            
-            transformed_articles = []
-            extraction_date = datetime.now()
+            with instrument(ti, source=manifest['source']) as metrics:
+                source = manifest['source']
+                adapter = get_source(source)
+
+                # validate input manifest, records are streamed from the extract artifact
+                results = read_records(manifest)
+                metrics.rows_in = len(results)
             
-            for article in results:
-                # handle missing fields
-                fields = article.get('fields', {})
-                
-                # parse publication date
-                pub_date_str = article.get('webPublicationDate', '')
-                try:
-                    # if guardian API returns dates in ISO format like "2025-01-15T10:30:00Z"
-                    if pub_date_str:
-                        pub_date = datetime.fromisoformat(pub_date_str.replace('Z', '+00:00'))
-                        # convert to naive datetime (remove timezone info for PostgreSQL)
-                        pub_date = pub_date.replace(tzinfo=None)
-                    else:
-                        pub_date = None
-                except ValueError:
-                    logger.warning(f"Could not parse date: {pub_date_str}")
-                    pub_date = None
-                
-                # clean and truncate text fields- no errors
-                headline = fields.get('headline', 'No headline available')[:1000]  # Truncate if too long
-                body = fields.get('bodyText', 'No content available')
-                
-                # article dictionary
-                article_dict = {
-                    'publishDate': pub_date,
-                    'extractedDate': extraction_date,
-                    'url': article.get('webUrl', '')[:2000],
-                    'headline': headline,
-                    'body': body,
-                    'section': article.get('sectionName', 'environment')[:100],
-                    'source': 'guardian_api'
-                }
-                
-                transformed_articles.append(article_dict)
+                if not len(results):
+                    logger.warning(f"{source}: no articles found in API response")
+                    return write_records([], artifact_prefix(ti), source=source, skipped=manifest.get('skipped', 0))
             
-            logger.info(f"Successfully transformed {len(transformed_articles)} articles")
-            return transformed_articles
+                extraction_date = datetime.now()
+
+                # row-at-a-time generator; 'auto' switches very large batches to vectorized chunks
+                transform_mode = choose_transform_mode(
+                    len(results),
+                    mode=Variable.get("ARTICLE_TRANSFORM_MODE", DEFAULT_TRANSFORM_MODE),
+                    threshold=int(Variable.get("ARTICLE_COLUMNAR_THRESHOLD", COLUMNAR_THRESHOLD))
+                )
+                rows = adapter.transform(results, extraction_date, mode=transform_mode)
+
+                # artifact -> transform -> artifact streams through, one part in memory at a time
+                stats = TransformStats()
+                transformed_manifest = write_records(
+                    stats.track(rows),
+                    artifact_prefix(ti),
+                    source=source,
+                    skipped=manifest.get('skipped', 0)
+                )
+
+                # latest publish date lets the load task advance the watermark
+                transformed_manifest['max_publish_date'] = (
+                    stats.max_publish_date.isoformat() if stats.max_publish_date else None
+                )
+                logger.info(f"{source}: transformed {stats.count} articles using {transform_mode} mode")
+                metrics.rows_out = stats.count
+                return transformed_manifest
             
         except Exception as e:
             logger.error(f"Transform task failed: {str(e)}")
             raise
 
+    @task
+    def dedup_articles(manifests, ti=None):
+        """Flag or drop near-duplicate articles (syndicated copies, re-slugged urls) before loading"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                # mapped backfill branches receive a single manifest
+                manifests = [manifests] if isinstance(manifests, dict) else list(manifests)
+
+                mode = choose_dedup_mode(Variable.get("DEDUP_MODE", "flag"))
+                if mode == 'off':
+                    return manifests
+                threshold = float(Variable.get("DEDUP_THRESHOLD", DEFAULT_THRESHOLD))
+                retention_days = int(Variable.get("DEDUP_RETENTION_DAYS", DEFAULT_RETENTION_DAYS))
+
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    # the index only covers recent articles, older signatures age out
+                    prune_index(conn, datetime.now() - timedelta(days=retention_days))
+
+                    deduped = []
+                    for position, manifest in enumerate(manifests):
+                        # earlier sources are already committed to the index, so cross-source copies match too
+                        stats = DedupStats()
+                        rows = deduplicate(conn, read_records(manifest), mode=mode, threshold=threshold, stats=stats)
+                        meta = {k: v for k, v in manifest.items() if k not in ('codec', 'count', 'bytes', 'parts')}
+                        deduped_manifest = write_records(rows, f"{artifact_prefix(ti)}/{position}", **meta)
+                        deduped_manifest['near_duplicates'] = stats.duplicates
+                        deduped.append(deduped_manifest)
+                        metrics.rows_in += stats.seen
+                        metrics.rows_out += deduped_manifest['count']
+                        logger.info(
+                            f"{manifest.get('source')}: {stats.duplicates} near duplicates in {stats.seen} rows "
+                            f"({stats.dropped} dropped, mode {mode})"
+                        )
+
+                return deduped
+
+        except Exception as e:
+            logger.error(f"Dedup task failed: {str(e)}")
+            raise
+
     @task 
-    def load_guardian(articles_data):
-        """Load with PostgreSQL UUID generation"""
+    def load_sources(manifests, ti=None):
+        """Load every source's transformed rows in one batched load"""
         logger = logging.getLogger(__name__)
         
         try:
-            if not articles_data:
-                logger.info("No articles to load")
-                return {"loaded": 0, "errors": 0}
-            
-            postgres_hook = PostgresHook(postgres_conn_id=POSTGRES_CONN_ID)
-            
-            # Setup UUID extension and fix updatedAt column
-            setup_sql = """
-            -- Enable UUID extension if not already enabled
-            CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
-            
-            -- Setup defaults and constraints
-            DO $
-            BEGIN
-                -- Try to set default UUID generation for id column
-                ALTER TABLE articles ALTER COLUMN id SET DEFAULT uuid_generate_v4();
-            EXCEPTION
-                WHEN others THEN
-                    -- If that fails, try gen_random_uuid (available in newer PostgreSQL)
-                    BEGIN
-                        ALTER TABLE articles ALTER COLUMN id SET DEFAULT gen_random_uuid();
-                    EXCEPTION
-                        WHEN others THEN
-                            RAISE NOTICE 'Could not set UUID default, will generate manually';
-                    END;
-            END
-            $;
-            
-            -- Fix updatedAt column to have proper default and trigger
-            ALTER TABLE articles ALTER COLUMN "updatedAt" SET DEFAULT CURRENT_TIMESTAMP;
-            
-            -- Create or replace the trigger function for updatedAt
-            CREATE OR REPLACE FUNCTION update_updated_at_column()
-            RETURNS TRIGGER AS $
-            BEGIN
-                NEW."updatedAt" = CURRENT_TIMESTAMP;
-                RETURN NEW;
-            END;
-            $ language 'plpgsql';
-            
-            -- Drop trigger if it exists and recreate
-            DROP TRIGGER IF EXISTS update_articles_updated_at ON articles;
-            CREATE TRIGGER update_articles_updated_at 
-                BEFORE UPDATE ON articles 
-                FOR EACH ROW 
-                EXECUTE FUNCTION update_updated_at_column();
-            """
-            
-            try:
-                postgres_hook.run(setup_sql)
-                logger.info("UUID extension and default setup completed")
-            except Exception as setup_error:
-                logger.warning(f"Setup warning (continuing): {setup_error}")
-            
-            # insert SQL
-            insert_sql = """
-            INSERT INTO articles (
-                "publishDate", "extractedDate", url, headline, 
-                body, section, source, "updatedAt"
-            ) VALUES (
-                %(publishDate)s, %(extractedDate)s, %(url)s, 
-                %(headline)s, %(body)s, %(section)s, %(source)s, CURRENT_TIMESTAMP
-            )
-            ON CONFLICT (url) 
-            DO UPDATE SET 
-                "extractedDate" = EXCLUDED."extractedDate",
-                headline = EXCLUDED.headline,
-                body = EXCLUDED.body,
-                section = EXCLUDED.section,
-                "updatedAt" = CURRENT_TIMESTAMP
-            RETURNING id, url;
-            """
-            
-            loaded_count = 0
-            error_count = 0
-            
-            for i, article in enumerate(articles_data):
-                try:
-                    logger.info(f"Processing article {i+1}/{len(articles_data)}: {article['headline'][:50]}...")
-                    
-                    result = postgres_hook.get_records(insert_sql, parameters=article)
-                    
-                    if result:
-                        article_id, url = result[0]
-                        logger.info(f"✓ Article {i+1} loaded successfully with ID: {article_id}")
-                        loaded_count += 1
+            with instrument(ti) as metrics:
+                # mapped backfill loads receive a single manifest
+                manifests = [manifests] if isinstance(manifests, dict) else list(manifests)
+                skipped = sum(manifest.get('skipped', 0) for manifest in manifests)
+
+                # rows are streamed back to back from each source's artifact, never held in full
+                articles_data = read_all_records(manifests)
+                if not len(articles_data):
+                    logger.info("No articles to load")
+                    return dict(empty_summary(), skipped=skipped)
+            
+                metrics.rows_in = len(articles_data)
+            
+                # large loads go through COPY + one merge, smaller ones through batched upserts
+                load_mode = choose_load_mode(
+                    len(articles_data),
+                    mode=Variable.get("ARTICLE_LOAD_MODE", "auto"),
+                    threshold=int(Variable.get("ARTICLE_COPY_THRESHOLD", COPY_THRESHOLD))
+                )
+                logger.info(
+                    f"Loading {len(articles_data)} articles from {len(manifests)} source branches using {load_mode} mode"
+                )
+
+                # schema check, load, rollup, watermarks and the count share one pooled connection
+                with borrowed_connection(metrics) as conn:
+                    postgres_hook = ConnectionHook(conn)
+
+                    # cached version check, no DDL unless the schema is behind
+                    ensure_schema(conn)
+
+                    # written rows carry the run id so the quality checks can find them
+                    run_id = etl_run_id(ti)
+                    # SQL-level PREPARE must be off behind PgBouncer transaction pooling
+                    prepared = prepared_statements_enabled(Variable.get(PREPARED_STATEMENTS_VARIABLE, "true"))
+                    # a retry skips the rows an earlier attempt already committed
+                    checkpoint = LoadCheckpoint.open(conn, checkpoint_key(ti), input_fingerprint(manifests))
+                    if load_mode == 'copy':
+                        summary = copy_load_articles(
+                            conn, articles_data, run_id=run_id, prepared=prepared, checkpoint=checkpoint
+                        )
                     else:
-                        logger.warning(f"Article {i+1} processed but no ID returned")
-                        loaded_count += 1
-                        
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"✗ Failed to insert article {i+1}: {str(e)}")
-                    continue
-            
-            logger.info(f"Load completed: {loaded_count} successful, {error_count} errors")
-            
-            # verify if inserted or not
-            count_today = postgres_hook.get_first(
-                'SELECT COUNT(*) FROM articles WHERE DATE("extractedDate") = CURRENT_DATE'
-            )[0]
-            logger.info(f"Total articles extracted today: {count_today}")
+                        # one multi-row upsert per batch instead of one round trip per article
+                        batch_size = int(Variable.get("ARTICLE_LOAD_BATCH_SIZE", DEFAULT_BATCH_SIZE))
+                        summary = load_articles(
+                            conn, articles_data, batch_size=batch_size, run_id=run_id, prepared=prepared,
+                            checkpoint=checkpoint
+                        )
+
+                    # recompute the (section, day) rollup groups this run wrote into,
+                    # including rows committed by an earlier attempt
+                    changed = summary["inserted"] or summary["updated"] or summary.get("resumed")
+                    summary["stats_groups"] = update_run_stats(conn, run_id) if changed else 0
+
+                    loaded_count = summary["loaded"]
+                    error_count = summary["errors"]
+                    summary["skipped"] = skipped
+                    metrics.rows_out = summary["inserted"] + summary["updated"]
+            
+                    logger.info(f"Load completed: {loaded_count} successful, {error_count} errors")
+                    if summary.get("resumed"):
+                        logger.info(f"Resumed after {summary['resumed']} rows committed by an earlier attempt")
+                    logger.info(
+                        f"Change metrics: {summary['skipped']} skipped at extract, {summary['inserted']} inserted, "
+                        f"{summary['updated']} updated, {summary['unchanged']} unchanged"
+                    )
+
+                    # only move the watermarks past rows that actually made it in
+                    if error_count == 0:
+                        for manifest in manifests:
+                            advance_watermark(
+                                postgres_hook, get_source(manifest['source']).source, manifest.get('max_publish_date')
+                            )
+                    else:
+                        logger.warning("Load had errors, watermarks not advanced")
+            
+                    # verify if inserted or not (range predicate so the extractedDate index applies)
+                    count_today = postgres_hook.get_first(
+                        'SELECT COUNT(*) FROM articles '
+                        'WHERE "extractedDate" >= CURRENT_DATE AND "extractedDate" < CURRENT_DATE + 1'
+                    )[0]
+                    logger.info(f"Total articles extracted today: {count_today}")
+
+                    checkpoint.clear(conn)
             
-            return {"loaded": loaded_count, "errors": error_count}
+                return summary
             
         except Exception as e:
             logger.error(f"Load task failed: {str(e)}")
             raise
 
     @task
-    def data_quality_check():
-        """Perform basic data quality checks"""
+    def replay_failed_articles(ti=None):
+        """Load the articles earlier runs dead-lettered again, resolving the ones that now succeed"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    # replayed rows count as this run's, so its quality checks cover them
+                    run_id = etl_run_id(ti)
+                    prepared = prepared_statements_enabled(Variable.get(PREPARED_STATEMENTS_VARIABLE, "true"))
+                    stats = replay_dead_letters(
+                        conn,
+                        lambda articles: load_articles(conn, articles, run_id=run_id, prepared=prepared),
+                        max_attempts=int(Variable.get("DEAD_LETTER_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS)),
+                        limit=int(Variable.get("DEAD_LETTER_REPLAY_MAX_ROWS", DEFAULT_REPLAY_MAX_ROWS))
+                    )
+                    if stats.get('inserted') or stats.get('updated'):
+                        stats['stats_groups'] = update_run_stats(conn, run_id)
+
+                metrics.rows_in = stats['replayed']
+                metrics.rows_out = stats['resolved']
+                return stats
+
+        except Exception as e:
+            logger.error(f"Dead-letter replay failed: {str(e)}")
+            raise
+
+    @task
+    def summarize_articles(ti=None):
+        """Fill ai_summary for loaded articles that do not have one yet"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    max_rows = Variable.get("SUMMARY_MAX_ROWS", None)
+                    # local CPU-only backend by default, summaries of unchanged text come from the cache
+                    stats = summarize_pending(
+                        conn,
+                        backend=Variable.get("SUMMARY_BACKEND", DEFAULT_BACKEND),
+                        workers=int(Variable.get("SUMMARY_WORKERS", os.cpu_count() or 1)),
+                        chunk_size=int(Variable.get("SUMMARY_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)),
+                        max_rows=int(max_rows) if max_rows else None
+                    )
+
+                logger.info(
+                    f"Summaries written: {stats['summarized']} generated, {stats['cached']} from cache "
+                    f"in {stats['chunks']} chunks"
+                )
+                metrics.rows_in = metrics.rows_out = stats['summarized'] + stats['cached']
+                return stats
+
+        except Exception as e:
+            logger.error(f"Summary task failed: {str(e)}")
+            raise
+
+    @task
+    def refresh_article_daily_stats(ti=None, params=None):
+        """Recompute recent days of the section x day rollup the dashboard reads"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    # catches API edits and deletes the per-load update cannot see
+                    days = None if (params or {}).get('rebuild_daily_stats') else int(
+                        Variable.get("DAILY_STATS_REFRESH_DAYS", DEFAULT_REFRESH_DAYS)
+                    )
+                    stats = refresh_daily_stats(conn, days=days)
+
+                metrics.rows_out = stats['updated'] + stats['removed']
+                return stats
+
+        except Exception as e:
+            logger.error(f"Daily stats refresh failed: {str(e)}")
+            raise
+
+    @task
+    def maintain_article_archive(ti=None):
+        """Pre-create archive partitions and move months past the retention window out of articles"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    stats = archive_articles(
+                        conn,
+                        retention_months=int(Variable.get("ARCHIVE_RETENTION_MONTHS", DEFAULT_RETENTION_MONTHS)),
+                        precreate_months=int(Variable.get("ARCHIVE_PRECREATE_MONTHS", DEFAULT_PRECREATE_MONTHS)),
+                        batch_size=int(Variable.get("ARCHIVE_BATCH_SIZE", DEFAULT_ARCHIVE_BATCH_SIZE))
+                    )
+
+                # artifacts of runs whose load never succeeded are not removed by their own run
+                stats['artifacts_pruned'] = len(prune_artifacts(
+                    timedelta(days=float(Variable.get("ARTIFACT_RETENTION_DAYS", DEFAULT_ARTIFACT_RETENTION_DAYS)))
+                ))
+
+                logger.info(
+                    f"Archive maintenance: {stats['archived']} articles archived from {len(stats['months'])} months "
+                    f"before {stats['cutoff']}, partitions created: {stats['created'] or 'none'}, "
+                    f"stale artifact runs pruned: {stats['artifacts_pruned']}"
+                )
+                metrics.rows_out = stats['archived']
+                return stats
+
+        except Exception as e:
+            logger.error(f"Archive maintenance failed: {str(e)}")
+            raise
+
+    @task
+    def clean_run_artifacts(ti=None):
+        """Delete this run's intermediate batches once its load has succeeded"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti):
+                deleted = delete_run_artifacts(ti.dag_id, ti.run_id)
+            logger.info(f"Run artifacts {'deleted' if deleted else 'already gone'} for {ti.run_id}")
+            return deleted
+
+        except Exception as e:
+            logger.error(f"Artifact cleanup failed: {str(e)}")
+            raise
+
+    @task
+    def enrich_article_images(ti=None):
+        """Fill image_url for articles without one from their pages' og:image tags"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    max_rows = Variable.get("IMAGE_ENRICH_MAX_ROWS", None)
+                    # pages seen within the TTL come from the cache, with or without an image;
+                    # failed pages are retried once their shorter TTL has passed
+                    stats = enrich_images(
+                        conn,
+                        concurrency=int(Variable.get("IMAGE_FETCH_CONCURRENCY", DEFAULT_CONCURRENCY)),
+                        ttl=timedelta(days=float(Variable.get("IMAGE_CACHE_TTL_DAYS", DEFAULT_CACHE_TTL.days))),
+                        failure_ttl=timedelta(
+                            hours=float(Variable.get("IMAGE_FAILURE_TTL_HOURS", DEFAULT_FAILURE_TTL.total_seconds() / 3600))
+                        ),
+                        max_rows=int(max_rows) if max_rows else None
+                    )
+
+                logger.info(
+                    f"Images filled for {stats['filled']} of {stats['rows']} rows: {stats['fetched']} pages fetched, "
+                    f"{stats['cached']} from cache, {stats['failed']} failed"
+                )
+                metrics.rows_in = stats['rows']
+                metrics.rows_out = stats['filled']
+                metrics.add_http({'requests': stats['fetched'] + stats['failed'], 'bytes': stats['bytes']})
+                return stats
+
+        except Exception as e:
+            logger.error(f"Image enrichment task failed: {str(e)}")
+            raise
+
+    @task
+    def tag_articles(ti=None):
+        """Write keyword and topic tags for articles not yet tagged at their current text"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    ensure_schema(conn)
+                    max_rows = Variable.get("TAG_MAX_ROWS", None)
+                    # the fitted vocabulary is reused until it is older than the max age
+                    stats = tag_pending(
+                        conn,
+                        keywords=int(Variable.get("TAG_KEYWORDS", KEYWORDS)),
+                        max_rows=int(max_rows) if max_rows else None,
+                        max_age_days=int(Variable.get("TAG_VOCABULARY_MAX_AGE_DAYS", DEFAULT_VOCABULARY_MAX_AGE_DAYS))
+                    )
+
+                logger.info(
+                    f"Tagged {stats['tagged']} articles with {stats['tags']} tags in {stats['chunks']} chunks, "
+                    f"vocabulary {stats['vocabulary']}{' (refitted)' if stats['fitted'] else ''}"
+                )
+                metrics.rows_in = stats['tagged']
+                metrics.rows_out = stats['tags']
+                return stats
+
+        except Exception as e:
+            logger.error(f"Tagging task failed: {str(e)}")
+            raise
+
+    @task
+    def data_quality_check(ti=None):
+        """Run the set-based quality checks over the rows this run wrote"""
         logger = logging.getLogger(__name__)
         
         try:
-            postgres_hook = PostgresHook(postgres_conn_id=POSTGRES_CONN_ID)
-
-            # check for duplicate URLs (since url is unique in schema)
-            duplicate_check = """
-            SELECT url, COUNT(*) as count 
-            FROM articles 
-            WHERE DATE("extractedDate") = CURRENT_DATE
-            GROUP BY url 
-            HAVING COUNT(*) > 1
-            """
-            
-            duplicates = postgres_hook.get_records(duplicate_check)
-            if duplicates:
-                logger.warning(f"Found {len(duplicates)} duplicate URLs")
-            
-            # check for articles with missing critical fields
-            missing_data_check = """
-            SELECT COUNT(*) 
-            FROM articles 
-            WHERE DATE("extractedDate") = CURRENT_DATE 
-            AND (headline IS NULL OR headline = '' OR body IS NULL OR body = '')
-            """
-            
-            missing_count = postgres_hook.get_first(missing_data_check)[0]
-            if missing_count > 0:
-                logger.warning(f"Found {missing_count} articles with missing headline or body")
-            
-            logger.info("Data quality check completed")
+            with instrument(ti) as metrics:
+                # one indexed query over this run's rows instead of a scan per check
+                with borrowed_connection(metrics) as conn:
+                    results = run_quality_checks(
+                        ConnectionHook(conn),
+                        run_id=etl_run_id(ti),
+                        min_body_length=int(Variable.get("QUALITY_MIN_BODY_LENGTH", MIN_BODY_LENGTH))
+                    )
+                emit_quality_metrics(results, tags={'dag_id': ti.dag_id})
+                metrics.rows_in = results['rows']
+
+                logger.info(f"Data quality check completed: {json.dumps(results, sort_keys=True)}")
+                return results
             
         except Exception as e:
             logger.error(f"Data quality check failed: {str(e)}")
@@ -333,10 +608,136 @@ with DAG(
 
     # task dependencies
     verify_table_task = verify_table()
-    extract_task = extract_guardian()
-    transform_task = transform_guardian(extract_task)
-    load_task = load_guardian(transform_task)
+    # sources are fetched concurrently, then merged into a single load
+    extract_task = extract_source.expand(source=SOURCE_NAMES)
+    transform_task = transform_source.expand(manifest=extract_task)
+    dedup_task = dedup_articles(transform_task)
+    load_task = load_sources(dedup_task)
+    replay_task = replay_failed_articles()
     quality_check_task = data_quality_check()
+    summarize_task = summarize_articles()
+    images_task = enrich_article_images()
+    tags_task = tag_articles()
+    daily_stats_task = refresh_article_daily_stats()
+    archive_task = maintain_article_archive()
+    cleanup_task = clean_run_artifacts()
     
     # pipeline flow
-    verify_table_task >> extract_task >> transform_task >> load_task >> quality_check_task
\ No newline at end of file
+    verify_table_task >> extract_task >> transform_task >> load_task >> replay_task >> quality_check_task
+    load_task >> [summarize_task, images_task, tags_task, daily_stats_task]
+    # archiving never races this run's own load
+    load_task >> archive_task
+    # a failed load keeps its inputs for the retry; the archive sweep drops them eventually
+    load_task >> cleanup_task
+
+
+# backfill dag: rebuild history for an arbitrary date range, one mapped chunk per day/week
+with DAG(
+    dag_id='env_etl_backfill_dag',
+    default_args=default_args,
+    schedule=None,
+    catchup=False,
+    max_active_runs=1,
+    description='Backfill environmental news from Guardian API over a date range',
+    tags=['environment', 'news', 'guardian', 'backfill'],
+    params={
+        'start_date': Param('2025-01-01', type='string', format='date'),
+        'end_date': Param('2025-01-31', type='string', format='date'),
+        'chunk': Param('day', enum=['day', 'week']),
+    }
+) as backfill_dag:
+
+    @task
+    def plan_backfill_windows(ti=None, params=None):
+        """Split the requested date range into per-day or per-week windows"""
+        logger = logging.getLogger(__name__)
+
+        with instrument(ti) as metrics:
+            windows = split_date_range(params['start_date'], params['end_date'], params['chunk'])
+            metrics.rows_out = len(windows)
+        logger.info(
+            f"Backfilling {params['start_date']} to {params['end_date']} "
+            f"in {len(windows)} {params['chunk']} chunks"
+        )
+        return windows
+
+    # task dependencies
+    backfill_verify_task = verify_table()
+    windows_task = plan_backfill_windows()
+    # one branch per (source, window) pair
+    backfill_extract_task = extract_source.override(
+        max_active_tis_per_dag=BACKFILL_MAX_PARALLEL
+    ).expand(source=SOURCE_NAMES, window=windows_task)
+    backfill_transform_task = transform_source.override(
+        max_active_tis_per_dag=BACKFILL_MAX_PARALLEL
+    ).expand(manifest=backfill_extract_task)
+    backfill_dedup_task = dedup_articles.override(
+        max_active_tis_per_dag=BACKFILL_MAX_PARALLEL
+    ).expand(manifests=backfill_transform_task)
+    backfill_load_task = load_sources.override(
+        max_active_tis_per_dag=BACKFILL_MAX_PARALLEL
+    ).expand(manifests=backfill_dedup_task)
+    backfill_quality_check_task = data_quality_check()
+    backfill_summarize_task = summarize_articles()
+    backfill_images_task = enrich_article_images()
+    backfill_tags_task = tag_articles()
+    backfill_cleanup_task = clean_run_artifacts()
+
+    # pipeline flow
+    backfill_verify_task >> windows_task
+    backfill_load_task >> backfill_quality_check_task
+    backfill_load_task >> [backfill_summarize_task, backfill_images_task, backfill_tags_task]
+    backfill_load_task >> backfill_cleanup_task
+
+
+# one-off search backfill: fill search_vector for rows loaded before the column existed
+with DAG(
+    dag_id='env_etl_search_backfill_dag',
+    default_args=default_args,
+    schedule=None,
+    catchup=False,
+    max_active_runs=1,
+    description='Fill the full-text search column for existing articles',
+    tags=['environment', 'news', 'search', 'backfill'],
+    params={
+        'ranges': Param(DEFAULT_BACKFILL_RANGES, type='integer', minimum=1),
+        'batch_size': Param(DEFAULT_BACKFILL_BATCH_SIZE, type='integer', minimum=1),
+    }
+) as search_backfill_dag:
+
+    @task
+    def plan_search_ranges(ti=None, params=None):
+        """Split the articles id space into ranges that are backfilled in parallel"""
+        logger = logging.getLogger(__name__)
+
+        with instrument(ti) as metrics:
+            ranges = plan_backfill_ranges(params['ranges'])
+            metrics.rows_out = len(ranges)
+        logger.info(f"Backfilling search vectors in {len(ranges)} id ranges")
+        return ranges
+
+    @task(max_active_tis_per_dag=BACKFILL_MAX_PARALLEL)
+    def backfill_search_range(bounds, ti=None, params=None):
+        """Fill search_vector for one id range in short committed batches"""
+        logger = logging.getLogger(__name__)
+
+        try:
+            with instrument(ti) as metrics:
+                with borrowed_connection(metrics) as conn:
+                    updated = backfill_search_vectors(conn, batch_size=params['batch_size'], **bounds)
+
+                logger.info(f"Filled {updated} search vectors in ids [{bounds['lower']!r}, {bounds['upper']!r})")
+                metrics.rows_out = updated
+                return updated
+
+        except Exception as e:
+            logger.error(f"Search backfill failed: {str(e)}")
+            raise
+
+    # task dependencies
+    search_verify_task = verify_table()
+    ranges_task = plan_search_ranges()
+    search_backfill_task = backfill_search_range.expand(bounds=ranges_task)
+
+    # pipeline flow
+    search_verify_task >> ranges_task
\ No newline at end of file
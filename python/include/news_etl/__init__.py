@@ -0,0 +1 @@
+"""Shared helpers for the environmental news ETL DAGs"""
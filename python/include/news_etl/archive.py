@@ -0,0 +1,240 @@
+"""Monthly archive partitions for articles past the retention window.
+
+The articles table belongs to the server's Prisma schema. Its primary key
+(id) and unique url index cannot include a partition key, so the table
+itself stays unpartitioned. Instead it is kept small:
+- A maintenance task moves whole months older than the retention window into
+  articles_archive, which is range-partitioned by month on publishDate.
+- Archive partitions for the next few months to age out are created ahead
+  of time, so moving rows never waits on DDL.
+- Archived rows drop the search vector and the hot-path indexes. Bodies are
+  compressed aggressively: a low toast_tuple_target, and lz4 where the server
+  supports it.
+
+URL uniqueness spans both tables. A url lives either in articles or in the
+archive, and article_archive_urls (url primary key) records every archived
+url with its partition key. Before a load upserts a batch, any of its urls
+found in the registry are moved back into articles. The existing
+ON CONFLICT (url) upsert then treats them exactly as before: unchanged
+content is skipped, changed content is updated. The next maintenance run
+archives them again if they are still old enough.
+"""
+
+from datetime import date, datetime
+import logging
+
+from include.news_etl.search import search_vector_sql
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RETENTION_MONTHS = 24
+DEFAULT_PRECREATE_MONTHS = 3
+DEFAULT_ARCHIVE_BATCH_SIZE = 5000
+
+# smallest value Postgres accepts; bodies are compressed and moved out of line early
+ARCHIVE_TOAST_TUPLE_TARGET = 128
+
+# moves take it exclusively, load restores share it, so a url never lands in both tables
+ARCHIVE_ADVISORY_LOCK = "hashtext('news_etl_article_archive')"
+
+ARCHIVE_COLUMNS = (
+    'id, "publishDate", "extractedDate", url, headline, body, section, source, '
+    '"createdAt", "updatedAt", image_url, ai_summary, content_hash, etl_run_id'
+)
+_QUALIFIED_COLUMNS = ', '.join(f'a.{column.strip()}' for column in ARCHIVE_COLUMNS.split(','))
+
+ARCHIVE_DDL = """
+CREATE TABLE IF NOT EXISTS articles_archive (
+    id TEXT NOT NULL,
+    "publishDate" TIMESTAMP(3) NOT NULL,
+    "extractedDate" TIMESTAMP(3) NOT NULL,
+    url TEXT NOT NULL,
+    headline TEXT NOT NULL,
+    body TEXT NOT NULL,
+    section TEXT NOT NULL,
+    source TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+    image_url TEXT,
+    ai_summary TEXT,
+    content_hash TEXT,
+    etl_run_id TEXT,
+    "archivedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, "publishDate")
+) PARTITION BY RANGE ("publishDate");
+CREATE INDEX IF NOT EXISTS idx_articles_archive_url ON articles_archive(url);
+CREATE INDEX IF NOT EXISTS idx_articles_archive_section_publish_date ON articles_archive(section, "publishDate");
+
+CREATE TABLE IF NOT EXISTS article_archive_urls (
+    url TEXT PRIMARY KEY,
+    "publishDate" TIMESTAMP(3) NOT NULL
+);
+"""
+
+PARTITIONS_SQL = """
+SELECT child.relname
+FROM pg_inherits
+JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+WHERE parent.oid = 'articles_archive'::regclass
+"""
+
+# lz4 is optional at server build time, pglz (the default) stays when it is missing
+_LZ4_BODY = """
+DO $$
+BEGIN
+    ALTER TABLE {name} ALTER COLUMN body SET COMPRESSION lz4;
+EXCEPTION
+    WHEN feature_not_supported THEN NULL;
+END
+$$
+"""
+
+OLDEST_BEFORE_SQL = 'SELECT MIN("publishDate") FROM articles WHERE "publishDate" < %s'
+
+MOVE_BATCH_SQL = f"""
+WITH batch AS (
+    SELECT id
+    FROM articles
+    WHERE "publishDate" >= %(start)s AND "publishDate" < %(end)s
+    LIMIT %(limit)s
+), moved AS (
+    DELETE FROM articles AS a
+    USING batch
+    WHERE a.id = batch.id
+    RETURNING {_QUALIFIED_COLUMNS}
+), registered AS (
+    INSERT INTO article_archive_urls (url, "publishDate")
+    SELECT url, "publishDate" FROM moved
+)
+INSERT INTO articles_archive ({ARCHIVE_COLUMNS})
+SELECT {ARCHIVE_COLUMNS} FROM moved
+"""
+
+
+RESTORE_LOCK_SQL = f'SELECT pg_advisory_xact_lock_shared({ARCHIVE_ADVISORY_LOCK})'
+
+
+def _restore_sql(url_predicate):
+    return f"""
+WITH keys AS (
+    DELETE FROM article_archive_urls
+    WHERE {url_predicate}
+    RETURNING url, "publishDate"
+), restored AS (
+    DELETE FROM articles_archive AS a
+    USING keys
+    WHERE a.url = keys.url AND a."publishDate" = keys."publishDate"
+    RETURNING {_QUALIFIED_COLUMNS}
+)
+INSERT INTO articles ({ARCHIVE_COLUMNS}, search_vector)
+SELECT {ARCHIVE_COLUMNS}, {search_vector_sql('headline', 'body')}
+FROM restored
+"""
+
+
+# a registry miss is one primary key probe per url; the archive itself is only read on a hit
+RESTORE_URLS_SQL = RESTORE_LOCK_SQL + ';' + _restore_sql('url = ANY(%(urls)s)')
+
+# body of the prepared restore the batched loader executes, urls as a text[] parameter
+RESTORE_PREPARED_SQL = _restore_sql('url = ANY($1)')
+
+RESTORE_STAGED_SQL = RESTORE_LOCK_SQL + ';' + _restore_sql('url IN (SELECT url FROM articles_staging)')
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"articles_archive_{month:%Y_%m}"
+
+
+def ensure_partitions(conn, months):
+    """Create the archive partitions for the given month starts that are missing, returns their names"""
+    with conn.cursor() as cursor:
+        cursor.execute(PARTITIONS_SQL)
+        existing = {row[0] for row in cursor.fetchall()}
+    conn.commit()
+
+    created = []
+    for month in sorted(set(months)):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        with conn.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF articles_archive "
+                f"FOR VALUES FROM (%s) TO (%s) WITH (toast_tuple_target = {ARCHIVE_TOAST_TUPLE_TARGET})",
+                (month, add_months(month, 1))
+            )
+            cursor.execute(_LZ4_BODY.format(name=name))
+        conn.commit()
+        created.append(name)
+        logger.info(f"Created archive partition {name}")
+    return created
+
+
+def move_month(conn, month, batch_size=DEFAULT_ARCHIVE_BATCH_SIZE):
+    """Move one month of articles into its archive partition in short batches, returns rows moved"""
+    moved = 0
+    bounds = {'start': month, 'end': add_months(month, 1), 'limit': batch_size}
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(f'SELECT pg_advisory_xact_lock({ARCHIVE_ADVISORY_LOCK})')
+            cursor.execute(MOVE_BATCH_SQL, bounds)
+            count = cursor.rowcount
+        conn.commit()
+        moved += count
+        if count < batch_size:
+            return moved
+
+
+def archive_articles(conn, retention_months=DEFAULT_RETENTION_MONTHS, precreate_months=DEFAULT_PRECREATE_MONTHS,
+                     batch_size=DEFAULT_ARCHIVE_BATCH_SIZE, today=None):
+    """Move every month older than the retention window to the archive.
+
+    Partitions are ensured for those months and for the `precreate_months`
+    months that age out next. Returns {"cutoff", "created", "archived", "months"}.
+    """
+    if retention_months < 1:
+        raise ValueError(f"Retention must be at least one month, got {retention_months}")
+    cutoff = add_months(month_start(today or datetime.now().date()), -retention_months)
+
+    with conn.cursor() as cursor:
+        cursor.execute(OLDEST_BEFORE_SQL, (cutoff,))
+        oldest = cursor.fetchone()[0]
+    conn.commit()
+
+    expired = []
+    month = month_start(oldest) if oldest else cutoff
+    while month < cutoff:
+        expired.append(month)
+        month = add_months(month, 1)
+    upcoming = [add_months(cutoff, offset) for offset in range(precreate_months)]
+    created = ensure_partitions(conn, expired + upcoming)
+
+    archived = 0
+    for month in expired:
+        count = move_month(conn, month, batch_size)
+        if count:
+            logger.info(f"Archived {count} articles published in {month:%Y-%m}")
+        archived += count
+
+    return {
+        'cutoff': cutoff.isoformat(),
+        'created': created,
+        'archived': archived,
+        'months': [f'{month:%Y-%m}' for month in expired],
+    }
+
+
+def restore_archived(cursor, urls):
+    """Move archived rows for `urls` back into articles ahead of an upsert, returns rows restored"""
+    cursor.execute(RESTORE_URLS_SQL, {'urls': list(urls)})
+    return cursor.rowcount
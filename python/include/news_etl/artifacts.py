@@ -0,0 +1,274 @@
+"""Compressed NDJSON batches in object storage, referenced from XCom by a small manifest.
+
+Tasks write their records under `<root>/<dag_id>/<run_id>/<task_id>[-<map_index>]/`
+and only the manifest (uris, codec, row count) goes through XCom. The root comes
+from NEWS_ETL_ARTIFACT_ROOT and is any ObjectStoragePath-compatible url such as
+`s3://aws_default@bucket/news-etl`. The local default only works when every task
+runs on one machine, so it is refused under a distributed executor.
+
+A run's artifacts are deleted once its load has succeeded. Runs that never get
+there keep theirs for retries until a retention sweep removes them.
+
+PageCheckpoint keeps the API pages an extract has fetched under its prefix,
+so a retried extract only fetches the pages it is missing.
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
+from urllib.parse import urlsplit
+import gzip
+import hashlib
+import io
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_ROOT_ENV = 'NEWS_ETL_ARTIFACT_ROOT'
+DEFAULT_ARTIFACT_ROOT = 'file:///tmp/news_etl_artifacts'
+
+# executors that run every task on one machine, so a local root is shared
+LOCAL_EXECUTORS = ('LocalExecutor', 'SequentialExecutor', 'DebugExecutor')
+
+# runs that never finished keep their artifacts this long
+DEFAULT_ARTIFACT_RETENTION_DAYS = 7
+
+# records per compressed part file
+ROWS_PER_PART = 10000
+
+CODECS = {
+    'zstd': '.ndjson.zst',
+    'gzip': '.ndjson.gz',
+}
+DEFAULT_CODEC = 'zstd'
+
+
+def _storage_path(uri):
+    from airflow.sdk import ObjectStoragePath
+
+    return ObjectStoragePath(uri)
+
+
+def _distributed_executors():
+    from airflow.configuration import conf
+
+    # entries are class names, import paths or alias:path pairs
+    names = [entry.split(':')[-1].rsplit('.', 1)[-1].strip() for entry in conf.get('core', 'executor').split(',')]
+    return [name for name in names if name and name not in LOCAL_EXECUTORS]
+
+
+def artifact_root():
+    """The configured artifact root, refusing a local one that other workers cannot read"""
+    root = os.environ.get(ARTIFACT_ROOT_ENV, DEFAULT_ARTIFACT_ROOT).rstrip('/')
+    if urlsplit(root).scheme in ('', 'file'):
+        distributed = _distributed_executors()
+        if distributed:
+            raise ValueError(
+                f"Artifact root {root!r} is local to each worker but tasks run on {', '.join(distributed)}; "
+                f"set {ARTIFACT_ROOT_ENV} to shared object storage such as s3://<conn_id>@<bucket>/news-etl"
+            )
+    return root
+
+
+def run_prefix(dag_id, run_id, root=None):
+    """Location of every artifact one DAG run writes"""
+    run_key = run_id.replace(':', '_').replace('+', '_')
+    return f'{(root or artifact_root()).rstrip("/")}/{dag_id}/{run_key}'
+
+
+def artifact_prefix(ti, root=None):
+    """Build the artifact location for a task instance"""
+    task_key = ti.task_id
+    if getattr(ti, 'map_index', -1) not in (None, -1):
+        task_key = f'{task_key}-{ti.map_index}'
+    return f'{run_prefix(ti.dag_id, ti.run_id, root)}/{task_key}'
+
+
+def delete_run_artifacts(dag_id, run_id, root=None):
+    """Delete everything a DAG run wrote, returns whether there was anything"""
+    path = _storage_path(run_prefix(dag_id, run_id, root))
+    if not path.exists():
+        return False
+    path.rmdir(recursive=True)
+    return True
+
+
+def _modified_at(info):
+    """Modification time of a stat result as an aware datetime, None when the store reports none"""
+    value = info.get('mtime') or info.get('LastModified') or info.get('updated')
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return None
+
+
+def prune_artifacts(retention=timedelta(days=DEFAULT_ARTIFACT_RETENTION_DAYS), root=None, now=None):
+    """Delete run directories whose newest file is older than `retention`, returns their uris.
+
+    Runs the store cannot date are kept.
+    """
+    root = _storage_path(root or artifact_root())
+    if not root.exists():
+        return []
+    cutoff = (now or datetime.now(timezone.utc)) - retention
+    pruned = []
+    for dag_dir in root.iterdir():
+        if not dag_dir.is_dir():
+            continue
+        for run_dir in dag_dir.iterdir():
+            if not run_dir.is_dir():
+                continue
+            times = [_modified_at(path.stat()) for path in run_dir.rglob('*') if path.is_file()]
+            if times and None not in times and max(times) < cutoff:
+                run_dir.rmdir(recursive=True)
+                pruned.append(str(run_dir))
+    return pruned
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _open_writer(raw, codec):
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdCompressor(level=3).stream_writer(raw, closefd=False)
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {tuple(CODECS)}")
+
+
+def _open_reader(raw, codec):
+    if codec == 'zstd':
+        import zstandard
+
+        return zstandard.ZstdDecompressor().stream_reader(raw, closefd=False)
+    if codec == 'gzip':
+        return gzip.GzipFile(fileobj=raw, mode='rb')
+    raise ValueError(f"Unknown codec {codec!r}, expected one of {tuple(CODECS)}")
+
+
+def _write_part(uri, records, codec):
+    path = _storage_path(uri)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open('wb') as raw:
+        writer = _open_writer(raw, codec)
+        for record in records:
+            writer.write(json.dumps(record, default=_json_default, separators=(',', ':')).encode('utf-8'))
+            writer.write(b'\n')
+        writer.close()
+    return path.stat().get('size')
+
+
+def write_records(records, prefix, codec=DEFAULT_CODEC, rows_per_part=ROWS_PER_PART, **meta):
+    """Write an iterable of dicts as compressed NDJSON parts and return the manifest"""
+    parts = []
+    count = 0
+    total_bytes = 0
+    buffer = []
+
+    def flush():
+        nonlocal total_bytes
+        uri = f'{prefix}/part-{len(parts):05d}{CODECS[codec]}'
+        total_bytes += _write_part(uri, buffer, codec) or 0
+        parts.append({'uri': uri, 'count': len(buffer)})
+        buffer.clear()
+
+    for record in records:
+        buffer.append(record)
+        count += 1
+        if len(buffer) >= rows_per_part:
+            flush()
+    if buffer:
+        flush()
+
+    manifest = {'codec': codec, 'count': count, 'bytes': total_bytes, 'parts': parts}
+    manifest.update(meta)
+    return manifest
+
+
+def iter_records(manifest):
+    """Stream records back from every part of a manifest, one dict at a time"""
+    codec = manifest['codec']
+    for part in manifest['parts']:
+        with _storage_path(part['uri']).open('rb') as raw:
+            reader = _open_reader(raw, codec)
+            for line in io.TextIOWrapper(reader, encoding='utf-8'):
+                if line.strip():
+                    yield json.loads(line)
+
+
+class RecordStream:
+    """Re-iterable view over one or more manifests; each iteration re-reads from storage"""
+
+    def __init__(self, *manifests):
+        self.manifests = manifests
+
+    def __iter__(self):
+        return chain.from_iterable(iter_records(manifest) for manifest in self.manifests)
+
+    def __len__(self):
+        return sum(manifest['count'] for manifest in self.manifests)
+
+
+def _validate(manifest):
+    if not manifest or 'parts' not in manifest or 'codec' not in manifest:
+        raise ValueError("Invalid artifact manifest")
+    return manifest
+
+
+def read_records(manifest):
+    """Validate a manifest and return a re-iterable stream over its records"""
+    return RecordStream(_validate(manifest))
+
+
+def read_all_records(manifests):
+    """Validate several manifests and stream their records back to back"""
+    return RecordStream(*(_validate(manifest) for manifest in manifests))
+
+
+class PageCheckpoint:
+    """API pages already fetched by a task instance, kept until its manifest is written.
+
+    Pages are stored per query, keyed by a digest of the query parameters, so
+    a retry with a different window does not pick up pages from the old one.
+    """
+
+    def __init__(self, prefix, codec=DEFAULT_CODEC):
+        self.prefix = prefix.rstrip('/')
+        self.codec = codec
+        self.loaded = 0
+
+    def _uri(self, query, page):
+        digest = hashlib.sha256(json.dumps(query, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+        return f'{self.prefix}/{digest}/page-{page:05d}{CODECS[self.codec]}'
+
+    def load(self, query, page):
+        """The stored response for a page of `query`, or None"""
+        uri = self._uri(query, page)
+        if not _storage_path(uri).exists():
+            return None
+        try:
+            response = next(iter_records({'codec': self.codec, 'parts': [{'uri': uri}]}))
+        except Exception as e:
+            # a page cut short by a crashed attempt is fetched again
+            logger.warning(f"Ignoring unreadable checkpointed page {uri}: {e}")
+            return None
+        self.loaded += 1
+        return response
+
+    def save(self, query, page, response):
+        _write_part(self._uri(query, page), [response], self.codec)
+
+    def clear(self):
+        """Drop every stored page, so a later run of the task fetches fresh data"""
+        path = _storage_path(self.prefix)
+        if path.exists():
+            path.rmdir(recursive=True)
@@ -0,0 +1,97 @@
+"""Load checkpoints, so a retried load resumes after its last committed batch.
+
+etl_checkpoints holds one row per load task instance: how many input rows
+are committed, and how many of those ended up as errors. The loader writes
+it in the same transaction as each batch, so it can never run ahead of the
+data. A retry skips that many rows of the same input. A fingerprint of the
+input manifests guards this: if upstream tasks were re-run and wrote
+different artifacts, the load starts over. The row is deleted once the
+load task has finished, so clearing the task later reloads everything.
+
+The extract side of resuming lives in artifacts.PageCheckpoint.
+"""
+
+import hashlib
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# checkpoints of loads that never finished are dropped after this long
+CHECKPOINT_RETENTION = '30 days'
+
+CHECKPOINT_DDL = """
+CREATE TABLE IF NOT EXISTS etl_checkpoints (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    position BIGINT NOT NULL,
+    errors INTEGER NOT NULL DEFAULT 0,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+GET_CHECKPOINT_SQL = 'SELECT fingerprint, position, errors FROM etl_checkpoints WHERE key = %s'
+
+SAVE_CHECKPOINT_SQL = """
+INSERT INTO etl_checkpoints (key, fingerprint, position, errors)
+VALUES (%s, %s, %s, %s)
+ON CONFLICT (key)
+DO UPDATE SET
+    fingerprint = EXCLUDED.fingerprint,
+    position = EXCLUDED.position,
+    errors = EXCLUDED.errors,
+    "updatedAt" = CURRENT_TIMESTAMP
+"""
+
+CLEAR_CHECKPOINT_SQL = f"""
+DELETE FROM etl_checkpoints
+WHERE key = %s OR "updatedAt" < CURRENT_TIMESTAMP - INTERVAL '{CHECKPOINT_RETENTION}'
+"""
+
+
+def checkpoint_key(ti):
+    """One checkpoint per task instance, shared by all of its tries"""
+    return f"{ti.dag_id}/{ti.run_id}/{ti.task_id}/{getattr(ti, 'map_index', -1)}"
+
+
+def input_fingerprint(value):
+    """Stable digest of a task's input, e.g. its list of manifests"""
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class LoadCheckpoint:
+    """Input rows a load has committed, and the errors among them"""
+
+    def __init__(self, key, fingerprint, position=0, errors=0):
+        self.key = key
+        self.fingerprint = fingerprint
+        self.position = position
+        self.errors = errors
+
+    @classmethod
+    def open(cls, conn, key, fingerprint):
+        """The stored checkpoint for `key`, or a fresh one when there is none for this input"""
+        with conn.cursor() as cursor:
+            cursor.execute(GET_CHECKPOINT_SQL, (key,))
+            row = cursor.fetchone()
+        conn.commit()
+        if row and row[0] == fingerprint:
+            logger.info(f"Resuming load {key} after {row[1]} committed rows")
+            return cls(key, fingerprint, row[1], row[2])
+        if row:
+            logger.info(f"Input of load {key} changed since its checkpoint, starting over")
+        return cls(key, fingerprint)
+
+    def save(self, cursor, position, errors):
+        """Record progress on the caller's transaction, so it commits with the batch.
+
+        `position` and `errors` are absolute. The object keeps the values it
+        was opened with, because the transaction may still roll back.
+        """
+        cursor.execute(SAVE_CHECKPOINT_SQL, (self.key, self.fingerprint, position, errors))
+
+    def clear(self, conn):
+        """Forget this checkpoint (and any long abandoned ones)"""
+        with conn.cursor() as cursor:
+            cursor.execute(CLEAR_CHECKPOINT_SQL, (self.key,))
+        conn.commit()
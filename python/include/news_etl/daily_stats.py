@@ -0,0 +1,154 @@
+"""Section x source x day rollup of the articles table for the dashboard endpoints.
+
+article_daily_stats holds one row per (publish day, section, source) with
+the article count, the average body length and the latest publish time. Read
+endpoints query this small table (see DAILY_STATS_SQL) instead of grouping
+`articles` on every request. The server's GET /articles/statistics takes its
+totals and its section and source distributions from it.
+
+The rollup is kept current two ways:
+- After each load, the groups the run touched are recomputed. These are the
+  (section, day) pairs of rows stamped with the run id, and each group is
+  re-read through the (section, publishDate) index.
+- A refresh task recomputes the last few days wholesale. This picks up edits
+  and deletes made through the API, and rows that an update moved to another
+  section or day. It also rebuilds the whole table when the table is empty or
+  a rebuild is asked for.
+
+Groups are always recomputed from the rows themselves, never adjusted by
+deltas, so a retried or repeated refresh cannot drift. Rows moved to the
+archive (see archive.py) still count towards their groups.
+"""
+
+from datetime import datetime, time, timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# days before today the refresh task recomputes
+DEFAULT_REFRESH_DAYS = 3
+
+DAILY_STATS_DDL = """
+CREATE TABLE IF NOT EXISTS article_daily_stats (
+    day DATE NOT NULL,
+    section TEXT NOT NULL,
+    article_count INTEGER NOT NULL,
+    avg_body_length INTEGER NOT NULL,
+    latest_publish_date TIMESTAMP(3) NOT NULL,
+    "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (day, section)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_section_publish_date ON articles(section, "publishDate");
+"""
+
+# archived months keep their groups; filters on "publishDate" prune archive partitions
+_ALL_ARTICLES = """(
+    SELECT section, source, "publishDate", body FROM articles
+    UNION ALL
+    SELECT section, source, "publishDate", body FROM articles_archive
+)"""
+
+# groups split by source so per-source counts come from the rollup too; the old
+# per-section rows are dropped and the next refresh rebuilds the empty table
+DAILY_STATS_SOURCE_DDL = """
+ALTER TABLE article_daily_stats ADD COLUMN IF NOT EXISTS source TEXT;
+DELETE FROM article_daily_stats WHERE source IS NULL;
+ALTER TABLE article_daily_stats ALTER COLUMN source SET NOT NULL;
+ALTER TABLE article_daily_stats DROP CONSTRAINT IF EXISTS article_daily_stats_pkey;
+ALTER TABLE article_daily_stats ADD PRIMARY KEY (day, section, source);
+"""
+
+# unchanged groups are not rewritten, so "updatedAt" marks real changes
+_UPSERT_STATS = """
+INSERT INTO article_daily_stats AS s (section, source, day, article_count, avg_body_length, latest_publish_date)
+{select}
+ON CONFLICT (day, section, source) DO UPDATE SET
+    article_count = EXCLUDED.article_count,
+    avg_body_length = EXCLUDED.avg_body_length,
+    latest_publish_date = EXCLUDED.latest_publish_date,
+    "updatedAt" = CURRENT_TIMESTAMP
+WHERE (s.article_count, s.avg_body_length, s.latest_publish_date)
+    IS DISTINCT FROM (EXCLUDED.article_count, EXCLUDED.avg_body_length, EXCLUDED.latest_publish_date)
+"""
+
+# every group a run wrote into, each re-read in full through the (section, publishDate) index
+RUN_STATS_SQL = """
+WITH touched AS (
+    SELECT DISTINCT section, source, "publishDate"::date AS day
+    FROM articles
+    WHERE etl_run_id = %(run_id)s
+)
+""" + _UPSERT_STATS.format(select="""
+SELECT t.section, t.source, t.day, COUNT(*), ROUND(AVG(length(a.body)))::integer, MAX(a."publishDate")
+FROM touched AS t
+JOIN """ + _ALL_ARTICLES + """ AS a
+    ON a.section = t.section AND a."publishDate" >= t.day AND a."publishDate" < t.day + 1 AND a.source = t.source
+GROUP BY t.section, t.source, t.day
+""")
+
+WINDOW_STATS_SQL = _UPSERT_STATS.format(select="""
+SELECT section, source, "publishDate"::date, COUNT(*), ROUND(AVG(length(body)))::integer, MAX("publishDate")
+FROM """ + _ALL_ARTICLES + """ AS a
+WHERE "publishDate" >= %(since)s
+GROUP BY 1, 2, 3
+""")
+
+# groups whose last article was deleted or moved away
+PRUNE_STATS_SQL = """
+DELETE FROM article_daily_stats AS s
+WHERE s.day >= %(since)s
+  AND NOT EXISTS (
+    SELECT 1 FROM """ + _ALL_ARTICLES + """ AS a
+    WHERE a.section = s.section AND a."publishDate" >= s.day AND a."publishDate" < s.day + 1
+      AND a.source = s.source
+  )
+"""
+
+DAILY_STATS_SQL = """
+SELECT day, section, source, article_count, avg_body_length, latest_publish_date
+FROM article_daily_stats
+WHERE day >= %(since)s AND day <= %(until)s
+ORDER BY day DESC, section, source
+"""
+
+
+def update_run_stats(conn, run_id):
+    """Recompute the groups holding rows stamped with `run_id`, returns the groups rewritten"""
+    with conn.cursor() as cursor:
+        cursor.execute(RUN_STATS_SQL, {'run_id': run_id})
+        updated = cursor.rowcount
+    conn.commit()
+    return updated
+
+
+def refresh_daily_stats(conn, days=DEFAULT_REFRESH_DAYS, today=None):
+    """Recompute every group from `days` days before today onward, or all of them when days is None.
+
+    An empty rollup is always rebuilt in full. Returns {"since", "updated", "removed"}.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM article_daily_stats)')
+        populated = cursor.fetchone()[0]
+        if days is None or not populated:
+            since = datetime.min
+        else:
+            since = datetime.combine((today or datetime.now().date()) - timedelta(days=days), time.min)
+
+        cursor.execute(WINDOW_STATS_SQL, {'since': since})
+        updated = cursor.rowcount
+        cursor.execute(PRUNE_STATS_SQL, {'since': since})
+        removed = cursor.rowcount
+    conn.commit()
+
+    logger.info(f"Daily stats from {since.date()}: {updated} groups rewritten, {removed} removed")
+    return {'since': None if since == datetime.min else since.date().isoformat(), 'updated': updated,
+            'removed': removed}
+
+
+def get_daily_stats(conn, since, until):
+    """(day, section, source, article_count, avg_body_length, latest_publish_date) rows between two dates"""
+    with conn.cursor() as cursor:
+        cursor.execute(DAILY_STATS_SQL, {'since': since, 'until': until})
+        rows = cursor.fetchall()
+    conn.commit()
+    return rows
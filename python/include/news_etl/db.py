@@ -0,0 +1,201 @@
+"""Pooled Postgres connections shared by everything a task does.
+
+Tasks borrow one connection from a process-wide pool with `pool.connection()`.
+Schema checks, watermarks, loads, quality checks and the post-load count
+then all go through it. Helpers written against the hook API (get_first,
+get_records, run) get a ConnectionHook over the borrowed connection, so they
+no longer open a connection per call. Returned connections are rolled back
+before they go idle, so a borrower never inherits an open transaction.
+
+Airflow runs each task instance in its own process, so a pool only spans the
+statements of one task. Reuse across tasks and workers belongs to PgBouncer.
+Point the connection at it in transaction pooling mode and turn prepared
+statements off (see `prepared_statements_enabled`), because SQL-level PREPARE
+does not survive PgBouncer handing the server connection to another client.
+
+iter_keyset_chunks is the shared paging loop of the tasks that work through
+articles in chunks (summaries, images, tags).
+"""
+
+import atexit
+from contextlib import contextmanager
+import logging
+import threading
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# idle connections kept per pool; a task rarely needs more than one at a time
+DEFAULT_MAX_IDLE = 2
+
+PREPARED_STATEMENTS_VARIABLE = 'DB_PREPARED_STATEMENTS'
+
+
+class ConnectionPool:
+    """Reuses connections made by `factory`, keeping at most `max_idle` open between borrows"""
+
+    def __init__(self, factory, max_idle=DEFAULT_MAX_IDLE):
+        self.factory = factory
+        self.max_idle = max_idle
+        self.created = 0
+        self.reused = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            while self._idle:
+                conn = self._idle.pop()
+                if not conn.closed:
+                    self.reused += 1
+                    return conn
+            self.created += 1
+        return self.factory()
+
+    def release(self, conn):
+        if conn.closed:
+            return
+        try:
+            # an unfinished transaction must not leak into the next borrower
+            conn.rollback()
+        except Exception as e:
+            logger.warning(f"Discarding pooled connection that failed to reset: {e}")
+            conn.close()
+            return
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the block"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Close every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(conn_id, factory=None):
+    """Process-wide pool for an Airflow connection id, created on first use"""
+    with _pools_lock:
+        if conn_id not in _pools:
+            pool = _pools[conn_id] = ConnectionPool(factory or _hook_factory(conn_id))
+            # idle backends are closed cleanly instead of dropped when the task process exits
+            atexit.register(pool.close)
+        return _pools[conn_id]
+
+
+def _hook_factory(conn_id):
+    def connect():
+        from airflow.providers.postgres.hooks.postgres import PostgresHook
+
+        return PostgresHook(postgres_conn_id=conn_id).get_conn()
+
+    return connect
+
+
+class ConnectionHook:
+    """The parts of the PostgresHook API the pipeline helpers use, over one borrowed connection"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def get_conn(self):
+        return self.conn
+
+    def get_first(self, sql, parameters=None):
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, parameters)
+            row = cursor.fetchone()
+        self.conn.commit()
+        return row
+
+    def get_records(self, sql, parameters=None):
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, parameters)
+            rows = cursor.fetchall()
+        self.conn.commit()
+        return rows
+
+    def run(self, sql, parameters=None):
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql, parameters)
+        self.conn.commit()
+
+
+def prepared_statements_enabled(value):
+    """Parse the DB_PREPARED_STATEMENTS Variable; anything but an explicit off keeps them on"""
+    return str(value).strip().lower() not in ('0', 'false', 'off', 'no')
+
+
+# connection -> names of the statements prepared on it, None when a failed round trip
+# left that unknown; pooled connections keep theirs
+_prepared = weakref.WeakKeyDictionary()
+
+
+def prepare_sql(conn, name, parameter_types, sql):
+    """PREPARE command for `sql` as `name`, or an empty string when `conn` already has it.
+
+    The caller sends it in the same round trip as the first EXECUTE, inside
+    prepared_round_trip so the name is only recorded once that has succeeded.
+    """
+    names = _prepared.get(conn, set())
+    if names is None:
+        # a failed round trip may have stopped before or after its PREPARE, ask the server
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT name FROM pg_prepared_statements')
+            names = _prepared[conn] = {row[0] for row in cursor.fetchall()}
+    if name in names:
+        return ''
+    return f"PREPARE {name}({', '.join(parameter_types)}) AS {sql};"
+
+
+@contextmanager
+def prepared_round_trip(conn, *names):
+    """Record `names` as prepared on `conn` if the enclosed execute succeeds.
+
+    A PREPARE that ran survives the rollback of a later failure, one that did
+    not run never existed, so a failure marks the connection's statements unknown.
+    """
+    try:
+        yield
+    except BaseException:
+        _prepared[conn] = None
+        raise
+    _prepared.setdefault(conn, set()).update(names)
+
+
+def iter_keyset_chunks(conn, sql, chunk_size, max_rows=None):
+    """Yield chunks of rows from `sql`, paging on the key in its first column.
+
+    `sql` filters on `key > %s`, orders by the key and ends in `LIMIT %s`.
+    Each page is read in its own short transaction, so rows the caller updates
+    between pages drop out of later pages instead of being read again.
+    """
+    last_key = ''
+    seen = 0
+    while max_rows is None or seen < max_rows:
+        limit = chunk_size if max_rows is None else min(chunk_size, max_rows - seen)
+        with conn.cursor() as cursor:
+            cursor.execute(sql, (last_key, limit))
+            rows = cursor.fetchall()
+        conn.commit()
+        if not rows:
+            return
+        seen += len(rows)
+        last_key = rows[-1][0]
+        yield rows
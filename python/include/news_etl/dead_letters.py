@@ -0,0 +1,143 @@
+"""Dead-letter table for articles the load could not write, and their replay.
+
+When a batch fails, the loader retries it row by row. Rows that still fail
+used to be logged and dropped. They now land in article_dead_letters with
+the error and the article payload. There is at most one open entry per url:
+failing again overwrites the error and payload and bumps `attempts`.
+
+Any load that commits a url resolves that url's open entries, so a newer
+version loading fine the next day closes the entry for an older one.
+
+The replay task loads open entries back through the normal loader.
+- Entries older than the row now stored for their url are resolved without
+  being written, so a replay never puts old text back over new.
+- Entries that load are marked resolved.
+- Entries that fail again stay open with the new error.
+- Entries that have failed `max_attempts` times are left alone until someone
+  fixes the data or the schema.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+LOAD_STAGE = 'load'
+
+DEFAULT_REPLAY_MAX_ROWS = 10000
+DEFAULT_MAX_ATTEMPTS = 5
+
+DEAD_LETTER_DDL = """
+CREATE TABLE IF NOT EXISTS article_dead_letters (
+    id BIGSERIAL PRIMARY KEY,
+    stage TEXT NOT NULL,
+    url TEXT,
+    payload JSONB NOT NULL,
+    error TEXT NOT NULL,
+    etl_run_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "failedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "resolvedAt" TIMESTAMP(3)
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_article_dead_letters_open
+    ON article_dead_letters(stage, url) WHERE "resolvedAt" IS NULL;
+"""
+
+RECORD_SQL = """
+INSERT INTO article_dead_letters (stage, url, payload, error, etl_run_id)
+VALUES %s
+ON CONFLICT (stage, url) WHERE "resolvedAt" IS NULL
+DO UPDATE SET
+    payload = EXCLUDED.payload,
+    error = EXCLUDED.error,
+    etl_run_id = EXCLUDED.etl_run_id,
+    attempts = article_dead_letters.attempts + 1,
+    "failedAt" = CURRENT_TIMESTAMP
+"""
+
+_RECORD_ROW = '(%s, %s, %s::jsonb, %s, %s)'
+
+OPEN_SQL = """
+SELECT id, attempts, payload
+FROM article_dead_letters
+WHERE stage = %(stage)s AND "resolvedAt" IS NULL AND attempts < %(max_attempts)s
+ORDER BY id
+LIMIT %(limit)s
+"""
+
+# run by the loaders in the transaction that writes the urls
+_RESOLVE_LOADED_SQL = f"""
+UPDATE article_dead_letters
+SET "resolvedAt" = CURRENT_TIMESTAMP
+WHERE stage = '{LOAD_STAGE}' AND "resolvedAt" IS NULL AND url {{}}
+"""
+
+RESOLVE_LOADED_URLS_SQL = _RESOLVE_LOADED_SQL.format('= ANY(%(urls)s::text[])')
+
+RESOLVE_LOADED_STAGED_SQL = _RESOLVE_LOADED_SQL.format('IN (SELECT url FROM articles_staging)')
+
+# the stored row was extracted after the failed payload, loading the payload would roll it back
+SUPERSEDED_SQL = """
+UPDATE article_dead_letters AS d
+SET "resolvedAt" = CURRENT_TIMESTAMP
+FROM articles AS a
+WHERE d.stage = %(stage)s AND d."resolvedAt" IS NULL
+  AND a.url = d.url AND a."extractedDate" > (d.payload->>'extractedDate')::timestamp
+"""
+
+RESOLVED_COUNT_SQL = 'SELECT COUNT(*) FROM article_dead_letters WHERE id = ANY(%s) AND "resolvedAt" IS NOT NULL'
+
+# loader bookkeeping, recomputed when a payload is loaded again
+_DERIVED_FIELDS = ('contentHash', 'etlRunId')
+
+
+def record_dead_letters(cursor, failures, stage=LOAD_STAGE, run_id=None):
+    """Write (article, error) pairs as open dead letters on the caller's transaction"""
+    if not failures:
+        return 0
+    rows = []
+    for article, error in failures:
+        payload = {key: value for key, value in article.items() if key not in _DERIVED_FIELDS}
+        rows.append(cursor.mogrify(_RECORD_ROW, (
+            stage, article.get('url'), json.dumps(payload, default=str), error, run_id
+        )))
+    cursor.execute(RECORD_SQL.encode('utf-8').replace(b'%s', b','.join(rows)))
+    return len(rows)
+
+
+def open_dead_letters(conn, stage=LOAD_STAGE, max_attempts=DEFAULT_MAX_ATTEMPTS, limit=DEFAULT_REPLAY_MAX_ROWS):
+    """(id, attempts, payload) of open entries still under `max_attempts`, oldest first"""
+    with conn.cursor() as cursor:
+        cursor.execute(OPEN_SQL, {'stage': stage, 'max_attempts': max_attempts, 'limit': limit})
+        rows = cursor.fetchall()
+    conn.commit()
+    return rows
+
+
+def replay_dead_letters(conn, load, max_attempts=DEFAULT_MAX_ATTEMPTS, limit=DEFAULT_REPLAY_MAX_ROWS):
+    """Load open dead letters again with `load(articles)`, a loader that resolves urls it commits.
+
+    Entries superseded by a newer stored row are resolved first and not
+    loaded. Returns the loader summary plus "superseded", "replayed" and
+    "resolved" (replayed entries that loaded) counts.
+    """
+    with conn.cursor() as cursor:
+        cursor.execute(SUPERSEDED_SQL, {'stage': LOAD_STAGE})
+        superseded = cursor.rowcount
+    conn.commit()
+    if superseded:
+        logger.info(f"Resolved {superseded} dead letters superseded by newer loads")
+
+    entries = open_dead_letters(conn, max_attempts=max_attempts, limit=limit)
+    if not entries:
+        return {'superseded': superseded, 'replayed': 0, 'resolved': 0}
+
+    summary = load([payload for _, _, payload in entries])
+    with conn.cursor() as cursor:
+        cursor.execute(RESOLVED_COUNT_SQL, ([entry_id for entry_id, _, _ in entries],))
+        resolved = cursor.fetchone()[0]
+    conn.commit()
+
+    logger.info(f"Replayed {len(entries)} dead letters: {resolved} resolved, {len(entries) - resolved} still failing")
+    return dict(summary, superseded=superseded, replayed=len(entries), resolved=resolved)
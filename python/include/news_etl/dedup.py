@@ -0,0 +1,343 @@
+"""Near-duplicate detection with MinHash signatures and a persisted LSH index.
+
+Each article's headline and body are cut into word shingles and summarized by
+a MinHash signature. The signature is split into bands; articles sharing any
+band bucket become candidates, and only candidates get their estimated
+Jaccard similarity checked. Each bucket id carries its band number, so an
+article's buckets are one array on its signature row and lookups are probes
+of a GIN index on that array; their cost does not grow with the number of
+stored articles.
+
+The index lives in Postgres next to the articles it describes. Signatures are
+keyed by url, so re-extracting an article never matches itself.
+"""
+
+from functools import lru_cache
+import hashlib
+import logging
+import re
+import zlib
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 128
+BANDS = 16
+# 16 bands of 8 rows make pairs above ~0.7 Jaccard likely to collide
+ROWS_PER_BAND = NUM_PERM // BANDS
+
+# the band number goes in the top 4 bits of its bucket ids, enough for 16 bands
+_BAND_SHIFT = 60
+_BUCKET_MASK = (1 << _BAND_SHIFT) - 1
+
+SHINGLE_SIZE = 5
+
+# estimated Jaccard similarity at or above which an article is a near duplicate
+DEFAULT_THRESHOLD = 0.8
+
+# how long stored signatures stay matchable
+DEFAULT_RETENTION_DAYS = 30
+
+DEDUP_MODES = ('off', 'flag', 'merge')
+
+# fixed seed: signatures must be comparable across runs and processes
+_SEED = 20250101
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# odd 64-bit constant mixing token hashes into shingle hashes
+_SHINGLE_MULTIPLIER = 0x9E3779B97F4A7C15
+
+_TOKEN = re.compile(r'\w+')
+
+# hash coefficients, built on first use so importing stays cheap
+_PERMUTATIONS = None
+
+DEDUP_DDL = """
+CREATE TABLE IF NOT EXISTS article_signatures (
+    url TEXT PRIMARY KEY,
+    signature BYTEA NOT NULL,
+    "publishDate" TIMESTAMP(3) NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_article_signatures_publish_date ON article_signatures("publishDate");
+
+CREATE TABLE IF NOT EXISTS article_duplicates (
+    url TEXT PRIMARY KEY,
+    duplicate_of TEXT NOT NULL,
+    similarity REAL NOT NULL,
+    "detectedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# one bucket array per signature instead of one article_lsh_buckets row per band:
+# a fraction of the rows, index entries and bytes written per article. Existing
+# bucket rows are folded into the arrays; a url re-indexed before this keeps its
+# stale buckets, which are harmless since candidates are verified against the
+# current signature. fastupdate is off so probes never scan a pending list.
+BUCKET_ARRAY_DDL = """
+ALTER TABLE article_signatures ADD COLUMN IF NOT EXISTS buckets BIGINT[];
+DO $$
+BEGIN
+    IF to_regclass('article_lsh_buckets') IS NOT NULL THEN
+        UPDATE article_signatures AS s
+        SET buckets = b.buckets
+        FROM (
+            SELECT url, array_agg((bucket & x'0FFFFFFFFFFFFFFF'::bigint) | (band::bigint << 60) ORDER BY band) AS buckets
+            FROM article_lsh_buckets
+            GROUP BY url
+        ) AS b
+        WHERE s.url = b.url;
+        DROP TABLE article_lsh_buckets;
+    END IF;
+END
+$$;
+-- a signature without buckets can never be found
+DELETE FROM article_signatures WHERE buckets IS NULL;
+ALTER TABLE article_signatures ALTER COLUMN buckets SET NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_article_signatures_buckets ON article_signatures
+    USING gin (buckets) WITH (fastupdate = off);
+"""
+
+# every stored url sharing a bucket with a chunk row, with its signature and the chunk positions it matched
+CANDIDATES_SQL = """
+SELECT s.url, s.signature, array_agg(DISTINCT q.idx)
+FROM unnest(%s::int[], %s::bigint[]) AS q(idx, bucket)
+JOIN article_signatures s ON s.buckets @> ARRAY[q.bucket]
+GROUP BY s.url
+"""
+
+INSERT_SIGNATURE_SQL = """
+INSERT INTO article_signatures (url, signature, "publishDate", buckets) VALUES %s
+ON CONFLICT (url) DO UPDATE SET
+    signature = EXCLUDED.signature,
+    "publishDate" = EXCLUDED."publishDate",
+    buckets = EXCLUDED.buckets
+"""
+
+RECORD_DUPLICATES_SQL = """
+INSERT INTO article_duplicates (url, duplicate_of, similarity) VALUES %s
+ON CONFLICT (url) DO UPDATE SET
+    duplicate_of = EXCLUDED.duplicate_of,
+    similarity = EXCLUDED.similarity,
+    "detectedAt" = CURRENT_TIMESTAMP
+"""
+
+PRUNE_SQL = 'DELETE FROM article_signatures WHERE "publishDate" < %(before)s'
+
+
+def _permutations():
+    import numpy as np
+
+    rng = np.random.RandomState(_SEED)
+    a = rng.randint(1, _MAX_HASH, size=NUM_PERM, dtype=np.uint64)
+    b = rng.randint(0, _MAX_HASH, size=NUM_PERM, dtype=np.uint64)
+    return a[:, None], b[:, None]
+
+
+# word frequencies are skewed, so most tokens are hashed once per process
+@lru_cache(maxsize=1 << 16)
+def _token_hash(token):
+    return zlib.crc32(token.encode('utf-8'))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Sorted unique 32-bit hashes of the lowercase word `size`-grams in text"""
+    import numpy as np
+
+    tokens = _TOKEN.findall(text.lower())
+    size = min(size, len(tokens))
+    if not size:
+        return np.empty(0, dtype=np.uint64)
+    token_hashes = np.fromiter(map(_token_hash, tokens), dtype=np.uint64, count=len(tokens))
+    # polynomial rolling hash over each window, wrapping mod 2**64; keep the well-mixed high bits
+    count = len(tokens) - size + 1
+    combined = np.zeros(count, dtype=np.uint64)
+    multiplier = np.uint64(_SHINGLE_MULTIPLIER)
+    for offset in range(size):
+        combined = combined * multiplier + token_hashes[offset:offset + count]
+    return np.unique(combined >> np.uint64(32))
+
+
+def minhash(shingle_hashes):
+    """MinHash signature (NUM_PERM uint32 values) of an array of shingle hashes, None if empty"""
+    import numpy as np
+
+    global _PERMUTATIONS
+    if not len(shingle_hashes):
+        return None
+    if _PERMUTATIONS is None:
+        _PERMUTATIONS = _permutations()
+    a, b = _PERMUTATIONS
+    # a and the hashes are below 2**32, so a * hash + b cannot overflow 64 bits
+    hashed = (a * shingle_hashes[None, :] + b) % _MERSENNE_PRIME & _MAX_HASH
+    return hashed.min(axis=1).astype(np.uint32)
+
+
+def article_signature(article):
+    """MinHash signature of an article's headline and body"""
+    return minhash(shingles(f"{article.get('headline') or ''} {article.get('body') or ''}"))
+
+
+def band_buckets(signature):
+    """One signed 64-bit bucket id per band, the band number in its top bits"""
+    rows = signature.reshape(BANDS, ROWS_PER_BAND)
+    buckets = []
+    for band, values in enumerate(rows):
+        digest = int.from_bytes(hashlib.blake2b(values.tobytes(), digest_size=8).digest(), 'big')
+        bucket = band << _BAND_SHIFT | digest & _BUCKET_MASK
+        buckets.append(bucket - (1 << 64) if bucket >> 63 else bucket)
+    return buckets
+
+
+def similarity(signature, other):
+    """Estimated Jaccard similarity of two signatures"""
+    return float((signature == other).mean())
+
+
+def signature_from_bytes(data):
+    import numpy as np
+
+    return np.frombuffer(bytes(data), dtype=np.uint32)
+
+
+class LSHIndex:
+    """In-memory LSH index, for matching articles within one batch"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.signatures = {}
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def add(self, key, signature, buckets=None):
+        self.signatures[key] = signature
+        for bucket in buckets or band_buckets(signature):
+            self.buckets.setdefault(bucket, []).append(key)
+
+    def candidates(self, buckets):
+        found = set()
+        for bucket in buckets:
+            found.update(self.buckets.get(bucket, ()))
+        return found
+
+
+def choose_dedup_mode(mode):
+    if mode not in DEDUP_MODES:
+        raise ValueError(f"Unknown dedup mode {mode!r}, expected one of {DEDUP_MODES}")
+    return mode
+
+
+def _best_match(signature, url, candidates, signatures, threshold):
+    best = None
+    for candidate in candidates:
+        if candidate == url:
+            continue
+        score = similarity(signature, signatures[candidate])
+        if score >= threshold and (best is None or score > best[1]):
+            best = (candidate, score)
+    return best
+
+
+def _stored_matches(cursor, chunk, threshold):
+    """Best stored match per chunk position, found with one bucket probe"""
+    idx, buckets = [], []
+    for position, (_, _, row_buckets) in enumerate(chunk):
+        idx.extend([position] * len(row_buckets))
+        buckets.extend(row_buckets)
+    if not idx:
+        return {}
+
+    cursor.execute(CANDIDATES_SQL, (idx, buckets))
+    candidates, stored = {}, {}
+    for url, data, positions in cursor.fetchall():
+        stored[url] = signature_from_bytes(data)
+        for position in positions:
+            candidates.setdefault(position, set()).add(url)
+
+    matches = {}
+    for position, urls in candidates.items():
+        row, signature, _ = chunk[position]
+        match = _best_match(signature, row['url'], urls, stored, threshold)
+        if match:
+            matches[position] = match
+    return matches
+
+
+def _last_per_key(values):
+    """Keep the last tuple per leading key, an upsert cannot touch one row twice"""
+    return list({value[0]: value for value in values}.values())
+
+
+class DedupStats:
+    """Counts of rows seen, flagged and dropped by deduplicate"""
+
+    def __init__(self):
+        self.seen = 0
+        self.duplicates = 0
+        self.dropped = 0
+
+
+def deduplicate(conn, rows, mode='flag', threshold=DEFAULT_THRESHOLD, chunk_size=1000, stats=None):
+    """Stream rows through near-duplicate detection.
+
+    Each chunk is matched against the persisted index and against earlier rows
+    of the same stream. Near duplicates are recorded in article_duplicates;
+    in 'merge' mode they are also dropped from the output. Rows that are not
+    duplicates are added to the index as they pass, one commit per chunk.
+    """
+    from psycopg2.extras import execute_values
+    from include.news_etl.loading import chunked
+
+    mode = choose_dedup_mode(mode)
+    stats = stats if stats is not None else DedupStats()
+    if mode == 'off':
+        for row in rows:
+            stats.seen += 1
+            yield row
+        return
+
+    batch_index = LSHIndex()
+    for chunk in chunked(rows, chunk_size):
+        prepared = []
+        for row in chunk:
+            signature = article_signature(row)
+            prepared.append((row, signature, band_buckets(signature) if signature is not None else []))
+
+        with conn.cursor() as cursor:
+            stored = _stored_matches(cursor, prepared, threshold)
+
+            duplicates, signatures = [], []
+            for position, (row, signature, row_buckets) in enumerate(prepared):
+                stats.seen += 1
+                match = stored.get(position)
+                if signature is not None:
+                    in_batch = _best_match(signature, row['url'], batch_index.candidates(row_buckets),
+                                           batch_index.signatures, threshold)
+                    if in_batch and (match is None or in_batch[1] > match[1]):
+                        match = in_batch
+
+                if match:
+                    stats.duplicates += 1
+                    duplicates.append((row['url'], match[0], match[1]))
+                    if mode == 'merge':
+                        stats.dropped += 1
+                        continue
+                elif signature is not None and row['publishDate'] is not None:
+                    batch_index.add(row['url'], signature, row_buckets)
+                    signatures.append((row['url'], signature.tobytes(), row['publishDate'], row_buckets))
+                yield row
+
+            if signatures:
+                execute_values(cursor, INSERT_SIGNATURE_SQL, _last_per_key(signatures), page_size=len(signatures))
+            if duplicates:
+                execute_values(cursor, RECORD_DUPLICATES_SQL, _last_per_key(duplicates), page_size=len(duplicates))
+        conn.commit()
+
+    if stats.duplicates:
+        logger.info(f"Found {stats.duplicates} near duplicates in {stats.seen} rows ({stats.dropped} dropped)")
+
+
+def prune_index(conn, before):
+    """Forget signatures of articles published before `before`"""
+    with conn.cursor() as cursor:
+        cursor.execute(PRUNE_SQL, {'before': before})
+    conn.commit()
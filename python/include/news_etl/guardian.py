@@ -0,0 +1,102 @@
+"""Guardian content API helpers used by the extract task"""
+
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+logger = logging.getLogger(__name__)
+
+SEARCH_ENDPOINT = '/search'
+
+# value of articles.source for rows loaded from this API
+GUARDIAN_SOURCE = 'guardian_api'
+
+# largest page-size the /search endpoint accepts
+GUARDIAN_MAX_PAGE_SIZE = 200
+
+# upper bound on concurrent page requests per extract run
+DEFAULT_MAX_WORKERS = 8
+
+DEFAULT_TIMEOUT = 30
+
+
+def mount_connection_pool(session, max_workers=DEFAULT_MAX_WORKERS, limiter=None, cache=None, **retry_options):
+    """Size the session's keep-alive pool so every worker can reuse a connection.
+
+    Requests also go through the shared token bucket `limiter`, are retried on
+    429/5xx with backoff and revalidated against the on-disk `cache` (see
+    http_client). Returns the session.
+    """
+    from include.news_etl.http_client import ResilientHTTPAdapter
+
+    adapter = ResilientHTTPAdapter(
+        limiter=limiter, cache=cache, pool_connections=1, pool_maxsize=max(1, max_workers), **retry_options
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def fetch_search_page(session, url, params, page, timeout=DEFAULT_TIMEOUT):
+    """Fetch a single page of a /search query and return its 'response' object"""
+    page_params = dict(params, page=str(page))
+    response = session.get(url, params=page_params, timeout=timeout)
+
+    if response.status_code != 200:
+        raise Exception(f"Guardian API request failed: {response.status_code} (page {page})")
+
+    data = response.json()
+    if 'response' not in data:
+        raise ValueError(f"Invalid data structure from Guardian API (page {page})")
+
+    return data['response']
+
+
+def fetch_all_pages(session, url, params, max_workers=DEFAULT_MAX_WORKERS,
+                    max_pages=None, timeout=DEFAULT_TIMEOUT, checkpoint=None):
+    """Fetch every page of a /search query.
+
+    The first page is fetched on its own to learn `pages`/`total`, the rest are
+    fetched concurrently over the shared session. Results are returned in page
+    order wrapped in the same envelope as a single-page response. With a
+    `checkpoint` (artifacts.PageCheckpoint), pages stored by an earlier attempt
+    are reused and every newly fetched page is stored as it arrives.
+    """
+    params = dict(params)
+    params.setdefault('page-size', str(GUARDIAN_MAX_PAGE_SIZE))
+    # the key never reaches storage
+    query = {key: value for key, value in params.items() if key != 'api-key'}
+
+    def fetch(page):
+        stored = checkpoint.load(query, page) if checkpoint else None
+        if stored is not None:
+            return stored
+        page_data = fetch_search_page(session, url, params, page, timeout)
+        if checkpoint:
+            checkpoint.save(query, page, page_data)
+        return page_data
+
+    first = fetch(1)
+    pages = int(first.get('pages') or 1)
+    if max_pages is not None and pages > max_pages:
+        logger.warning(f"Query spans {pages} pages, capping at {max_pages}")
+        pages = max_pages
+
+    logger.info(f"Query reports {first.get('total', 0)} articles across {pages} pages")
+
+    results = list(first.get('results', []))
+
+    if pages > 1:
+        workers = max(1, min(max_workers, pages - 1))
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            # map keeps page order and re-raises the first failure
+            for page_data in pool.map(fetch, range(2, pages + 1)):
+                results.extend(page_data.get('results', []))
+
+    if checkpoint and checkpoint.loaded:
+        logger.info(f"Reused {checkpoint.loaded} of {pages} pages from an earlier attempt")
+
+    merged = dict(first)
+    merged['results'] = results
+    merged['pagesFetched'] = pages
+    return {'response': merged}
@@ -0,0 +1,342 @@
+"""Rate limiting, retries and conditional-request caching for API sessions.
+
+Everything lives in a requests transport adapter, so the HttpHook session and
+the page-fetching code stay unchanged: mount it with
+guardian.mount_connection_pool and every request on the session
+
+- waits for a token from a bucket sized to the API key's quota,
+- retries 429/5xx and connection errors with exponential backoff and full
+  jitter, never sooner than the server's Retry-After, and
+- revalidates previously seen pages with If-None-Match/If-Modified-Since,
+  serving the on-disk copy on 304 so re-runs of a window skip unchanged bodies.
+
+The cache is off unless NEWS_ETL_HTTP_CACHE_DIR names a directory, ideally one
+that outlives the worker. Entries unused for NEWS_ETL_HTTP_CACHE_MAX_AGE_DAYS
+are dropped, and the least recently used go first once the directory grows
+past NEWS_ETL_HTTP_CACHE_MAX_MB.
+"""
+
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENV = 'NEWS_ETL_HTTP_CACHE_DIR'
+HTTP_CACHE_MAX_MB_ENV = 'NEWS_ETL_HTTP_CACHE_MAX_MB'
+HTTP_CACHE_MAX_AGE_ENV = 'NEWS_ETL_HTTP_CACHE_MAX_AGE_DAYS'
+
+DEFAULT_CACHE_MAX_MB = 512
+DEFAULT_CACHE_MAX_AGE_DAYS = 7
+
+# in-flight writes: not counted, only removed once as old as an expired entry (left by a crash)
+_TMP_PREFIX = '.tmp'
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_CAP = 30.0
+
+# a longer Retry-After (e.g. a spent daily quota) fails the request instead of sleeping through it
+MAX_RETRY_AFTER = 120.0
+
+# query parameters left out of cache keys so rotating a key keeps the cache
+SECRET_PARAMS = frozenset({'api-key', 'api_key', 'apikey'})
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts up to `capacity`"""
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self):
+        """Take a token if one is available, else return how long to wait"""
+        with self._lock:
+            now = self._clock()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            wait = self._reserve()
+            if not wait:
+                return
+            self._sleep(wait)
+
+    def pause(self, seconds):
+        """Hold every caller back for `seconds`, e.g. after the server sent a 429"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+            # start refilling from empty once the pause is over
+            self._tokens = 0.0
+            self._updated = self._paused_until
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date), or None"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_CAP, retry_after=None, rng=random):
+    """Full-jitter exponential backoff for the given 0-based retry, at least `retry_after`"""
+    delay = rng.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def cache_key(url):
+    """Stable key for a GET url, ignoring parameter order and API keys"""
+    parts = urlsplit(url)
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in SECRET_PARAMS)
+    normalized = urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ''))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """On-disk store of validators and bodies for conditional GETs.
+
+    An entry's mtime is its last use. Entries older than `max_age` seconds
+    are evicted, then the least recently used until the store fits in
+    `max_bytes`. The store is pruned when opened and whenever writes push it
+    over the limit.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_MAX_MB * 1024 * 1024,
+                 max_age=DEFAULT_CACHE_MAX_AGE_DAYS * 86400, clock=time.time):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._clock = clock
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self.prune()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Return (metadata, body) for a cached response, or None"""
+        path = self._path(key)
+        try:
+            if self._clock() - os.stat(path).st_mtime > self.max_age:
+                self._remove(path)
+                return None
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+            return meta, body
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, meta, body):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced = os.stat(path).st_size
+        except OSError:
+            replaced = 0
+        # write then rename so concurrent readers never see a partial entry
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix=_TMP_PREFIX)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(json.dumps(meta).encode('utf-8') + b'\n')
+            f.write(body)
+            written = f.tell()
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += written - replaced
+            over = self._size > self.max_bytes
+        if over:
+            self.prune()
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def prune(self):
+        """Evict expired entries, then the least recently used over the size limit.
+
+        Returns the number of entries removed.
+        """
+        with self._lock:
+            now = self._clock()
+            entries = []
+            removed = 0
+            for root, _, names in os.walk(self.directory):
+                for name in names:
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    if now - stat.st_mtime > self.max_age:
+                        self._remove(path)
+                        removed += 1
+                    elif not name.startswith(_TMP_PREFIX):
+                        entries.append((stat.st_mtime, stat.st_size, path))
+
+            size = sum(entry[1] for entry in entries)
+            for _, entry_size, path in sorted(entries):
+                if size <= self.max_bytes:
+                    break
+                self._remove(path)
+                size -= entry_size
+                removed += 1
+            self._size = size
+        return removed
+
+
+def default_cache():
+    """Cache under NEWS_ETL_HTTP_CACHE_DIR, or None when it is unset"""
+    directory = os.environ.get(HTTP_CACHE_ENV)
+    if not directory:
+        return None
+    return ResponseCache(
+        directory,
+        max_bytes=int(float(os.environ.get(HTTP_CACHE_MAX_MB_ENV, DEFAULT_CACHE_MAX_MB)) * 1024 * 1024),
+        max_age=float(os.environ.get(HTTP_CACHE_MAX_AGE_ENV, DEFAULT_CACHE_MAX_AGE_DAYS)) * 86400,
+    )
+
+
+class ResilientHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter adding a token bucket, retries with backoff and an ETag cache.
+
+    Sources pass default_cache() as `cache`, so conditional requests are only
+    made when NEWS_ETL_HTTP_CACHE_DIR is set, within the NEWS_ETL_HTTP_CACHE_MAX_MB
+    and NEWS_ETL_HTTP_CACHE_MAX_AGE_DAYS bounds.
+    """
+
+    def __init__(self, limiter=None, cache=None, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP,
+                 max_retry_after=MAX_RETRY_AFTER, sleep=time.sleep, **kwargs):
+        super().__init__(**kwargs)
+        self.limiter = limiter
+        self.cache = cache
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_retry_after = max_retry_after
+        self._sleep = sleep
+        self.stats = {'requests': 0, 'retries': 0, 'throttled': 0, 'not_modified': 0, 'bytes': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def send(self, request, **kwargs):
+        key = cached = None
+        if self.cache is not None and request.method == 'GET':
+            key = cache_key(request.url)
+            cached = self.cache.get(key)
+            if cached:
+                meta = cached[0]
+                if meta.get('etag'):
+                    request.headers['If-None-Match'] = meta['etag']
+                if meta.get('last_modified'):
+                    request.headers['If-Modified-Since'] = meta['last_modified']
+
+        attempt = 0
+        while True:
+            if self.limiter is not None:
+                self.limiter.acquire()
+            self._count('requests')
+            try:
+                response = super().send(request, **kwargs)
+            except OSError as e:
+                # requests' ConnectionError and Timeout are OSErrors
+                if attempt + 1 >= self.max_attempts:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                logger.warning(f"Request failed ({e}), retry {attempt + 1} in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES or attempt + 1 >= self.max_attempts:
+                    break
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    logger.warning(f"Server asked to retry after {retry_after:.0f}s, giving up")
+                    break
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, retry_after)
+                if response.status_code == 429:
+                    self._count('throttled')
+                    # slow every worker sharing the bucket, not just this one
+                    if self.limiter is not None:
+                        self.limiter.pause(delay)
+                logger.warning(f"HTTP {response.status_code} from {urlsplit(request.url).path}, "
+                               f"retry {attempt + 1} in {delay:.1f}s")
+                response.close()
+
+            self._count('retries')
+            attempt += 1
+            self._sleep(delay)
+
+        if response.status_code != 304:
+            self._count('bytes', len(response.content))
+        if key is None:
+            return response
+        if response.status_code == 304 and cached:
+            self._count('not_modified')
+            return self._from_cache(response, *cached)
+        if response.status_code == 200 and (response.headers.get('ETag') or response.headers.get('Last-Modified')):
+            self.cache.put(key, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'content_type': response.headers.get('Content-Type'),
+            }, response.content)
+        return response
+
+    @staticmethod
+    def _from_cache(not_modified, meta, body):
+        """Turn a 304 into the 200 it stands for, with the cached body"""
+        not_modified.close()
+        not_modified.status_code = 200
+        not_modified.reason = 'OK'
+        not_modified._content = body
+        not_modified._content_consumed = True
+        if meta.get('content_type'):
+            not_modified.headers['Content-Type'] = meta['content_type']
+        not_modified.headers['Content-Length'] = str(len(body))
+        return not_modified
@@ -0,0 +1,202 @@
+"""Image URL enrichment for articles loaded without one.
+
+New rows get the API's thumbnail at extract time. Older rows (and articles
+the API has no thumbnail for) are filled by resolving the og:image meta tag
+of the article page. Pages are fetched concurrently on one asyncio event loop
+with a cap on requests in flight, and only the page head is read.
+
+Every resolved page, with or without an image, goes into a persistent
+url -> image cache. Within the TTL a page is never fetched again, so rows
+with no image are not retried on every run. Failed fetches are cached too,
+with their error and a shorter TTL, so dead pages are retried now and then
+rather than on every run.
+
+No transaction is held open while pages are fetched: the cache is read and
+committed first, and the results are written in a short transaction after.
+"""
+
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+import logging
+
+from include.news_etl.db import iter_keyset_chunks
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_TIMEOUT = 10
+DEFAULT_CACHE_TTL = timedelta(days=30)
+DEFAULT_FAILURE_TTL = timedelta(days=1)
+
+# og tags live in <head>, never read more of a page than this
+MAX_HEAD_BYTES = 256 * 1024
+
+USER_AGENT = 'news-etl-image-enricher'
+
+# meta tags checked in order of preference
+IMAGE_META_KEYS = ('og:image:secure_url', 'og:image', 'twitter:image')
+
+IMAGE_CACHE_DDL = """
+CREATE TABLE IF NOT EXISTS article_image_cache (
+    url TEXT PRIMARY KEY,
+    image_url TEXT,
+    "fetchedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_articles_missing_image ON articles(id) WHERE image_url IS NULL;
+"""
+
+# failed fetches are cached with their error, image_url stays NULL
+IMAGE_FAILURE_DDL = """
+ALTER TABLE article_image_cache ADD COLUMN IF NOT EXISTS error TEXT;
+"""
+
+# one page of rows without an image; idx_articles_missing_image keeps it to those rows
+MISSING_SQL = """
+SELECT id, url
+FROM articles
+WHERE image_url IS NULL AND id > %s
+ORDER BY id
+LIMIT %s
+"""
+
+CACHED_SQL = """
+SELECT url, image_url
+FROM article_image_cache
+WHERE url = ANY(%(urls)s)
+    AND "fetchedAt" >= CASE WHEN error IS NULL THEN %(since)s ELSE %(failed_since)s END
+"""
+
+CACHE_UPSERT_SQL = """
+INSERT INTO article_image_cache (url, image_url, error) VALUES %s
+ON CONFLICT (url) DO UPDATE SET
+    image_url = EXCLUDED.image_url,
+    error = EXCLUDED.error,
+    "fetchedAt" = CURRENT_TIMESTAMP
+"""
+
+UPDATE_IMAGES_SQL = """
+UPDATE articles AS a
+SET image_url = v.image_url
+FROM (VALUES %s) AS v(id, image_url)
+WHERE a.id = v.id AND a.image_url IS NULL
+"""
+
+
+class _MetaImageParser(HTMLParser):
+    """Collects image meta tags until the head ends"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.found = {}
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'body':
+            self.done = True
+        if tag != 'meta' or self.done:
+            return
+        attrs = dict(attrs)
+        key = (attrs.get('property') or attrs.get('name') or '').lower()
+        if key in IMAGE_META_KEYS and attrs.get('content'):
+            self.found.setdefault(key, attrs['content'].strip())
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.done = True
+
+
+def extract_og_image(html, base_url):
+    """Absolute og:image (or twitter:image) url declared in a page's head, or None"""
+    parser = _MetaImageParser()
+    parser.feed(html)
+    for key in IMAGE_META_KEYS:
+        if parser.found.get(key):
+            image = urljoin(base_url, parser.found[key])
+            if urlsplit(image).scheme in ('http', 'https'):
+                return image
+    return None
+
+
+async def _fetch_one(session, semaphore, url, timeout, transfer):
+    import aiohttp
+
+    async with semaphore:
+        async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+            if response.status != 200:
+                raise ValueError(f"HTTP {response.status}")
+            head = await response.content.read(MAX_HEAD_BYTES)
+            charset = response.charset or 'utf-8'
+    transfer['bytes'] += len(head)
+    return extract_og_image(head.decode(charset, errors='replace'), str(response.url))
+
+
+async def fetch_og_images(urls, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, transfer=None):
+    """Resolve og:image for each page, at most `concurrency` requests in flight.
+
+    Returns ({url: image url or None}, {url: error message}) for the pages
+    that resolved and the ones that failed. Bytes read are added to
+    transfer['bytes'] when a dict is passed.
+    """
+    import asyncio
+    import aiohttp
+
+    transfer = transfer if transfer is not None else {'bytes': 0}
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector, headers={'User-Agent': USER_AGENT}) as session:
+        outcomes = await asyncio.gather(
+            *(_fetch_one(session, semaphore, url, timeout, transfer) for url in urls), return_exceptions=True
+        )
+
+    images, errors = {}, {}
+    for url, outcome in zip(urls, outcomes):
+        if isinstance(outcome, Exception):
+            errors[url] = str(outcome) or type(outcome).__name__
+        else:
+            images[url] = outcome
+    return images, errors
+
+
+def enrich_images(conn, concurrency=DEFAULT_CONCURRENCY, chunk_size=DEFAULT_CHUNK_SIZE,
+                  ttl=DEFAULT_CACHE_TTL, timeout=DEFAULT_TIMEOUT, max_rows=None, failure_ttl=DEFAULT_FAILURE_TTL):
+    """Fill image_url for rows missing one from cached or freshly fetched og:image tags.
+
+    Returns {"rows", "filled", "fetched", "cached", "failed", "bytes"}.
+    """
+    import asyncio
+    from psycopg2.extras import execute_values
+
+    stats = {'rows': 0, 'filled': 0, 'fetched': 0, 'cached': 0, 'failed': 0, 'bytes': 0}
+    for rows in iter_keyset_chunks(conn, MISSING_SQL, chunk_size, max_rows):
+        urls = sorted({url for _, url in rows if urlsplit(url).scheme in ('http', 'https')})
+        now = datetime.now()
+        with conn.cursor() as cursor:
+            cursor.execute(CACHED_SQL, {'urls': urls, 'since': now - ttl, 'failed_since': now - failure_ttl})
+            images = dict(cursor.fetchall())
+        # the pooled connection must not sit idle in a transaction through the fetches
+        conn.commit()
+
+        todo = [url for url in urls if url not in images]
+        fresh, errors = asyncio.run(fetch_og_images(todo, concurrency, timeout, stats)) if todo else ({}, {})
+        images.update(fresh)
+
+        updates = [(row_id, images[url]) for row_id, url in rows if images.get(url)]
+        cache = [(url, image, None) for url, image in fresh.items()] + [(url, None, error) for url, error in errors.items()]
+        with conn.cursor() as cursor:
+            if cache:
+                execute_values(cursor, CACHE_UPSERT_SQL, cache, page_size=len(cache))
+            if updates:
+                execute_values(cursor, UPDATE_IMAGES_SQL, updates, page_size=len(updates))
+        conn.commit()
+
+        stats['rows'] += len(rows)
+        stats['filled'] += len(updates)
+        stats['fetched'] += len(fresh)
+        stats['cached'] += len(urls) - len(todo)
+        stats['failed'] += len(errors)
+        if errors:
+            url, error = next(iter(errors.items()))
+            logger.warning(f"{len(errors)} article pages failed to fetch, e.g. {url}: {error}")
+    return stats
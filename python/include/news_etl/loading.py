@@ -0,0 +1,402 @@
+"""Batched upserts and COPY-based bulk loads into the articles table"""
+
+from itertools import islice
+import hashlib
+import io
+import logging
+
+from include.news_etl.archive import (
+    RESTORE_LOCK_SQL,
+    RESTORE_PREPARED_SQL,
+    RESTORE_STAGED_SQL,
+    RESTORE_URLS_SQL,
+    restore_archived,
+)
+from include.news_etl.db import prepare_sql, prepared_round_trip
+from include.news_etl.dead_letters import RESOLVE_LOADED_STAGED_SQL, RESOLVE_LOADED_URLS_SQL, record_dead_letters
+from include.news_etl.metrics import LogSampler
+from include.news_etl.search import search_vector_sql
+
+logger = logging.getLogger(__name__)
+
+# rows per multi-row INSERT statement
+DEFAULT_BATCH_SIZE = 500
+
+# above this many rows the auto load mode switches to COPY via a staging table
+COPY_THRESHOLD = 5000
+
+# rows buffered in memory per COPY FROM STDIN call
+COPY_CHUNK_SIZE = 50000
+
+LOAD_MODES = ('auto', 'batch', 'copy')
+
+ARTICLE_COLUMNS = (
+    'publishDate', 'extractedDate', 'url', 'headline', 'body', 'section', 'source', 'imageUrl',
+    'contentHash', 'etlRunId'
+)
+
+# pipeline-owned column used to skip no-op updates
+CONTENT_HASH_DDL = """
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS content_hash TEXT;
+"""
+
+# pipeline-owned column naming the DAG run that last wrote each row,
+# lets post-load checks touch only that run's rows
+RUN_ID_DDL = """
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS etl_run_id TEXT;
+CREATE INDEX IF NOT EXISTS idx_articles_etl_run_id ON articles(etl_run_id);
+"""
+
+_ROW_COLUMNS = (
+    '"publishDate", "extractedDate", url, headline, body, section, source, image_url, content_hash, etl_run_id'
+)
+
+# rows come in as a VALUES list so the search vector is computed server-side from
+# the same headline/body values instead of sending the text twice
+_INSERT_SELECT = f"""
+INSERT INTO articles ({_ROW_COLUMNS}, search_vector, "updatedAt")
+SELECT v.*, {search_vector_sql('v.headline', 'v.body')}, CURRENT_TIMESTAMP
+"""
+
+_INSERT_PREFIX = _INSERT_SELECT + 'FROM (VALUES '
+
+_VALUES_ALIAS = f""") AS v({_ROW_COLUMNS})"""
+
+# unchanged content leaves the existing row alone (no new tuple, WAL or trigger work)
+# unless the API now sends an image the row lacks;
+# RETURNING only sees inserted/updated rows, xmax = 0 marks a fresh insert
+_ON_CONFLICT = """
+ON CONFLICT (url)
+DO UPDATE SET
+    "extractedDate" = EXCLUDED."extractedDate",
+    headline = EXCLUDED.headline,
+    body = EXCLUDED.body,
+    section = EXCLUDED.section,
+    content_hash = EXCLUDED.content_hash,
+    etl_run_id = EXCLUDED.etl_run_id,
+    search_vector = EXCLUDED.search_vector,
+    -- keep an image found by the enrichment task when the API sends none
+    image_url = COALESCE(EXCLUDED.image_url, articles.image_url),
+    -- new text needs a new summary, a newly sent image alone does not
+    ai_summary = CASE WHEN articles.content_hash IS DISTINCT FROM EXCLUDED.content_hash THEN NULL ELSE articles.ai_summary END,
+    "updatedAt" = CURRENT_TIMESTAMP
+WHERE articles.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+    OR (articles.image_url IS NULL AND EXCLUDED.image_url IS NOT NULL)
+RETURNING (xmax = 0) AS inserted
+"""
+
+# casts keep column types when every row of a VALUES list has a NULL in the same place
+ROW_TEMPLATE = (
+    '(%(publishDate)s::timestamp(3), %(extractedDate)s::timestamp(3), %(url)s::text, '
+    '%(headline)s::text, %(body)s::text, %(section)s::text, %(source)s::text, '
+    '%(imageUrl)s::text, %(contentHash)s::text, %(etlRunId)s::text)'
+)
+
+BATCH_UPSERT_SQL = _INSERT_PREFIX + '%s' + _VALUES_ALIAS + _ON_CONFLICT
+
+SINGLE_UPSERT_SQL = _INSERT_PREFIX + ROW_TEMPLATE + _VALUES_ALIAS + _ON_CONFLICT
+
+# the prepared upsert takes one array per column, so its text and plan do not
+# depend on the batch size and the server parses and plans it once per connection
+PREPARED_UPSERT = 'news_etl_upsert_articles'
+PREPARED_RESTORE = 'news_etl_restore_archived'
+
+_COLUMN_TYPES = ('timestamp(3)[]', 'timestamp(3)[]') + ('text[]',) * 8
+
+PREPARED_UPSERT_SQL = (
+    _INSERT_SELECT
+    + f"FROM unnest({', '.join(f'${i}' for i in range(1, len(_COLUMN_TYPES) + 1))}) AS v({_ROW_COLUMNS})"
+    + _ON_CONFLICT
+)
+
+# shared archive lock, restore and upsert run in one round trip and one transaction
+EXECUTE_BATCH_SQL = (
+    f"{RESTORE_LOCK_SQL}; EXECUTE {PREPARED_RESTORE}(%(url)s::text[]); EXECUTE {PREPARED_UPSERT}("
+    + ', '.join(f'%({column})s::{kind}' for column, kind in zip(ARTICLE_COLUMNS, _COLUMN_TYPES))
+    + ')'
+)
+
+# temp tables are session-local and skip WAL; dropped when the load commits
+STAGING_DDL = """
+CREATE TEMP TABLE articles_staging (
+    seq BIGSERIAL,
+    "publishDate" TIMESTAMP(3),
+    "extractedDate" TIMESTAMP(3),
+    url TEXT,
+    headline TEXT,
+    body TEXT,
+    section TEXT,
+    source TEXT,
+    image_url TEXT,
+    content_hash TEXT,
+    etl_run_id TEXT
+) ON COMMIT DROP
+"""
+
+STAGING_COPY_SQL = """
+COPY articles_staging (""" + _ROW_COLUMNS + """)
+FROM STDIN
+"""
+
+MERGE_STAGING_SQL = """
+WITH merged AS (
+    INSERT INTO articles (""" + _ROW_COLUMNS + """, search_vector, "updatedAt")
+    SELECT DISTINCT ON (url)
+           """ + _ROW_COLUMNS + """,
+           """ + search_vector_sql('headline', 'body') + """, CURRENT_TIMESTAMP
+    FROM articles_staging
+    ORDER BY url, seq DESC
+""" + _ON_CONFLICT + """
+)
+SELECT
+    (SELECT COUNT(DISTINCT url) FROM articles_staging),
+    COUNT(*) FILTER (WHERE inserted),
+    COUNT(*) FILTER (WHERE NOT inserted)
+FROM merged
+"""
+
+
+def chunked(items, size):
+    """Yield consecutive lists of at most `size` items from any iterable"""
+    if size < 1:
+        raise ValueError(f"Batch size must be positive, got {size}")
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def content_hash(article):
+    """Hash the fields an upsert would overwrite"""
+    digest = hashlib.sha256()
+    for field in ('headline', 'body', 'section'):
+        digest.update((article.get(field) or '').encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+def etl_run_id(ti):
+    """Identifier stamped on every row a DAG run writes"""
+    return f"{ti.dag_id}/{ti.run_id}"
+
+
+def prepare_row(article, run_id=None):
+    """Return a copy of the article with its contentHash and etlRunId filled in"""
+    row = dict(article, contentHash=content_hash(article), etlRunId=run_id)
+    row.setdefault('imageUrl', None)
+    return row
+
+
+def empty_summary():
+    """Load summary with per-run change metrics"""
+    return {"loaded": 0, "errors": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+
+
+def _add_changes(summary, processed, returned_flags):
+    """Fold RETURNING (xmax = 0) flags for `processed` rows into the summary"""
+    inserted = sum(1 for flag in returned_flags if flag)
+    updated = len(returned_flags) - inserted
+    summary["loaded"] += processed
+    summary["inserted"] += inserted
+    summary["updated"] += updated
+    summary["unchanged"] += processed - inserted - updated
+
+
+def dedupe_by_url(articles):
+    """Keep the last occurrence of each url.
+
+    A single INSERT ... ON CONFLICT statement cannot touch the same row twice,
+    so duplicates inside one batch would fail the whole batch.
+    """
+    latest = {}
+    for article in articles:
+        latest[article['url']] = article
+    return list(latest.values())
+
+
+def upsert_batch(cursor, batch, prepared=False):
+    """Upsert a batch of articles with a single multi-row statement.
+
+    Archived urls in the batch are moved back into articles first, in the
+    same round trip, so the upsert sees them as existing rows. Open dead
+    letters for the batch's urls are resolved in that round trip too. With
+    `prepared`, both run as prepared statements fed with column arrays.
+    Returns the RETURNING inserted flags of rows that were written.
+    """
+    if prepared:
+        conn = cursor.connection
+        statement = (
+            prepare_sql(conn, PREPARED_RESTORE, ['text[]'], RESTORE_PREPARED_SQL)
+            + prepare_sql(conn, PREPARED_UPSERT, _COLUMN_TYPES, PREPARED_UPSERT_SQL)
+        )
+        columns = {column: [article[column] for article in batch] for column in ARTICLE_COLUMNS}
+        resolve = cursor.mogrify(RESOLVE_LOADED_URLS_SQL, {'urls': columns['url']})
+        with prepared_round_trip(conn, PREPARED_RESTORE, PREPARED_UPSERT):
+            cursor.execute(statement.encode('utf-8') + resolve + b';' + cursor.mogrify(EXECUTE_BATCH_SQL, columns))
+        return [row[0] for row in cursor.fetchall()]
+
+    urls = {'urls': [article['url'] for article in batch]}
+    restore = cursor.mogrify(RESTORE_URLS_SQL, urls) + b';' + cursor.mogrify(RESOLVE_LOADED_URLS_SQL, urls)
+    values = b','.join(cursor.mogrify(ROW_TEMPLATE, article) for article in batch)
+    cursor.execute(restore + b';' + BATCH_UPSERT_SQL.encode('utf-8').replace(b'%s', values))
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _upsert_rows_individually(cursor, batch, batch_number, summary, failures, dead):
+    """Retry a failed batch row by row, isolating failures with savepoints.
+
+    Rows that still fail are appended to `dead` as (article, error) pairs.
+    Open dead letters of the rows that load are resolved.
+    """
+    loaded = []
+    for article in batch:
+        cursor.execute('SAVEPOINT article_row')
+        try:
+            cursor.execute(SINGLE_UPSERT_SQL, article)
+            row = cursor.fetchone()
+            cursor.execute('RELEASE SAVEPOINT article_row')
+            _add_changes(summary, 1, [row[0]] if row else [])
+            loaded.append(article['url'])
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT article_row')
+            summary["errors"] += 1
+            dead.append((article, str(e).strip()))
+            failures(f"✗ Failed to insert article {article.get('url')} (batch {batch_number}): {str(e).strip()}")
+    if loaded:
+        cursor.execute(RESOLVE_LOADED_URLS_SQL, {'urls': loaded})
+
+
+def load_articles(conn, articles, batch_size=DEFAULT_BATCH_SIZE, run_id=None, prepared=True, checkpoint=None):
+    """Upsert articles in batches, one transaction per batch.
+
+    `articles` may be any iterable, so rows can be streamed from an artifact.
+    When a batch statement fails it is rolled back and replayed row by row so
+    only the offending rows are counted as errors. Those rows go to the
+    dead-letter table in the same transaction, and open dead letters of the
+    urls that load are resolved. Inserted and updated rows are
+    stamped with `run_id`. Batches use prepared statements unless `prepared`
+    is false (PgBouncer in transaction pooling mode).
+
+    With a `checkpoint` (checkpoints.LoadCheckpoint), the rows it has already
+    committed are skipped and every batch commits its new position. Returns
+    {"loaded", "errors"} plus inserted/updated/unchanged counts, and
+    "resumed" (rows skipped) when resuming.
+    """
+    summary = empty_summary()
+    collapsed_count = 0
+    # a bad feed can fail thousands of rows the same way, log a sample and the total
+    failures = LogSampler(logger, level=logging.ERROR)
+
+    consumed = 0
+    if checkpoint and checkpoint.position:
+        consumed = summary["resumed"] = checkpoint.position
+        summary["errors"] = checkpoint.errors
+        articles = islice(articles, consumed, None)
+
+    for batch_number, batch in enumerate(chunked(articles, batch_size), start=1):
+        consumed += len(batch)
+        unique_batch = [prepare_row(article, run_id) for article in dedupe_by_url(batch)]
+        collapsed_count += len(batch) - len(unique_batch)
+        batch = unique_batch
+        try:
+            with conn.cursor() as cursor:
+                returned_flags = upsert_batch(cursor, batch, prepared=prepared)
+                if checkpoint:
+                    checkpoint.save(cursor, consumed, summary["errors"])
+            conn.commit()
+            _add_changes(summary, len(batch), returned_flags)
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Batch {batch_number} failed ({str(e).strip()}), retrying row by row")
+            dead = []
+            with conn.cursor() as cursor:
+                restore_archived(cursor, [article['url'] for article in batch])
+                _upsert_rows_individually(cursor, batch, batch_number, summary, failures, dead)
+                record_dead_letters(cursor, dead, run_id=run_id)
+                if checkpoint:
+                    checkpoint.save(cursor, consumed, summary["errors"])
+            conn.commit()
+
+    if collapsed_count:
+        logger.info(f"Collapsed {collapsed_count} duplicate urls while loading")
+    if failures.count:
+        logger.error(
+            f"{failures.count} articles failed to insert and were dead-lettered "
+            f"({failures.suppressed} not logged individually)"
+        )
+
+    return summary
+
+
+def _copy_text_value(value):
+    """Render one value in COPY text format"""
+    if value is None:
+        return '\\N'
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace('\\', '\\\\')
+        .replace('\t', '\\t')
+        .replace('\n', '\\n')
+        .replace('\r', '\\r')
+    )
+
+
+def build_copy_buffer(articles):
+    """Serialize articles into an in-memory COPY text buffer"""
+    buffer = io.StringIO()
+    for article in articles:
+        buffer.write('\t'.join(_copy_text_value(article[column]) for column in ARTICLE_COLUMNS))
+        buffer.write('\n')
+    buffer.seek(0)
+    return buffer
+
+
+def copy_load_articles(conn, articles, chunk_size=COPY_CHUNK_SIZE, run_id=None, prepared=True, checkpoint=None):
+    """Bulk load articles with COPY into a staging table and one set-based merge.
+
+    Rows are streamed into the staging table chunk by chunk and duplicate urls
+    are resolved in the merge (last one wins). COPY is all-or-nothing, so if
+    the bulk path fails `articles` is iterated again through load_articles to
+    keep per-row error accounting; pass a list or another re-iterable.
+    `prepared` and `checkpoint` are passed on to that fallback. The merge
+    commits the checkpoint for the whole input, and a checkpoint that already
+    has progress resumes through load_articles. Returns the same summary as
+    load_articles.
+    """
+    if checkpoint and checkpoint.position:
+        return load_articles(conn, articles, run_id=run_id, prepared=prepared, checkpoint=checkpoint)
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(STAGING_DDL)
+            copied = 0
+            for chunk in chunked(articles, chunk_size):
+                copied += len(chunk)
+                cursor.copy_expert(STAGING_COPY_SQL, build_copy_buffer(prepare_row(a, run_id) for a in chunk))
+            # archived urls come back first so the merge sees them as existing rows
+            cursor.execute(RESTORE_STAGED_SQL + ';' + RESOLVE_LOADED_STAGED_SQL + ';' + MERGE_STAGING_SQL)
+            staged, inserted, updated = cursor.fetchone()
+            if checkpoint:
+                checkpoint.save(cursor, copied, 0)
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"COPY load failed ({str(e).strip()}), falling back to batched upserts")
+        return load_articles(conn, articles, run_id=run_id, prepared=prepared, checkpoint=checkpoint)
+
+    summary = empty_summary()
+    summary.update(loaded=staged, inserted=inserted, updated=updated, unchanged=staged - inserted - updated)
+    return summary
+
+
+def choose_load_mode(row_count, mode='auto', threshold=COPY_THRESHOLD):
+    """Resolve 'auto' to 'copy' or 'batch' based on the number of rows"""
+    if mode not in LOAD_MODES:
+        raise ValueError(f"Unknown load mode {mode!r}, expected one of {LOAD_MODES}")
+    if mode == 'auto':
+        return 'copy' if row_count >= threshold else 'batch'
+    return mode
@@ -0,0 +1,212 @@
+"""Per-stage instrumentation for the pipeline tasks.
+
+Each task runs its body inside `instrument(ti)`. The yielded StageMetrics
+collects the following:
+- wall time and peak RSS, filled in automatically
+- rows in and rows out, set by the task
+- bytes fetched and HTTP calls, taken from the transport stats
+- DB round trips, counted by a cursor factory installed with `track_connection`
+
+When the stage finishes, the values are sent through Airflow's StatsD
+channel. If NEWS_ETL_METRICS_DIR is set, they are also written as an
+OpenMetrics text file that a node_exporter textfile collector can scrape.
+Stages that failed are exported too, marked with failed=1.
+
+LogSampler replaces per-row log lines in hot loops. It logs the first few
+occurrences, then one in every N, and keeps a count so callers can log an
+aggregate at the end.
+"""
+
+from contextlib import contextmanager
+import logging
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'news_etl.stage'
+OPENMETRICS_PREFIX = 'news_etl_stage'
+METRICS_DIR_ENV = 'NEWS_ETL_METRICS_DIR'
+
+# metric name -> help text, names ending in a unit get an OpenMetrics UNIT line
+STAGE_METRICS = {
+    'duration_seconds': 'Wall time of the stage',
+    'rows_in': 'Rows read by the stage',
+    'rows_out': 'Rows written or passed on by the stage',
+    'bytes_fetched': 'Response bytes received from external APIs and pages',
+    'http_calls': 'HTTP requests sent, including retries and revalidations',
+    'db_round_trips': 'Statements sent to Postgres on tracked connections',
+    'peak_memory_bytes': 'Peak resident memory of the task process',
+    'failed': '1 if the stage raised',
+}
+
+_LABEL_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def peak_rss_bytes():
+    """Peak resident set size of this process"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class StageMetrics:
+    """Counters for one run of one pipeline stage"""
+
+    def __init__(self, stage, tags=None):
+        self.stage = stage
+        self.tags = dict(tags or {})
+        self.duration_seconds = 0.0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.bytes_fetched = 0
+        self.http_calls = 0
+        self.db_round_trips = 0
+        self.peak_memory_bytes = 0
+        self.failed = 0
+
+    def add_http(self, stats):
+        """Fold a transport's {'requests', 'bytes'} counters in"""
+        self.http_calls += stats.get('requests', 0)
+        self.bytes_fetched += stats.get('bytes', 0)
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in STAGE_METRICS}
+
+    def __str__(self):
+        return (
+            f"{self.stage}: {self.duration_seconds:.2f}s, rows {self.rows_in} in / {self.rows_out} out, "
+            f"{self.http_calls} HTTP calls ({self.bytes_fetched} bytes), {self.db_round_trips} DB round trips, "
+            f"peak memory {self.peak_memory_bytes / 2 ** 20:.0f} MiB"
+        )
+
+
+def track_connection(conn, metrics):
+    """Count every statement run through `conn`'s cursors as a DB round trip"""
+    # a pooled connection tracked by an earlier borrower now counts for this one only
+    base = getattr(conn.cursor_factory, 'untracked', None) or conn.cursor_factory or _default_cursor()
+
+    class CountingCursor(base):
+        untracked = base
+
+        def execute(self, query, vars=None):
+            metrics.db_round_trips += 1
+            return super().execute(query, vars)
+
+        def executemany(self, query, vars_list):
+            metrics.db_round_trips += 1
+            return super().executemany(query, vars_list)
+
+        def copy_expert(self, sql, file, size=8192):
+            metrics.db_round_trips += 1
+            return super().copy_expert(sql, file, size)
+
+    conn.cursor_factory = CountingCursor
+    return conn
+
+
+def _default_cursor():
+    from psycopg2.extensions import cursor
+
+    return cursor
+
+
+def emit_stage_metrics(metrics):
+    """Send a stage's metrics through Airflow's metrics backend"""
+    from airflow.stats import Stats
+
+    prefix = f'{METRIC_PREFIX}.{metrics.stage}'
+    Stats.timing(f'{prefix}.duration', metrics.duration_seconds * 1000, tags=metrics.tags)
+    for name, value in metrics.as_dict().items():
+        if name != 'duration_seconds':
+            Stats.gauge(f'{prefix}.{name}', value, tags=metrics.tags)
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_openmetrics(metrics):
+    """OpenMetrics text exposition of one stage's metrics"""
+    labels = dict(metrics.tags, stage=metrics.stage)
+    label_text = ','.join(f'{key}="{_label_value(value)}"' for key, value in sorted(labels.items()))
+    lines = []
+    for name, value in metrics.as_dict().items():
+        metric = f'{OPENMETRICS_PREFIX}_{name}'
+        lines.append(f'# HELP {metric} {STAGE_METRICS[name]}')
+        lines.append(f'# TYPE {metric} gauge')
+        if name.endswith('_seconds'):
+            lines.append(f'# UNIT {metric} seconds')
+        elif name.endswith('_bytes'):
+            lines.append(f'# UNIT {metric} bytes')
+        lines.append(f'{metric}{{{label_text}}} {value}')
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
+
+
+def write_openmetrics(metrics, directory):
+    """Atomically replace this stage's .prom file in `directory`, returns its path"""
+    os.makedirs(directory, exist_ok=True)
+    parts = [metrics.tags.get('dag_id', ''), metrics.stage, metrics.tags.get('map_index', '')]
+    name = '_'.join(_LABEL_UNSAFE.sub('_', str(part)) for part in parts if part not in ('', None, -1))
+    path = os.path.join(directory, f'{name}.prom')
+    # the textfile collector must never read a half-written file
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        f.write(render_openmetrics(metrics))
+    os.replace(tmp, path)
+    return path
+
+
+@contextmanager
+def instrument(ti=None, stage=None, **tags):
+    """Time a task body and export its StageMetrics when it ends"""
+    if ti is not None:
+        stage = stage or ti.task_id
+        tags = dict({'dag_id': ti.dag_id, 'map_index': getattr(ti, 'map_index', -1)}, **tags)
+    metrics = StageMetrics(stage, tags)
+    started = time.perf_counter()
+    try:
+        yield metrics
+    except BaseException:
+        metrics.failed = 1
+        raise
+    finally:
+        metrics.duration_seconds = time.perf_counter() - started
+        metrics.peak_memory_bytes = peak_rss_bytes()
+        logger.info(f"Stage metrics {metrics}")
+        # exporting must never fail the task it measures
+        try:
+            emit_stage_metrics(metrics)
+            directory = os.environ.get(METRICS_DIR_ENV)
+            if directory:
+                write_openmetrics(metrics, directory)
+        except Exception as e:
+            logger.warning(f"Could not export stage metrics: {e}")
+
+
+class LogSampler:
+    """Logs the first `first` occurrences of an event, then one in every `every`"""
+
+    def __init__(self, log, first=5, every=1000, level=logging.WARNING):
+        self.log = log
+        self.first = first
+        self.every = every
+        self.level = level
+        self.count = 0
+        self.logged = 0
+
+    def __call__(self, message):
+        self.count += 1
+        if self.count <= self.first or self.count % self.every == 0:
+            self.logged += 1
+            self.log.log(self.level, f"{message} (occurrence {self.count})")
+
+    @property
+    def suppressed(self):
+        """Occurrences counted but not logged"""
+        return self.count - self.logged
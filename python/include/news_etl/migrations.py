@@ -0,0 +1,161 @@
+"""Versioned, idempotent schema migrations for the pipeline-owned parts of the database.
+
+The articles table itself belongs to the server's Prisma schema; the pipeline
+only layers defaults, triggers, indexes and its own tables on top. Each
+migration runs once, in its own transaction, and bumps `etl_schema_version`.
+The hot path only reads the stored version (cached per process), so load runs
+never take DDL locks on a table the API is serving from.
+"""
+
+import logging
+
+from include.news_etl.archive import ARCHIVE_DDL
+from include.news_etl.checkpoints import CHECKPOINT_DDL
+from include.news_etl.daily_stats import DAILY_STATS_DDL, DAILY_STATS_SOURCE_DDL
+from include.news_etl.dead_letters import DEAD_LETTER_DDL
+from include.news_etl.dedup import BUCKET_ARRAY_DDL, DEDUP_DDL
+from include.news_etl.images import IMAGE_CACHE_DDL, IMAGE_FAILURE_DDL
+from include.news_etl.loading import CONTENT_HASH_DDL, RUN_ID_DDL
+from include.news_etl.search import SEARCH_VECTOR_DDL
+from include.news_etl.summaries import SUMMARY_CACHE_DDL
+from include.news_etl.tags import TAGS_DDL
+from include.news_etl.watermark import WATERMARK_DDL
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS etl_schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    "appliedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# fail fast instead of queueing behind long API reads while holding up everyone else
+MIGRATION_LOCK_TIMEOUT = '5s'
+
+# serializes concurrent migrators (e.g. mapped backfill tasks)
+MIGRATION_ADVISORY_LOCK = "hashtext('news_etl_schema_migrations')"
+
+MIGRATIONS = [
+    (1, 'articles id default and updatedAt trigger', """
+    DO $$
+    BEGIN
+        CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+        ALTER TABLE articles ALTER COLUMN id SET DEFAULT uuid_generate_v4();
+    EXCEPTION
+        WHEN others THEN
+            -- gen_random_uuid is built in from PostgreSQL 13
+            ALTER TABLE articles ALTER COLUMN id SET DEFAULT gen_random_uuid();
+    END
+    $$;
+
+    ALTER TABLE articles ALTER COLUMN "updatedAt" SET DEFAULT CURRENT_TIMESTAMP;
+
+    CREATE OR REPLACE FUNCTION update_updated_at_column()
+    RETURNS TRIGGER AS $$
+    BEGIN
+        NEW."updatedAt" = CURRENT_TIMESTAMP;
+        RETURN NEW;
+    END;
+    $$ language 'plpgsql';
+
+    DROP TRIGGER IF EXISTS update_articles_updated_at ON articles;
+    CREATE TRIGGER update_articles_updated_at
+        BEFORE UPDATE ON articles
+        FOR EACH ROW
+        EXECUTE FUNCTION update_updated_at_column();
+    """),
+    (2, 'articles lookup indexes', """
+    CREATE INDEX IF NOT EXISTS idx_articles_publish_date ON articles("publishDate");
+    CREATE INDEX IF NOT EXISTS idx_articles_section ON articles(section);
+    CREATE INDEX IF NOT EXISTS idx_articles_url ON articles(url);
+    """),
+    (3, 'content hash column and extraction watermarks', CONTENT_HASH_DDL + WATERMARK_DDL),
+    (4, 'run id column and extractedDate index', RUN_ID_DDL + """
+    CREATE INDEX IF NOT EXISTS idx_articles_extracted_date ON articles("extractedDate");
+    """),
+    (5, 'near-duplicate signature index', DEDUP_DDL),
+    (6, 'summary cache and pending-summary index', SUMMARY_CACHE_DDL),
+    (7, 'weighted full-text search column and GIN index', SEARCH_VECTOR_DDL),
+    (8, 'image url cache and missing-image index', IMAGE_CACHE_DDL),
+    (9, 'section x day article rollup', DAILY_STATS_DDL),
+    (10, 'monthly archive partitions and archived url registry', ARCHIVE_DDL),
+    (11, 'dead-letter table and load checkpoints', DEAD_LETTER_DDL + CHECKPOINT_DDL),
+    (12, 'article tags, tag state and fitted tag vocabularies', TAGS_DDL),
+    (13, 'near-duplicate buckets as one GIN-indexed array per signature', BUCKET_ARRAY_DDL),
+    (14, 'failed image fetches in the image cache', IMAGE_FAILURE_DDL),
+    (15, 'article rollup split by source', DAILY_STATS_SOURCE_DDL),
+]
+
+LATEST_VERSION = max(version for version, _, _ in MIGRATIONS)
+
+# highest version this process has confirmed, so repeat checks skip the database
+_verified_version = 0
+
+
+def current_version(conn):
+    """Read the applied schema version, 0 when nothing has been applied yet"""
+    from psycopg2 import errors
+
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute('SELECT COALESCE(MAX(version), 0) FROM etl_schema_version')
+            version = cursor.fetchone()[0]
+        conn.commit()
+        return version
+    except errors.UndefinedTable:
+        conn.rollback()
+        return 0
+
+
+def migrate(conn):
+    """Apply pending migrations and return the list of versions applied"""
+    global _verified_version
+
+    with conn.cursor() as cursor:
+        cursor.execute("SELECT to_regclass('articles')")
+        if cursor.fetchone()[0] is None:
+            conn.rollback()
+            raise Exception("Table 'articles' not found in database")
+        cursor.execute(SCHEMA_VERSION_DDL)
+    conn.commit()
+
+    applied = []
+    for version, description, sql in MIGRATIONS:
+        with conn.cursor() as cursor:
+            cursor.execute(f'SELECT pg_advisory_xact_lock({MIGRATION_ADVISORY_LOCK})')
+            # re-check under the lock, another worker may have just applied it
+            cursor.execute('SELECT 1 FROM etl_schema_version WHERE version = %s', (version,))
+            if cursor.fetchone():
+                conn.commit()
+                continue
+
+            logger.info(f"Applying schema migration {version}: {description}")
+            cursor.execute(f"SET LOCAL lock_timeout = '{MIGRATION_LOCK_TIMEOUT}'")
+            cursor.execute(sql)
+            cursor.execute(
+                'INSERT INTO etl_schema_version (version, description) VALUES (%s, %s)',
+                (version, description)
+            )
+        conn.commit()
+        applied.append(version)
+
+    _verified_version = LATEST_VERSION
+    return applied
+
+
+def ensure_schema(conn):
+    """Cheap hot-path check: migrate only when the stored version is behind"""
+    global _verified_version
+
+    if _verified_version >= LATEST_VERSION:
+        return []
+
+    version = current_version(conn)
+    if version >= LATEST_VERSION:
+        _verified_version = version
+        return []
+
+    logger.info(f"Schema at version {version}, migrating to {LATEST_VERSION}")
+    return migrate(conn)
@@ -0,0 +1,77 @@
+"""Set-based data quality checks over the rows a pipeline run wrote.
+
+Every check is a FILTER aggregate in a single query, scoped by an indexed
+equality (the run id stamped on each written row) or an id list, so the cost
+follows the size of the run rather than the size of the articles table.
+Duplicate urls are not checked: the unique index on url already rules them out.
+"""
+
+from datetime import timedelta
+import logging
+
+logger = logging.getLogger(__name__)
+
+# bodies shorter than this are usually live blog stubs or failed extractions
+MIN_BODY_LENGTH = 200
+
+# a publish date this far past the extraction time points at a timezone or clock problem
+MAX_PUBLISH_SKEW = timedelta(hours=1)
+
+METRIC_PREFIX = 'news_etl.quality'
+
+# check name -> predicate counting offending rows
+QUALITY_CHECKS = {
+    'missing_fields': "headline IS NULL OR headline = '' OR body IS NULL OR body = ''",
+    'short_body': 'length(body) < %(min_body_length)s',
+    'publish_date_skew': '"publishDate" > "extractedDate" + %(max_publish_skew)s',
+    'null_image': 'image_url IS NULL',
+}
+
+
+def build_quality_query(scope_clause, checks=QUALITY_CHECKS):
+    """One pass over the scoped rows computing every check as a FILTER aggregate"""
+    aggregates = ',\n    '.join(
+        f'COUNT(*) FILTER (WHERE {predicate}) AS {name}' for name, predicate in checks.items()
+    )
+    return f"""
+SELECT
+    COUNT(*) AS scanned,
+    {aggregates}
+FROM articles
+WHERE {scope_clause}
+"""
+
+
+def _scope(run_id, ids):
+    if (run_id is None) == (ids is None):
+        raise ValueError("Scope quality checks by exactly one of run_id or ids")
+    if run_id is not None:
+        return 'etl_run_id = %(run_id)s', {'run_id': run_id}
+    return 'id = ANY(%(ids)s)', {'ids': list(ids)}
+
+
+def run_quality_checks(postgres_hook, run_id=None, ids=None, min_body_length=MIN_BODY_LENGTH,
+                       max_publish_skew=MAX_PUBLISH_SKEW):
+    """Run every check over the rows a run wrote (by run id) or an explicit id list.
+
+    Returns {"rows": scanned, "checks": {name: offending rows}}.
+    """
+    scope_clause, parameters = _scope(run_id, ids)
+    parameters.update(min_body_length=min_body_length, max_publish_skew=max_publish_skew)
+
+    row = postgres_hook.get_first(build_quality_query(scope_clause), parameters=parameters)
+    return {
+        'rows': row[0],
+        'checks': dict(zip(QUALITY_CHECKS, row[1:])),
+    }
+
+
+def emit_quality_metrics(results, tags=None):
+    """Send check results as gauges (counts and ratios) through Airflow's metrics backend"""
+    from airflow.stats import Stats
+
+    rows = results['rows']
+    Stats.gauge(f'{METRIC_PREFIX}.rows', rows, tags=tags)
+    for name, count in results['checks'].items():
+        Stats.gauge(f'{METRIC_PREFIX}.{name}', count, tags=tags)
+        Stats.gauge(f'{METRIC_PREFIX}.{name}_ratio', count / rows if rows else 0.0, tags=tags)
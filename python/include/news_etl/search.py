@@ -0,0 +1,117 @@
+"""Full-text search column for the articles table.
+
+articles.search_vector holds a weighted tsvector, with the headline at
+weight A and the body at weight B, behind a GIN index. The load upsert
+computes it for every row it inserts or rewrites, so it stays current
+without any table-wide recomputation. Rows loaded before the column existed
+are filled once by the search backfill DAG, which splits the id space into
+ranges and updates each range in short keyset-paginated batches.
+
+API queries should filter with `search_vector @@ websearch_to_tsquery(...)`
+(see SEARCH_SQL) instead of ILIKE over body.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# text search configuration used for both indexing and queries, they must match
+SEARCH_CONFIG = 'english'
+
+DEFAULT_BACKFILL_BATCH_SIZE = 5000
+DEFAULT_BACKFILL_RANGES = 4
+
+# ids are lowercase hex uuids, ranges split them on this many leading hex digits
+_RANGE_PREFIX_DIGITS = 8
+
+
+def search_vector_sql(headline, body):
+    """SQL expression for the weighted tsvector of the given headline and body expressions"""
+    return (
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({headline}, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce({body}, '')), 'B')"
+    )
+
+
+# the column is added empty, so building the index here is cheap; the backfill then fills
+# it through the GIN pending list. search-only updates (the backfill) keep updatedAt.
+SEARCH_VECTOR_DDL = """
+ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+CREATE INDEX IF NOT EXISTS idx_articles_search_vector ON articles USING GIN (search_vector);
+
+DROP TRIGGER IF EXISTS update_articles_updated_at ON articles;
+CREATE TRIGGER update_articles_updated_at
+    BEFORE UPDATE ON articles
+    FOR EACH ROW
+    WHEN (OLD.search_vector IS NOT DISTINCT FROM NEW.search_vector
+          OR OLD.headline IS DISTINCT FROM NEW.headline
+          OR OLD.body IS DISTINCT FROM NEW.body)
+    EXECUTE FUNCTION update_updated_at_column();
+"""
+
+# one keyset page of a range, rows the upsert already filled are skipped
+BACKFILL_SQL = f"""
+WITH page AS (
+    SELECT id
+    FROM articles
+    WHERE id > %(after)s AND (%(upper)s IS NULL OR id < %(upper)s) AND search_vector IS NULL
+    ORDER BY id
+    LIMIT %(limit)s
+), filled AS (
+    UPDATE articles AS a
+    SET search_vector = {search_vector_sql('a.headline', 'a.body')}
+    FROM page
+    WHERE a.id = page.id
+    RETURNING a.id
+)
+SELECT COUNT(*), MAX(id) FROM filled
+"""
+
+SEARCH_SQL = f"""
+SELECT id, headline, ts_rank(search_vector, query) AS rank
+FROM articles, websearch_to_tsquery('{SEARCH_CONFIG}', %(query)s) AS query
+WHERE search_vector @@ query
+ORDER BY rank DESC, "publishDate" DESC
+LIMIT %(limit)s
+"""
+
+
+def plan_backfill_ranges(count=DEFAULT_BACKFILL_RANGES):
+    """Split the id space into `count` contiguous [lower, upper) ranges, None meaning unbounded"""
+    if count < 1:
+        raise ValueError(f"Range count must be positive, got {count}")
+    space = 16 ** _RANGE_PREFIX_DIGITS
+    bounds = [f"{space * i // count:0{_RANGE_PREFIX_DIGITS}x}" for i in range(1, count)]
+    lowers = [''] + bounds
+    uppers = bounds + [None]
+    return [{'lower': lower, 'upper': upper} for lower, upper in zip(lowers, uppers)]
+
+
+def backfill_search_vectors(conn, lower='', upper=None, batch_size=DEFAULT_BACKFILL_BATCH_SIZE):
+    """Fill search_vector for rows in one id range, committing every batch.
+
+    Short transactions keep row locks brief for concurrent loads and API
+    writes, and a restarted task resumes where the column is still empty.
+    Returns the number of rows updated.
+    """
+    updated = 0
+    after = lower
+    while True:
+        with conn.cursor() as cursor:
+            cursor.execute(BACKFILL_SQL, {'after': after, 'upper': upper, 'limit': batch_size})
+            count, last_id = cursor.fetchone()
+        conn.commit()
+        if not count:
+            return updated
+        updated += count
+        # keyset position in the database's collation order
+        after = last_id
+
+
+def search_articles(conn, query, limit=20):
+    """(id, headline, rank) of the best matches for a web-style search query"""
+    with conn.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, {'query': query, 'limit': limit})
+        rows = cursor.fetchall()
+    conn.commit()
+    return rows
@@ -0,0 +1,138 @@
+"""Pluggable news source adapters.
+
+An adapter owns everything that differs between publishers: the Airflow
+connection and API key Variable, query parameters, pagination and the mapping
+from raw results to articles rows. The DAG maps one extract/transform branch
+per enabled adapter and merges every branch into a single load.
+
+To add a publisher, subclass SourceAdapter, decorate it with @register_source
+and list its name in NEWS_ETL_SOURCES.
+"""
+
+from abc import ABC, abstractmethod
+import logging
+
+from include.news_etl.guardian import (
+    DEFAULT_MAX_WORKERS,
+    GUARDIAN_MAX_PAGE_SIZE,
+    GUARDIAN_SOURCE,
+    SEARCH_ENDPOINT,
+    fetch_all_pages,
+    mount_connection_pool,
+)
+from include.news_etl.transform import iter_transform, iter_transform_columnar
+
+logger = logging.getLogger(__name__)
+
+SOURCES_ENV = 'NEWS_ETL_SOURCES'
+DEFAULT_SOURCES = 'guardian'
+
+# registry name -> adapter class
+SOURCE_ADAPTERS = {}
+
+
+class SourceAdapter(ABC):
+    """Fetch, pagination and field mapping for one news API"""
+
+    # registry key, as listed in NEWS_ETL_SOURCES
+    name = None
+    # value of articles.source, also keys the source's watermark
+    source = None
+    conn_id = None
+    api_key_variable = None
+    # publication timestamp in a raw result, used for watermark filtering
+    date_field = None
+    max_workers = DEFAULT_MAX_WORKERS
+    # requests per second allowed by the API key (None for no limit), overridable by a Variable
+    rate_limit = None
+    rate_limit_variable = None
+    # transport counters ({'requests', 'bytes', ...}) of the last fetch
+    transport_stats = None
+
+    @abstractmethod
+    def fetch(self, http_hook, window, api_key, checkpoint=None):
+        """Fetch every result published in the window.
+
+        Pages found in `checkpoint` (artifacts.PageCheckpoint) are not fetched
+        again. Returns (results, total reported by the API, pages fetched).
+        """
+
+    @abstractmethod
+    def transform(self, results, extraction_date, mode='rows'):
+        """Lazily map raw results to articles rows"""
+
+
+def register_source(adapter_class):
+    """Class decorator adding an adapter to the registry under its name"""
+    if not adapter_class.name:
+        raise ValueError(f"{adapter_class.__name__} has no name")
+    SOURCE_ADAPTERS[adapter_class.name] = adapter_class
+    return adapter_class
+
+
+def get_source(name):
+    """Instantiate the registered adapter called `name`"""
+    try:
+        return SOURCE_ADAPTERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown news source {name!r}, expected one of {sorted(SOURCE_ADAPTERS)}") from None
+
+
+def parse_source_names(value):
+    """Split a comma-separated NEWS_ETL_SOURCES value, rejecting unknown names"""
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names:
+        raise ValueError("No news sources configured")
+    for name in names:
+        get_source(name)
+    return names
+
+
+@register_source
+class GuardianAdapter(SourceAdapter):
+    """Guardian content API /search, environment section"""
+
+    name = 'guardian'
+    source = GUARDIAN_SOURCE
+    conn_id = 'guardian_default'
+    api_key_variable = 'GUARDIAN_API_KEY'
+    date_field = 'webPublicationDate'
+    section = 'environment'
+    # developer keys allow 12 calls per second
+    rate_limit = 12.0
+    rate_limit_variable = 'GUARDIAN_RATE_LIMIT'
+
+    def fetch(self, http_hook, window, api_key, checkpoint=None):
+        from include.news_etl.http_client import TokenBucket, default_cache
+
+        # one keep-alive, rate-limited session shared by all page fetches
+        session = http_hook.get_conn(headers={'Accept': 'application/json'})
+        limiter = TokenBucket(self.rate_limit) if self.rate_limit else None
+        mount_connection_pool(session, self.max_workers, limiter=limiter, cache=default_cache())
+        url = http_hook.url_from_endpoint(SEARCH_ENDPOINT)
+        transport = session.get_adapter(url)
+
+        params = {
+            'section': self.section,
+            'from-date': window['from_date'],
+            'to-date': window['to_date'],
+            'show-fields': 'headline,bodyText,thumbnail',
+            'api-key': api_key,
+            'page-size': str(GUARDIAN_MAX_PAGE_SIZE)
+        }
+
+        # first page tells us how many pages to fetch, the rest run concurrently
+        try:
+            data = fetch_all_pages(session, url, params, max_workers=self.max_workers, checkpoint=checkpoint)
+        finally:
+            session.close()
+        self.transport_stats = dict(transport.stats)
+        logger.info(f"{self.name} HTTP: {self.transport_stats}")
+
+        response = data['response']
+        return response['results'], response.get('total', 0), response.get('pagesFetched', 1)
+
+    def transform(self, results, extraction_date, mode='rows'):
+        if mode == 'columnar':
+            return iter_transform_columnar(results, extraction_date, self.source)
+        return iter_transform(results, extraction_date, self.source)
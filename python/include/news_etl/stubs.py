@@ -0,0 +1,237 @@
+"""Local stand-ins for external services, used by tests and benchmarks"""
+
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import hashlib
+import json
+import math
+import threading
+import time
+
+
+# the server's Prisma articles table, which the pipeline migrations build on
+ARTICLES_DDL = """
+CREATE TABLE articles (
+    "id" TEXT NOT NULL DEFAULT gen_random_uuid()::text,
+    "publishDate" TIMESTAMP(3) NOT NULL,
+    "extractedDate" TIMESTAMP(3) NOT NULL,
+    "url" TEXT NOT NULL,
+    "headline" TEXT NOT NULL,
+    "body" TEXT NOT NULL,
+    "section" TEXT NOT NULL,
+    "source" TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "updatedAt" TIMESTAMP(3) NOT NULL,
+    "image_url" TEXT,
+    "ai_summary" TEXT,
+    CONSTRAINT "articles_pkey" PRIMARY KEY ("id")
+);
+CREATE UNIQUE INDEX "articles_url_key" ON articles("url");
+"""
+
+
+def synthetic_article(index, base_date=datetime(2025, 1, 1)):
+    """Build a deterministic Guardian-shaped search result"""
+    published = base_date + timedelta(minutes=index)
+    return {
+        'id': f'environment/2025/synthetic-{index}',
+        'type': 'article',
+        'sectionId': 'environment',
+        'sectionName': 'Environment',
+        'webPublicationDate': published.strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'webTitle': f'Synthetic article {index}',
+        'webUrl': f'https://www.theguardian.com/environment/2025/synthetic-{index}',
+        'apiUrl': f'https://content.guardianapis.com/environment/2025/synthetic-{index}',
+        'fields': {
+            'headline': f'Synthetic article {index}',
+            'bodyText': f'Body of synthetic article {index}. ' * 40,
+            'thumbnail': f'https://media.guim.co.uk/synthetic-{index}/500.jpg',
+        },
+    }
+
+
+class _GuardianHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_not_modified(self, etag):
+        self.send_response(304)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_GET(self):
+        stub = self.server.stub
+        parsed = urlparse(self.path)
+        if parsed.path != '/search':
+            self._send_json(404, {'message': 'Not found'})
+            return
+
+        query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+        page_size = int(query.get('page-size', 10))
+        page = int(query.get('page', 1))
+        total = stub.total_articles
+        pages = max(1, math.ceil(total / page_size))
+
+        with stub.lock:
+            stub.request_count += 1
+            throttled = stub.throttled_count < stub.throttle_requests
+            if throttled:
+                stub.throttled_count += 1
+
+        if throttled:
+            self._send_json(429, {'message': 'API rate limit exceeded'},
+                            headers={'Retry-After': str(stub.retry_after)})
+            return
+
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        start = (page - 1) * page_size
+        results = [stub.article_factory(i) for i in range(start, min(start + page_size, total))]
+        payload = {
+            'response': {
+                'status': 'ok',
+                'total': total,
+                'startIndex': start + 1,
+                'pageSize': page_size,
+                'currentPage': page,
+                'pages': pages,
+                'orderBy': 'newest',
+                'results': results,
+            }
+        }
+        etag = '"' + hashlib.sha1(json.dumps(payload).encode('utf-8')).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            with stub.lock:
+                stub.not_modified_count += 1
+            self._send_not_modified(etag)
+            return
+        self._send_json(200, payload, headers={'ETag': etag})
+
+
+class GuardianStubServer:
+    """Serve synthetic /search pages on localhost.
+
+    Use as a context manager; `url` is the base URL to point a session or
+    HttpHook connection at, and `latency` simulates per-request API latency.
+    The first `throttle_requests` requests are answered with 429 and a
+    `Retry-After` of `retry_after` seconds. Pages carry an ETag and answer a
+    matching If-None-Match with 304.
+    """
+
+    handler = _GuardianHandler
+
+    def __init__(self, total_articles=0, latency=0.0, article_factory=synthetic_article,
+                 throttle_requests=0, retry_after=0):
+        self.total_articles = total_articles
+        self.latency = latency
+        self.article_factory = article_factory
+        self.throttle_requests = throttle_requests
+        self.retry_after = retry_after
+        self.request_count = 0
+        self.throttled_count = 0
+        self.not_modified_count = 0
+        self.lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self.handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+
+class _ArticlePageHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.request_count += 1
+            stub.requested.append(self.path)
+            stub.in_flight += 1
+            stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+        try:
+            self._send_page(stub)
+        finally:
+            with stub.lock:
+                stub.in_flight -= 1
+
+    def _send_page(self, stub):
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        image = stub.pages.get(self.path, '')
+        if image is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        meta = f'<meta property="og:image" content="{image}">' if image else ''
+        page = (
+            f'<!doctype html><html><head><title>{self.path}</title>{meta}</head>'
+            f'<body><p>{"Article text. " * 200}</p></body></html>'
+        ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+
+class ArticlePageStubServer(GuardianStubServer):
+    """Serve article HTML pages on localhost.
+
+    `pages` maps a path to the og:image content its page declares: '' for a
+    page without one, None for a 404. Unknown paths are pages without an
+    image. Requested paths are recorded in `requested` and the most requests
+    ever served at once in `max_in_flight`.
+    """
+
+    handler = _ArticlePageHandler
+
+    def __init__(self, pages=None, latency=0.0):
+        super().__init__(latency=latency)
+        self.pages = dict(pages or {})
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
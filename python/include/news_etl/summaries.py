@@ -0,0 +1,191 @@
+"""Offline article summaries for the articles.ai_summary column.
+
+Rows still missing a summary are read in keyset-paginated chunks. They are
+summarized across a process pool by a pluggable backend (by default a
+CPU-only extractive TextRank) and written back with one batched UPDATE per
+chunk. Results are memoized by content hash and backend, so the same text
+(syndicated copies, edits that were reverted) is never summarized twice. The
+upsert clears ai_summary whenever an article's text changes.
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import logging
+import math
+import os
+import re
+
+from include.news_etl.db import iter_keyset_chunks
+from include.news_etl.loading import content_hash
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'textrank'
+DEFAULT_CHUNK_SIZE = 500
+DEFAULT_SENTENCES = 3
+
+# longer bodies are ranked on their opening sentences only, TextRank is quadratic in sentences
+MAX_SENTENCES = 60
+
+SUMMARY_CACHE_DDL = """
+CREATE TABLE IF NOT EXISTS article_summary_cache (
+    content_hash TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (content_hash, backend)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_pending_summary ON articles(id) WHERE ai_summary IS NULL;
+"""
+
+# one page of rows without a summary, read through the partial index above
+PENDING_SQL = """
+SELECT id, headline, body, section, content_hash
+FROM articles
+WHERE ai_summary IS NULL AND id > %s
+ORDER BY id
+LIMIT %s
+"""
+
+CACHED_SQL = 'SELECT content_hash, summary FROM article_summary_cache WHERE backend = %s AND content_hash = ANY(%s)'
+
+CACHE_INSERT_SQL = """
+INSERT INTO article_summary_cache (content_hash, backend, summary) VALUES %s
+ON CONFLICT (content_hash, backend) DO NOTHING
+"""
+
+UPDATE_SUMMARIES_SQL = """
+UPDATE articles AS a
+SET ai_summary = v.summary
+FROM (VALUES %s) AS v(id, summary)
+WHERE a.id = v.id
+"""
+
+# sentence punctuation, optionally inside a closing quote, then the next sentence's first character
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?])|(?<=[.!?]["\']))\s+(?=[A-Z0-9"\'])')
+_WORD = re.compile(r'\w+')
+
+# backend name -> class
+SUMMARY_BACKENDS = {}
+
+
+class SummaryBackend(ABC):
+    """Turns an article body into a short summary"""
+
+    name = None
+
+    @abstractmethod
+    def summarize(self, text):
+        """Summary of `text`, '' when there is nothing to summarize"""
+
+
+def register_backend(backend_class):
+    """Class decorator adding a backend to the registry under its name"""
+    if not backend_class.name:
+        raise ValueError(f"{backend_class.__name__} has no name")
+    SUMMARY_BACKENDS[backend_class.name] = backend_class
+    return backend_class
+
+
+def get_backend(name, **options):
+    """Instantiate the registered backend called `name`"""
+    try:
+        return SUMMARY_BACKENDS[name](**options)
+    except KeyError:
+        raise ValueError(f"Unknown summary backend {name!r}, expected one of {sorted(SUMMARY_BACKENDS)}") from None
+
+
+def split_sentences(text):
+    return [sentence.strip() for sentence in _SENTENCE_END.split(text or '') if sentence.strip()]
+
+
+@register_backend
+class TextRankBackend(SummaryBackend):
+    """Extractive TextRank: the most central sentences, in their original order"""
+
+    name = 'textrank'
+
+    def __init__(self, sentences=DEFAULT_SENTENCES, damping=0.85, iterations=50):
+        self.sentences = sentences
+        self.damping = damping
+        self.iterations = iterations
+
+    def summarize(self, text):
+        import numpy as np
+
+        sentences = split_sentences(text)[:MAX_SENTENCES]
+        if len(sentences) <= self.sentences:
+            return ' '.join(sentences)
+
+        words = [set(_WORD.findall(sentence.lower())) for sentence in sentences]
+        count = len(sentences)
+        weights = np.zeros((count, count))
+        for i in range(count):
+            for j in range(i + 1, count):
+                if len(words[i]) > 1 and len(words[j]) > 1:
+                    # overlap normalized by sentence length, as in the original TextRank paper
+                    overlap = len(words[i] & words[j]) / (math.log(len(words[i])) + math.log(len(words[j])))
+                    weights[i, j] = weights[j, i] = overlap
+
+        totals = weights.sum(axis=1, keepdims=True)
+        transition = np.divide(weights, totals, out=np.full_like(weights, 1 / count), where=totals > 0)
+        scores = np.full(count, 1 / count)
+        for _ in range(self.iterations):
+            scores = (1 - self.damping) / count + self.damping * transition.T @ scores
+
+        top = sorted(np.argsort(-scores, kind='stable')[:self.sentences])
+        return ' '.join(sentences[i] for i in top)
+
+
+_worker_backend = None
+
+
+def _init_worker(backend_name, options):
+    global _worker_backend
+    _worker_backend = get_backend(backend_name, **options)
+
+
+def _summarize_in_worker(text):
+    return _worker_backend.summarize(text)
+
+
+def summarize_pending(conn, backend=DEFAULT_BACKEND, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                      max_rows=None, **backend_options):
+    """Fill ai_summary for every row still missing one.
+
+    Returns {"summarized", "cached", "chunks"}.
+    """
+    from psycopg2.extras import execute_values
+
+    workers = workers or os.cpu_count() or 1
+    stats = {'summarized': 0, 'cached': 0, 'chunks': 0}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(backend, backend_options)) as pool:
+        for rows in iter_keyset_chunks(conn, PENDING_SQL, chunk_size, max_rows):
+            hashes = [
+                stored_hash or content_hash({'headline': headline, 'body': body, 'section': section})
+                for _, headline, body, section, stored_hash in rows
+            ]
+            with conn.cursor() as cursor:
+                cursor.execute(CACHED_SQL, (backend, list(set(hashes))))
+                summaries = dict(cursor.fetchall())
+
+                # one body per distinct uncached hash goes to the pool
+                todo = {}
+                for (_, _, body, _, _), digest in zip(rows, hashes):
+                    if digest not in summaries:
+                        todo.setdefault(digest, body)
+                worker_chunk = max(1, math.ceil(len(todo) / (4 * workers)))
+                fresh = dict(zip(todo, pool.map(_summarize_in_worker, todo.values(), chunksize=worker_chunk)))
+
+                if fresh:
+                    execute_values(cursor, CACHE_INSERT_SQL, [(digest, backend, summary) for digest, summary in fresh.items()])
+                summaries.update(fresh)
+                updates = [(row[0], summaries[digest]) for row, digest in zip(rows, hashes)]
+                execute_values(cursor, UPDATE_SUMMARIES_SQL, updates, page_size=len(updates))
+            conn.commit()
+
+            stats['chunks'] += 1
+            stats['summarized'] += len(fresh)
+            stats['cached'] += len(rows) - len(fresh)
+    return stats
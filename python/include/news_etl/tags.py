@@ -0,0 +1,396 @@
+"""Keyword and topic tags for loaded articles, from TF-IDF against a fitted vocabulary.
+
+Nearly every article has the section "Environment", so the API had no way to
+filter by subject short of scanning body text. The tagging task scores
+articles in chunks. Each chunk is one sparse matrix (CSR arrays built with
+numpy), with a sublinear, L2-normalized TF-IDF row per article. The
+headline counts HEADLINE_WEIGHT times.
+- keywords: the KEYWORDS highest-weighted terms of a row
+- topics: labels from TOPIC_TERMS whose terms hold at least TOPIC_THRESHOLD
+  of a row's squared weight (rows have unit length, so scores are shares
+  between 0 and 1), at most MAX_TOPICS per article
+
+Only tokenizing is per article. Vocabulary lookup, counting, weighting and
+ranking are array operations over the whole chunk.
+
+The vocabulary (terms and their idf) is fitted on the most recent
+FIT_DOCUMENTS articles. It is stored in article_tag_vocabularies and cached
+per process, and it is refitted once it is older than the configured age.
+An article keeps the tags of the vocabulary it was tagged with.
+article_tag_state records the content hash that was tagged, so an article is
+retagged only when its text changes. Both tag tables cascade from articles,
+so archived or deleted rows drop their tags.
+
+API queries join article_tags on article_id, or filter on (kind, tag) as in
+TAGGED_ARTICLES_SQL.
+"""
+
+from collections import Counter, namedtuple
+from itertools import chain, repeat
+import logging
+import math
+import re
+
+from include.news_etl.db import iter_keyset_chunks
+
+logger = logging.getLogger(__name__)
+
+KEYWORD = 'keyword'
+TOPIC = 'topic'
+
+DEFAULT_CHUNK_SIZE = 1000
+KEYWORDS = 8
+MAX_TOPICS = 3
+TOPIC_THRESHOLD = 0.1
+HEADLINE_WEIGHT = 2
+
+# vocabulary fitting
+FIT_DOCUMENTS = 20000
+MAX_FEATURES = 20000
+MIN_DF = 2
+# terms in more than this share of documents carry no signal
+MAX_DF_RATIO = 0.5
+DEFAULT_VOCABULARY_MAX_AGE_DAYS = 7
+# fitted vocabularies kept for article_tag_state.vocabulary_id to refer to
+VOCABULARY_HISTORY = 3
+
+# tokens are split on every ASCII character but letters, hyphens and apostrophes
+_SEPARATORS = {code: ' ' for code in range(128) if not (chr(code).isalpha() or chr(code) in "'-")}
+# what fitting keeps as a term: three or more letters, inner hyphens and apostrophes allowed
+_TERM = re.compile(r"[a-z][a-z'-]+[a-z]")
+
+STOP_WORDS = frozenset("""
+about above after again against all also although among and another any are around because been before
+being below between both but can cannot could did does doing down during each either even ever every
+few for from further had has have having her here hers herself him himself his how however into its
+itself just last least less like made make many may more most much must near need neither never new
+next nor not now off often once one only other others our ours ourselves out over own per perhaps
+rather said same says she should since some still such than that the their theirs them themselves then
+there these they this those though three through thus too two under until upon use used very via was
+way well were what when where whether which while who whom whose why will with within without would
+year years yet you your yours yourself yourselves it's don't can't won't didn't isn't there's that's
+""".split())
+
+# label -> terms that signal it; a term belongs to one label only
+TOPIC_TERMS = {
+    'climate': ('climate', 'warming', 'emissions', 'carbon', 'greenhouse', 'heatwave', 'heatwaves', 'methane'),
+    'energy': ('energy', 'solar', 'wind', 'renewable', 'renewables', 'coal', 'gas', 'oil', 'nuclear',
+               'electricity', 'fossil', 'turbines'),
+    'wildlife': ('wildlife', 'species', 'biodiversity', 'birds', 'animals', 'extinction', 'habitat',
+                 'conservation', 'endangered'),
+    'oceans': ('ocean', 'oceans', 'sea', 'seas', 'marine', 'coral', 'reef', 'reefs', 'fishing', 'whales'),
+    'pollution': ('pollution', 'sewage', 'toxic', 'chemicals', 'plastic', 'plastics', 'waste',
+                  'contamination', 'pollutants'),
+    'water': ('water', 'river', 'rivers', 'drought', 'flooding', 'floods', 'rainfall', 'lakes'),
+    'farming': ('farming', 'farmers', 'agriculture', 'agricultural', 'crops', 'livestock', 'soil',
+                'pesticides', 'cattle'),
+    'forests': ('forest', 'forests', 'deforestation', 'trees', 'logging', 'rainforest', 'wildfires'),
+    'policy': ('policy', 'government', 'legislation', 'minister', 'ministers', 'targets', 'summit',
+               'treaty', 'regulation', 'cop'),
+}
+
+TAGS_DDL = """
+CREATE TABLE IF NOT EXISTS article_tag_vocabularies (
+    id SERIAL PRIMARY KEY,
+    documents INTEGER NOT NULL,
+    terms TEXT[] NOT NULL,
+    idf REAL[] NOT NULL,
+    "fittedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS article_tags (
+    article_id TEXT NOT NULL REFERENCES articles(id) ON DELETE CASCADE,
+    kind TEXT NOT NULL,
+    tag TEXT NOT NULL,
+    score REAL NOT NULL,
+    PRIMARY KEY (article_id, kind, tag)
+);
+CREATE INDEX IF NOT EXISTS idx_article_tags_tag ON article_tags(kind, tag, score DESC);
+
+CREATE TABLE IF NOT EXISTS article_tag_state (
+    article_id TEXT PRIMARY KEY REFERENCES articles(id) ON DELETE CASCADE,
+    content_hash TEXT,
+    vocabulary_id INTEGER NOT NULL,
+    "taggedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+LATEST_VOCABULARY_SQL = """
+SELECT id, "fittedAt" >= CURRENT_TIMESTAMP - make_interval(days => %s)
+FROM article_tag_vocabularies
+ORDER BY id DESC
+LIMIT 1
+"""
+
+VOCABULARY_SQL = 'SELECT documents, terms, idf FROM article_tag_vocabularies WHERE id = %s'
+
+INSERT_VOCABULARY_SQL = """
+INSERT INTO article_tag_vocabularies (documents, terms, idf) VALUES (%s, %s, %s::real[])
+RETURNING id
+"""
+
+PRUNE_VOCABULARIES_SQL = 'DELETE FROM article_tag_vocabularies WHERE id <= %s'
+
+# the most recent articles, the index on publishDate serves the sort
+FIT_SQL = 'SELECT headline, body FROM articles ORDER BY "publishDate" DESC LIMIT %s'
+
+# one page of rows never tagged or whose text changed since
+PENDING_SQL = """
+SELECT a.id, a.headline, a.body, a.content_hash
+FROM articles a
+LEFT JOIN article_tag_state s ON s.article_id = a.id
+WHERE a.id > %s AND (s.article_id IS NULL OR s.content_hash IS DISTINCT FROM a.content_hash)
+ORDER BY a.id
+LIMIT %s
+"""
+
+CLEAR_TAGS_SQL = 'DELETE FROM article_tags WHERE article_id = ANY(%s)'
+
+# rows deleted (e.g. archived) since the chunk was read are skipped
+INSERT_TAGS_SQL = """
+INSERT INTO article_tags (article_id, kind, tag, score)
+SELECT v.article_id, v.kind, v.tag, v.score
+FROM (VALUES %s) AS v(article_id, kind, tag, score)
+WHERE EXISTS (SELECT 1 FROM articles a WHERE a.id = v.article_id)
+"""
+
+UPSERT_STATE_SQL = """
+INSERT INTO article_tag_state (article_id, content_hash, vocabulary_id)
+SELECT v.article_id, v.content_hash, v.vocabulary_id
+FROM (VALUES %s) AS v(article_id, content_hash, vocabulary_id)
+WHERE EXISTS (SELECT 1 FROM articles a WHERE a.id = v.article_id)
+ON CONFLICT (article_id)
+DO UPDATE SET
+    content_hash = EXCLUDED.content_hash,
+    vocabulary_id = EXCLUDED.vocabulary_id,
+    "taggedAt" = CURRENT_TIMESTAMP
+"""
+
+TAGGED_ARTICLES_SQL = """
+SELECT a.id, a.headline, a."publishDate", t.score
+FROM article_tags t
+JOIN articles a ON a.id = t.article_id
+WHERE t.kind = %(kind)s AND t.tag = %(tag)s
+ORDER BY t.score DESC, a."publishDate" DESC
+LIMIT %(limit)s
+"""
+
+# row-compressed sparse matrix: row i is data[indptr[i]:indptr[i + 1]] at columns indices[...]
+SparseRows = namedtuple('SparseRows', ['indptr', 'indices', 'data', 'shape'])
+
+# the vocabulary this process last loaded or fitted
+_cached_vocabulary = None
+
+
+def document_text(headline, body):
+    """The text an article is scored on, headline repeated to weigh it up"""
+    return ' '.join(chain(repeat(headline or '', HEADLINE_WEIGHT), [body or '']))
+
+
+def tokenize(text):
+    # translate and split run in C, about twice as fast as a findall; stray tokens never match a term
+    return text.lower().translate(_SEPARATORS).split()
+
+
+class Vocabulary:
+    """Fitted terms, their inverse document frequencies and the topic of each term"""
+
+    def __init__(self, terms, idf, documents, vocabulary_id=None):
+        import numpy as np
+
+        self.id = vocabulary_id
+        self.terms = list(terms)
+        self.idf = np.asarray(idf, dtype=np.float64)
+        self.documents = documents
+        self.index = {term: i for i, term in enumerate(self.terms)}
+        self.topics = sorted(TOPIC_TERMS)
+        # -1 for terms outside every topic
+        self.topic_of_term = np.full(len(self.terms), -1, dtype=np.int64)
+        for topic_index, topic in enumerate(self.topics):
+            for term in TOPIC_TERMS[topic]:
+                if term in self.index:
+                    self.topic_of_term[self.index[term]] = topic_index
+
+    def __len__(self):
+        return len(self.terms)
+
+
+def fit_vocabulary(texts, max_features=MAX_FEATURES, min_df=MIN_DF, max_df_ratio=MAX_DF_RATIO):
+    """Fit terms and smoothed idf, ln((1 + n) / (1 + df)) + 1, on an iterable of document texts"""
+    document_frequency = Counter()
+    documents = 0
+    for text in texts:
+        document_frequency.update(set(tokenize(text)))
+        documents += 1
+
+    max_df = max(min_df, max_df_ratio * documents)
+    candidates = [
+        (term, df) for term, df in document_frequency.items()
+        if min_df <= df <= max_df and term not in STOP_WORDS and _TERM.fullmatch(term)
+    ]
+    # most frequent first, ties by term so refits of the same corpus agree
+    candidates.sort(key=lambda item: (-item[1], item[0]))
+    kept = sorted(candidates[:max_features])
+    idf = [math.log((1 + documents) / (1 + df)) + 1 for _, df in kept]
+    return Vocabulary([term for term, _ in kept], idf, documents)
+
+
+def tfidf_matrix(vocabulary, texts):
+    """Sparse rows of sublinear, L2-normalized tf-idf weights, one per text"""
+    import numpy as np
+
+    tokens = [tokenize(text) for text in texts]
+    count = len(tokens)
+    lengths = np.fromiter(map(len, tokens), dtype=np.int64, count=count)
+    flat = list(chain.from_iterable(tokens))
+    term_ids = np.fromiter(map(vocabulary.index.get, flat, repeat(-1)), dtype=np.int64, count=len(flat))
+    rows = np.repeat(np.arange(count, dtype=np.int64), lengths)
+
+    known = term_ids >= 0
+    width = max(len(vocabulary), 1)
+    # one key per (row, term): unique sorts by row then term and counts occurrences
+    keys, counts = np.unique(rows[known] * width + term_ids[known], return_counts=True)
+    rows, indices = np.divmod(keys, width)
+    data = (1 + np.log(counts)) * vocabulary.idf[indices]
+    norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=count))
+    data /= norms[rows]
+
+    indptr = np.zeros(count + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=count), out=indptr[1:])
+    return SparseRows(indptr, indices, data, (count, len(vocabulary)))
+
+
+def _row_ids(matrix):
+    import numpy as np
+
+    return np.repeat(np.arange(matrix.shape[0], dtype=np.int64), np.diff(matrix.indptr))
+
+
+def top_keywords(vocabulary, matrix, keywords=KEYWORDS):
+    """(row, term, weight) of the `keywords` heaviest terms in each row"""
+    import numpy as np
+
+    rows = _row_ids(matrix)
+    # by row, then weight descending, then term
+    order = np.lexsort((matrix.indices, -matrix.data, rows))
+    rank = np.arange(len(order)) - matrix.indptr[rows]
+    keep = order[rank < keywords]
+    return [
+        (row, vocabulary.terms[term], weight)
+        for row, term, weight in zip(rows[keep].tolist(), matrix.indices[keep].tolist(), matrix.data[keep].tolist())
+    ]
+
+
+def topic_labels(vocabulary, matrix, threshold=TOPIC_THRESHOLD, max_topics=MAX_TOPICS):
+    """(row, topic, score) for topics holding at least `threshold` of a row's squared weight"""
+    import numpy as np
+
+    count = matrix.shape[0]
+    width = len(vocabulary.topics)
+    topics = vocabulary.topic_of_term[matrix.indices]
+    on_topic = topics >= 0
+    scores = np.bincount(
+        _row_ids(matrix)[on_topic] * width + topics[on_topic],
+        weights=matrix.data[on_topic] ** 2,
+        minlength=count * width,
+    ).reshape(count, width)
+
+    best = np.argsort(-scores, axis=1, kind='stable')[:, :max_topics]
+    best_scores = np.take_along_axis(scores, best, axis=1)
+    rows, columns = np.nonzero(best_scores >= threshold)
+    return [
+        (row, vocabulary.topics[topic], score)
+        for row, topic, score in zip(rows.tolist(), best[rows, columns].tolist(), best_scores[rows, columns].tolist())
+    ]
+
+
+def tag_texts(vocabulary, texts, keywords=KEYWORDS):
+    """(row, kind, tag, score) for every keyword and topic of the given texts"""
+    matrix = tfidf_matrix(vocabulary, texts)
+    return (
+        [(row, KEYWORD, tag, score) for row, tag, score in top_keywords(vocabulary, matrix, keywords)]
+        + [(row, TOPIC, tag, score) for row, tag, score in topic_labels(vocabulary, matrix)]
+    )
+
+
+def _fit_texts(conn, documents):
+    # streamed from a server-side cursor, the corpus is never held in memory
+    with conn.cursor(name='article_tag_vocabulary_fit') as cursor:
+        cursor.itersize = DEFAULT_CHUNK_SIZE
+        cursor.execute(FIT_SQL, (documents,))
+        for headline, body in cursor:
+            yield document_text(headline, body)
+
+
+def current_vocabulary(conn, max_age_days=DEFAULT_VOCABULARY_MAX_AGE_DAYS, fit_documents=FIT_DOCUMENTS,
+                       max_features=MAX_FEATURES):
+    """The stored vocabulary, refitted first when missing or older than `max_age_days`.
+
+    Returns (vocabulary, fitted), vocabulary is None while there are no articles.
+    """
+    global _cached_vocabulary
+
+    with conn.cursor() as cursor:
+        cursor.execute(LATEST_VOCABULARY_SQL, (max_age_days,))
+        latest = cursor.fetchone()
+    conn.commit()
+
+    if latest and latest[1]:
+        if _cached_vocabulary is None or _cached_vocabulary.id != latest[0]:
+            with conn.cursor() as cursor:
+                cursor.execute(VOCABULARY_SQL, (latest[0],))
+                documents, terms, idf = cursor.fetchone()
+            conn.commit()
+            _cached_vocabulary = Vocabulary(terms, idf, documents, latest[0])
+        return _cached_vocabulary, False
+
+    vocabulary = fit_vocabulary(_fit_texts(conn, fit_documents), max_features=max_features)
+    conn.commit()
+    if not vocabulary.documents:
+        return None, False
+
+    with conn.cursor() as cursor:
+        cursor.execute(INSERT_VOCABULARY_SQL, (vocabulary.documents, vocabulary.terms, vocabulary.idf.tolist()))
+        vocabulary.id = cursor.fetchone()[0]
+        cursor.execute(PRUNE_VOCABULARIES_SQL, (vocabulary.id - VOCABULARY_HISTORY,))
+    conn.commit()
+    logger.info(f"Fitted tag vocabulary {vocabulary.id}: {len(vocabulary)} terms from {vocabulary.documents} articles")
+    _cached_vocabulary = vocabulary
+    return vocabulary, True
+
+
+def tag_pending(conn, keywords=KEYWORDS, chunk_size=DEFAULT_CHUNK_SIZE, max_rows=None,
+                max_age_days=DEFAULT_VOCABULARY_MAX_AGE_DAYS, fit_documents=FIT_DOCUMENTS,
+                max_features=MAX_FEATURES):
+    """Write keyword and topic tags for every article not tagged at its current text.
+
+    Returns {"tagged", "tags", "chunks", "vocabulary", "fitted"}.
+    """
+    from psycopg2.extras import execute_values
+
+    vocabulary, fitted = current_vocabulary(conn, max_age_days, fit_documents, max_features)
+    stats = {'tagged': 0, 'tags': 0, 'chunks': 0, 'vocabulary': None, 'fitted': fitted}
+    if vocabulary is None:
+        return stats
+    stats['vocabulary'] = vocabulary.id
+
+    for rows in iter_keyset_chunks(conn, PENDING_SQL, chunk_size, max_rows):
+        ids = [row[0] for row in rows]
+        tags = tag_texts(vocabulary, [document_text(headline, body) for _, headline, body, _ in rows], keywords)
+        with conn.cursor() as cursor:
+            cursor.execute(CLEAR_TAGS_SQL, (ids,))
+            if tags:
+                execute_values(
+                    cursor, INSERT_TAGS_SQL,
+                    [(ids[row], kind, tag, score) for row, kind, tag, score in tags], page_size=len(tags)
+                )
+            execute_values(
+                cursor, UPSERT_STATE_SQL,
+                [(row_id, digest, vocabulary.id) for row_id, _, _, digest in rows], page_size=len(rows)
+            )
+        conn.commit()
+
+        stats['chunks'] += 1
+        stats['tagged'] += len(rows)
+        stats['tags'] += len(tags)
+    return stats
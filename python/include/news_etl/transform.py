@@ -0,0 +1,188 @@
+"""Streaming and columnar transforms from Guardian search results to article rows"""
+
+from datetime import datetime, timezone
+import logging
+
+from include.news_etl.guardian import GUARDIAN_SOURCE
+from include.news_etl.loading import chunked
+from include.news_etl.metrics import LogSampler
+
+logger = logging.getLogger(__name__)
+
+# unparsable dates come in bursts from one bad feed, a sample of them is enough
+_date_warnings = LogSampler(logger)
+
+HEADLINE_MAX_LENGTH = 1000
+URL_MAX_LENGTH = 2000
+SECTION_MAX_LENGTH = 100
+
+DEFAULT_HEADLINE = 'No headline available'
+DEFAULT_BODY = 'No content available'
+DEFAULT_SECTION = 'environment'
+
+# at or above this many rows the auto transform mode switches to the columnar path.
+# Loading pyarrow costs ~230 MB of RSS whatever the batch size, and the columnar path
+# only pulls clearly ahead of the row path somewhere past 250k rows
+# (benchmarks/bench_transform.py: 1.4x at 250k, 2x at 1M)
+COLUMNAR_THRESHOLD = 500000
+
+# rows per vectorized pass, bounds memory of the columnar path
+COLUMNAR_CHUNK_SIZE = 20000
+
+TRANSFORM_MODES = ('auto', 'rows', 'columnar')
+
+# a source's daily window is a few thousand rows, far below the threshold
+DEFAULT_TRANSFORM_MODE = 'rows'
+
+# every character str.isspace() accepts, spelled out for Arrow's RE2 engine
+_WHITESPACE_CHARS = (
+    r'\t\n\x0b\x0c\r\x1c-\x1f \x85\xa0\x{1680}\x{2000}-\x{200a}'
+    r'\x{2028}\x{2029}\x{202f}\x{205f}\x{3000}'
+)
+
+# runs of 2+ whitespace, or any single whitespace that is not already a plain
+# space; rewriting lone spaces to themselves is what makes a naive \s+ slow
+_WHITESPACE_RUN = f"[{_WHITESPACE_CHARS}]{{2,}}|[{_WHITESPACE_CHARS.replace(' ', '')}]"
+
+# what the columnar path asks strptime for, anything else goes through Python
+_GUARDIAN_DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+
+
+def normalize_whitespace(text):
+    """Collapse whitespace runs to single spaces and trim the ends"""
+    return ' '.join(text.split())
+
+
+def parse_publication_date(value):
+    """Parse an ISO timestamp like "2025-01-15T10:30:00Z" to a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        _date_warnings(f"Could not parse date: {value}")
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    # remove timezone info for PostgreSQL
+    return parsed.replace(tzinfo=None)
+
+
+def transform_article(article, extraction_date, source=GUARDIAN_SOURCE):
+    """Map one search result to an articles row"""
+    fields = article.get('fields', {})
+    return {
+        'publishDate': parse_publication_date(article.get('webPublicationDate', '')),
+        'extractedDate': extraction_date,
+        'url': article.get('webUrl', '')[:URL_MAX_LENGTH],
+        'headline': normalize_whitespace(fields.get('headline', DEFAULT_HEADLINE))[:HEADLINE_MAX_LENGTH],
+        'body': normalize_whitespace(fields.get('bodyText', DEFAULT_BODY)),
+        'section': article.get('sectionName', DEFAULT_SECTION)[:SECTION_MAX_LENGTH],
+        'source': source,
+        'imageUrl': (fields.get('thumbnail') or '')[:URL_MAX_LENGTH] or None,
+    }
+
+
+def iter_transform(results, extraction_date, source=GUARDIAN_SOURCE):
+    """Lazily transform search results one row at a time"""
+    for article in results:
+        yield transform_article(article, extraction_date, source)
+
+
+def _normalize_column(column, max_length=None):
+    import pyarrow.compute as pc
+
+    column = pc.utf8_trim(pc.replace_substring_regex(column, _WHITESPACE_RUN, ' '), ' ')
+    if max_length is not None:
+        column = pc.utf8_slice_codeunits(column, 0, max_length)
+    return column
+
+
+def _parse_date_column(values):
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    parsed = pc.strptime(pa.array(values, pa.string()), format=_GUARDIAN_DATE_FORMAT,
+                         unit='s', error_is_null=True).to_pylist()
+    # offsets and fractional seconds are rare, let the row parser handle them
+    for i, value in enumerate(values):
+        if parsed[i] is None and value:
+            parsed[i] = parse_publication_date(value)
+    return parsed
+
+
+def transform_table(results, extraction_date, source=GUARDIAN_SOURCE):
+    """Transform a batch of search results with vectorized Arrow string kernels.
+
+    Produces the same rows as transform_article.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    results = list(results)
+    if not results:
+        return []
+
+    dates, urls, headlines, bodies, sections, images = [], [], [], [], [], []
+    for article in results:
+        fields = article.get('fields', {})
+        dates.append(article.get('webPublicationDate', ''))
+        urls.append(article.get('webUrl', ''))
+        headlines.append(fields.get('headline', DEFAULT_HEADLINE))
+        bodies.append(fields.get('bodyText', DEFAULT_BODY))
+        sections.append(article.get('sectionName', DEFAULT_SECTION))
+        images.append(fields.get('thumbnail') or None)
+
+    columns = zip(
+        _parse_date_column(dates),
+        pc.utf8_slice_codeunits(pa.array(urls, pa.string()), 0, URL_MAX_LENGTH).to_pylist(),
+        _normalize_column(pa.array(headlines, pa.string()), HEADLINE_MAX_LENGTH).to_pylist(),
+        _normalize_column(pa.array(bodies, pa.string())).to_pylist(),
+        pc.utf8_slice_codeunits(pa.array(sections, pa.string()), 0, SECTION_MAX_LENGTH).to_pylist(),
+        pc.utf8_slice_codeunits(pa.array(images, pa.string()), 0, URL_MAX_LENGTH).to_pylist(),
+    )
+    return [
+        {
+            'publishDate': published,
+            'extractedDate': extraction_date,
+            'url': url,
+            'headline': headline,
+            'body': body,
+            'section': section,
+            'source': source,
+            'imageUrl': image,
+        }
+        for published, url, headline, body, section, image in columns
+    ]
+
+
+def iter_transform_columnar(results, extraction_date, source=GUARDIAN_SOURCE,
+                            chunk_size=COLUMNAR_CHUNK_SIZE):
+    """Lazily transform search results in vectorized chunks"""
+    for chunk in chunked(results, chunk_size):
+        yield from transform_table(chunk, extraction_date, source)
+
+
+def choose_transform_mode(row_count, mode='auto', threshold=COLUMNAR_THRESHOLD):
+    """Resolve 'auto' to 'columnar' or 'rows' based on the number of rows"""
+    if mode not in TRANSFORM_MODES:
+        raise ValueError(f"Unknown transform mode {mode!r}, expected one of {TRANSFORM_MODES}")
+    if mode == 'auto':
+        return 'columnar' if row_count >= threshold else 'rows'
+    return mode
+
+
+class TransformStats:
+    """Running count and latest publish date of rows flowing through a stream"""
+
+    def __init__(self):
+        self.count = 0
+        self.max_publish_date = None
+
+    def track(self, rows):
+        for row in rows:
+            self.count += 1
+            published = row['publishDate']
+            if published is not None and (self.max_publish_date is None or published > self.max_publish_date):
+                self.max_publish_date = published
+            yield row
@@ -0,0 +1,59 @@
+"""Date windows for scheduled runs and backfills"""
+
+from datetime import date, datetime, timedelta, timezone
+
+CHUNK_DAYS = {
+    'day': 1,
+    'week': 7,
+}
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def make_window(from_date, to_date):
+    """Build an inclusive from/to date window as plain strings (XCom-friendly)"""
+    return {'from_date': _as_date(from_date).isoformat(), 'to_date': _as_date(to_date).isoformat()}
+
+
+def interval_to_window(data_interval_start, data_interval_end, today=None):
+    """Convert a half-open data interval [start, end) into inclusive query dates.
+
+    Manually triggered Airflow 3 runs can have no data interval; those fetch
+    yesterday and today (UTC). A zero-width interval, as trigger timetables
+    give, stands for the day ending at that instant.
+    """
+    if data_interval_start is None or data_interval_end is None:
+        today = today or datetime.now(timezone.utc).date()
+        return make_window(today - timedelta(days=1), today)
+    if data_interval_end <= data_interval_start:
+        data_interval_start = data_interval_end - timedelta(days=1)
+    start = _as_date(data_interval_start)
+    last_instant = data_interval_end - timedelta(microseconds=1)
+    end = max(start, _as_date(last_instant))
+    return make_window(start, end)
+
+
+def split_date_range(start_date, end_date, chunk='day'):
+    """Split an inclusive date range into consecutive day or week windows"""
+    if chunk not in CHUNK_DAYS:
+        raise ValueError(f"Unknown chunk size {chunk!r}, expected one of {tuple(CHUNK_DAYS)}")
+
+    start = _as_date(start_date)
+    end = _as_date(end_date)
+    if end < start:
+        raise ValueError(f"End date {end} is before start date {start}")
+
+    step = timedelta(days=CHUNK_DAYS[chunk])
+    windows = []
+    current = start
+    while current <= end:
+        chunk_end = min(current + step - timedelta(days=1), end)
+        windows.append(make_window(current, chunk_end))
+        current = chunk_end + timedelta(days=1)
+    return windows
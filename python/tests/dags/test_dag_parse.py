@@ -0,0 +1,121 @@
+"""Parse-time budget for the DAG files.
+
+The scheduler's DAG processor re-parses every file each min_file_process_interval,
+so a DAG file must only build DAG objects: provider hooks, DB drivers and data
+libraries are imported inside the tasks, and nothing connects anywhere at parse.
+Each file is parsed in a fresh interpreter, after a warm-up parse of a trivial
+DAG so Airflow's own imports are not charged to it. Parse time is the duration
+DagBag records for the file, the same number the DAG processor reports.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import pytest
+
+pytest.importorskip("airflow")
+
+PROJECT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+DAGS_DIR = os.path.join(PROJECT_DIR, 'dags')
+
+# generous for a loaded CI runner; the pipeline DAGs parse in well under 200ms locally
+PARSE_BUDGET_MS = float(os.environ.get('DAG_PARSE_BUDGET_MS', 500))
+
+# modules that belong in task execution only
+FORBIDDEN_MODULES = (
+    'airflow.providers.http.hooks',
+    'airflow.providers.postgres.hooks',
+    'airflow.providers.common.sql.hooks',
+    'aiohttp',
+    'numpy',
+    'pandas',
+    'psycopg',
+    'psycopg2',
+    'pyarrow',
+    'requests',
+    'zstandard',
+)
+
+WARMUP_DAG = textwrap.dedent("""
+    from airflow import DAG
+    from airflow.decorators import task
+
+    with DAG(dag_id='parse_warmup', schedule=None):
+        @task
+        def noop():
+            pass
+
+        noop()
+""")
+
+PARSE_SCRIPT = textwrap.dedent("""
+    import json
+    import socket
+    import sys
+
+    sys.path.insert(0, sys.argv[1])
+    from airflow.hooks.base import BaseHook
+    from airflow.models import DagBag, Variable
+
+    DagBag(sys.argv[2], include_examples=False)
+
+    io_calls = []
+
+    def record(name, original):
+        def wrapper(*args, **kwargs):
+            io_calls.append(name)
+            return original(*args, **kwargs)
+        return wrapper
+
+    socket.socket.connect = record('socket.connect', socket.socket.connect)
+    Variable.get = record('Variable.get', Variable.get)
+    BaseHook.get_connection = record('BaseHook.get_connection', BaseHook.get_connection)
+
+    before = set(sys.modules)
+    bag = DagBag(sys.argv[3], include_examples=False)
+    print(json.dumps({
+        'duration_ms': sum(stat.duration.total_seconds() for stat in bag.dagbag_stats) * 1000,
+        'dags': len(bag.dags),
+        'import_errors': bag.import_errors,
+        'modules': sorted(set(sys.modules) - before),
+        'io_calls': io_calls,
+    }))
+""")
+
+
+def dag_files():
+    return sorted(name for name in os.listdir(DAGS_DIR) if name.endswith('.py') and not name.startswith('_'))
+
+
+@pytest.fixture(scope='module')
+def warmup_dag(tmp_path_factory):
+    path = tmp_path_factory.mktemp('warmup') / 'warmup_dag.py'
+    path.write_text(WARMUP_DAG)
+    return str(path)
+
+
+def parse_in_fresh_interpreter(dag_file, warmup_dag):
+    completed = subprocess.run(
+        [sys.executable, '-c', PARSE_SCRIPT, PROJECT_DIR, warmup_dag, os.path.join(DAGS_DIR, dag_file)],
+        cwd=PROJECT_DIR, capture_output=True, text=True, timeout=300,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.parametrize('dag_file', dag_files())
+def test_dag_parse_budget(dag_file, warmup_dag):
+    result = parse_in_fresh_interpreter(dag_file, warmup_dag)
+
+    assert not result['import_errors'], result['import_errors']
+    assert result['dags'], f"{dag_file} defines no DAGs"
+
+    forbidden = [name for name in result['modules'] if name.startswith(FORBIDDEN_MODULES)]
+    assert not forbidden, f"{dag_file} imports {forbidden} at parse time"
+    assert not result['io_calls'], f"{dag_file} does I/O at parse time: {result['io_calls']}"
+    assert result['duration_ms'] <= PARSE_BUDGET_MS, (
+        f"{dag_file} took {result['duration_ms']:.0f}ms to parse, budget is {PARSE_BUDGET_MS:.0f}ms"
+    )
@@ -0,0 +1,68 @@
+"""Shared fixtures for the include/news_etl tests.
+
+Database tests run against the Postgres named by ETL_TEST_POSTGRES_DSN and are
+skipped when it is unset. Each test gets a throwaway schema with a copy of the
+articles table from the server's Prisma migration plus the pipeline-owned
+additions. `make_article` builds loader-shaped article dicts.
+"""
+
+from datetime import datetime
+import os
+import uuid
+
+import pytest
+
+from include.news_etl.db import ConnectionHook
+from include.news_etl.migrations import migrate
+from include.news_etl.stubs import ARTICLES_DDL
+
+
+@pytest.fixture
+def pg_conn():
+    dsn = os.environ.get("ETL_TEST_POSTGRES_DSN")
+    if not dsn:
+        pytest.skip("ETL_TEST_POSTGRES_DSN not set")
+    psycopg2 = pytest.importorskip("psycopg2")
+
+    schema = f"etl_test_{uuid.uuid4().hex[:8]}"
+    conn = psycopg2.connect(dsn)
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+        cursor.execute(f"SET search_path TO {schema}")
+        cursor.execute(ARTICLES_DDL)
+    conn.commit()
+    # what verify_table adds on top of the Prisma schema
+    migrate(conn)
+    try:
+        yield conn
+    finally:
+        conn.rollback()
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        conn.commit()
+        conn.close()
+
+
+@pytest.fixture
+def pg_hook(pg_conn):
+    return ConnectionHook(pg_conn)
+
+
+def article(i, **overrides):
+    """A transformed article as the loaders take it, numbered `i`; keyword arguments replace fields"""
+    row = {
+        'publishDate': datetime(2025, 1, 1, 12, 0),
+        'extractedDate': datetime(2025, 1, 2, 8, 0),
+        'url': f'https://example.com/article-{i}',
+        'headline': f'Headline {i}',
+        'body': f'Body {i}',
+        'section': 'Environment',
+        'source': 'guardian_api',
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def make_article():
+    return article
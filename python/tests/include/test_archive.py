@@ -0,0 +1,78 @@
+"""Tests for the monthly article archive"""
+
+from datetime import date, datetime
+
+import pytest
+
+from include.news_etl.archive import add_months, archive_articles, partition_name
+from include.news_etl.daily_stats import get_daily_stats, refresh_daily_stats
+from include.news_etl.loading import copy_load_articles, load_articles
+
+TODAY = date(2025, 7, 15)
+
+
+def counts(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'SELECT (SELECT COUNT(*) FROM articles), (SELECT COUNT(*) FROM articles_archive), '
+            '(SELECT COUNT(*) FROM article_archive_urls)'
+        )
+        result = cursor.fetchone()
+    conn.commit()
+    return result
+
+
+def test_month_helpers():
+    assert add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+    assert add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+    assert partition_name(date(2024, 3, 1)) == 'articles_archive_2024_03'
+
+
+def test_archive_moves_expired_months_and_precreates_partitions(pg_conn, make_article):
+    load_articles(pg_conn, [
+        make_article(0, publishDate=datetime(2023, 1, 10)),
+        make_article(1, publishDate=datetime(2023, 2, 28, 23, 59)),
+        make_article(2, publishDate=datetime(2023, 3, 1)),
+        make_article(3, publishDate=datetime(2025, 6, 1)),
+    ])
+    refresh_daily_stats(pg_conn, days=None)
+
+    stats = archive_articles(pg_conn, retention_months=28, precreate_months=2, batch_size=1, today=TODAY)
+    assert stats['cutoff'] == '2023-03-01'
+    assert stats['months'] == ['2023-01', '2023-02']
+    assert stats['archived'] == 2
+    assert stats['created'] == [
+        'articles_archive_2023_01', 'articles_archive_2023_02', 'articles_archive_2023_03', 'articles_archive_2023_04'
+    ]
+    assert counts(pg_conn) == (2, 2, 2)
+
+    # nothing left to move, partitions already exist
+    assert archive_articles(pg_conn, retention_months=28, precreate_months=2, today=TODAY)['created'] == []
+    with pg_conn.cursor() as cursor:
+        cursor.execute('SELECT url FROM articles_archive_2023_02')
+        assert cursor.fetchall() == [('https://example.com/article-1',)]
+    pg_conn.commit()
+
+    # archived days keep their rollup groups through a full rebuild
+    assert refresh_daily_stats(pg_conn, days=None)['removed'] == 0
+    assert len(get_daily_stats(pg_conn, date(2023, 1, 1), date(2023, 12, 31))) == 3
+
+
+@pytest.mark.parametrize('load', [load_articles, copy_load_articles])
+def test_load_restores_archived_urls_before_upsert(pg_conn, load, make_article):
+    load_articles(pg_conn, [make_article(0, publishDate=datetime(2023, 1, 10)), make_article(1, publishDate=datetime(2023, 1, 11))])
+    archive_articles(pg_conn, retention_months=12, today=TODAY)
+    assert counts(pg_conn) == (0, 2, 2)
+
+    summary = load(pg_conn, [make_article(0, publishDate=datetime(2023, 1, 10)),
+                             make_article(1, publishDate=datetime(2023, 1, 11), body='Corrected body')])
+    assert (summary['inserted'], summary['updated'], summary['unchanged']) == (0, 1, 1)
+    assert counts(pg_conn) == (2, 0, 0)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT body, search_vector IS NOT NULL FROM articles ORDER BY url")
+        assert cursor.fetchall() == [('Body 0', True), ('Corrected body', True)]
+    pg_conn.commit()
+
+    # still past retention, so the next maintenance run archives them again
+    assert archive_articles(pg_conn, retention_months=12, today=TODAY)['archived'] == 2
@@ -0,0 +1,120 @@
+"""Tests for object-store artifacts passed between tasks by manifest"""
+
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+import os
+
+import pytest
+
+pytest.importorskip("airflow.sdk")
+
+from include.news_etl.artifacts import (
+    ARTIFACT_ROOT_ENV,
+    artifact_prefix,
+    artifact_root,
+    delete_run_artifacts,
+    prune_artifacts,
+    read_all_records,
+    read_records,
+    run_prefix,
+    write_records,
+)
+
+
+@pytest.fixture
+def prefix(tmp_path):
+    return f"file://{tmp_path}/artifacts"
+
+
+@pytest.mark.parametrize("codec", ["zstd", "gzip"])
+def test_round_trip_across_parts(prefix, codec):
+    if codec == "zstd":
+        pytest.importorskip("zstandard")
+    records = [{'url': f'u{i}', 'publishDate': datetime(2025, 1, 1, 0, i % 60), 'body': 'x\n' * i} for i in range(25)]
+
+    manifest = write_records(iter(records), prefix, codec=codec, rows_per_part=10, total=25)
+
+    assert manifest['count'] == 25
+    assert manifest['total'] == 25
+    assert [p['count'] for p in manifest['parts']] == [10, 10, 5]
+    assert manifest['bytes'] > 0
+
+    stream = read_records(manifest)
+    assert len(stream) == 25
+    loaded = list(stream)
+    assert loaded[3] == {'url': 'u3', 'publishDate': '2025-01-01T00:03:00', 'body': 'x\n' * 3}
+    # re-iterable: every pass re-reads from storage
+    assert list(stream) == loaded
+
+
+def test_empty_manifest(prefix):
+    manifest = write_records([], prefix)
+    assert manifest['parts'] == [] and manifest['count'] == 0
+    assert list(read_records(manifest)) == []
+
+
+def test_read_all_records_chains_manifests(prefix):
+    first = write_records([{'i': i} for i in range(3)], prefix + '/a', rows_per_part=2)
+    second = write_records([{'i': i} for i in range(3, 5)], prefix + '/b')
+
+    stream = read_all_records([first, write_records([], prefix + '/c'), second])
+    assert len(stream) == 5
+    assert [r['i'] for r in stream] == [0, 1, 2, 3, 4]
+    with pytest.raises(ValueError):
+        read_all_records([first, {}])
+
+
+def test_read_records_rejects_bad_manifest():
+    with pytest.raises(ValueError):
+        read_records({'response': {}})
+
+
+def test_artifact_prefix_includes_map_index():
+    ti = SimpleNamespace(dag_id='d', run_id='manual__2025-01-01T00:00:00+00:00', task_id='t', map_index=3)
+    assert artifact_prefix(ti, root='s3://bucket/etl/') == 's3://bucket/etl/d/manual__2025-01-01T00_00_00_00_00/t-3'
+
+
+@pytest.mark.parametrize("executor", ["CeleryExecutor", "LocalExecutor,KubernetesExecutor"])
+def test_artifact_root_refuses_local_root_on_distributed_executor(monkeypatch, executor):
+    monkeypatch.setenv("AIRFLOW__CORE__EXECUTOR", executor)
+    monkeypatch.delenv(ARTIFACT_ROOT_ENV, raising=False)
+    with pytest.raises(ValueError, match=ARTIFACT_ROOT_ENV):
+        artifact_root()
+
+    monkeypatch.setenv(ARTIFACT_ROOT_ENV, "s3://aws_default@bucket/etl/")
+    assert artifact_root() == "s3://aws_default@bucket/etl"
+
+
+def test_artifact_root_allows_local_root_on_local_executor(monkeypatch, tmp_path):
+    monkeypatch.setenv("AIRFLOW__CORE__EXECUTOR", "LocalExecutor")
+    monkeypatch.setenv(ARTIFACT_ROOT_ENV, f"file://{tmp_path}")
+    assert artifact_root() == f"file://{tmp_path}"
+
+
+def test_delete_run_artifacts_only_removes_that_run(prefix):
+    kept = write_records([{'url': 'a'}], f"{run_prefix('d', 'run_1', prefix)}/t")
+    write_records([{'url': 'b'}], f"{run_prefix('d', 'run_2', prefix)}/t")
+
+    assert delete_run_artifacts('d', 'run_2', prefix)
+    assert not delete_run_artifacts('d', 'run_2', prefix)
+    assert [r['url'] for r in read_records(kept)] == ['a']
+
+
+def test_prune_artifacts_drops_runs_older_than_retention(prefix, tmp_path):
+    now = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    write_records([{'url': 'old'}], f"{run_prefix('d', 'old_run', prefix)}/t")
+    write_records([{'url': 'new'}], f"{run_prefix('d', 'new_run', prefix)}/t")
+    old_time = (now - timedelta(days=10)).timestamp()
+    new_time = (now - timedelta(days=1)).timestamp()
+    for path in (tmp_path / "artifacts" / "d").rglob("*"):
+        stamp = old_time if "old_run" in str(path) else new_time
+        os.utime(path, (stamp, stamp))
+
+    pruned = prune_artifacts(timedelta(days=7), root=prefix, now=now)
+
+    assert [p.rsplit('/', 1)[-1] for p in pruned] == ['old_run']
+    assert sorted(p.name for p in (tmp_path / "artifacts" / "d").iterdir()) == ['new_run']
+
+
+def test_prune_artifacts_without_root_is_a_no_op(prefix):
+    assert prune_artifacts(timedelta(days=1), root=prefix) == []
@@ -0,0 +1,66 @@
+"""Tests for the section x source x day article rollup"""
+
+from datetime import date, datetime
+
+from include.news_etl.daily_stats import get_daily_stats, refresh_daily_stats, update_run_stats
+from include.news_etl.loading import load_articles
+
+
+def test_run_update_recomputes_only_touched_groups(pg_conn, make_article):
+    load_articles(pg_conn, [
+        make_article(0, publishDate=datetime(2025, 1, 1, 8, 0), body='x' * 100),
+        make_article(1, publishDate=datetime(2025, 1, 1, 8, 1), body='x' * 300),
+        make_article(2, publishDate=datetime(2025, 1, 2, 8, 2), body='x' * 100),
+    ], run_id='r1')
+    assert update_run_stats(pg_conn, 'r1') == 2
+    assert get_daily_stats(pg_conn, date(2025, 1, 1), date(2025, 1, 31)) == [
+        (date(2025, 1, 2), 'Environment', 'guardian_api', 1, 100, datetime(2025, 1, 2, 8, 2)),
+        (date(2025, 1, 1), 'Environment', 'guardian_api', 2, 200, datetime(2025, 1, 1, 8, 1)),
+    ]
+
+    # the next run adds to day 1 and a new section; day 2 is left alone
+    load_articles(pg_conn, [
+        make_article(3, publishDate=datetime(2025, 1, 1, 8, 3), body='x' * 400),
+        make_article(4, publishDate=datetime(2025, 1, 1, 8, 4), body='x' * 100, section='Climate'),
+    ], run_id='r2')
+    assert update_run_stats(pg_conn, 'r2') == 2
+    assert update_run_stats(pg_conn, 'r2') == 0
+    assert get_daily_stats(pg_conn, date(2025, 1, 1), date(2025, 1, 1)) == [
+        (date(2025, 1, 1), 'Climate', 'guardian_api', 1, 100, datetime(2025, 1, 1, 8, 4)),
+        (date(2025, 1, 1), 'Environment', 'guardian_api', 3, 267, datetime(2025, 1, 1, 8, 3)),
+    ]
+
+
+def test_refresh_rebuilds_empty_rollup_and_prunes_deleted_groups(pg_conn, make_article):
+    load_articles(pg_conn, [make_article(i, publishDate=datetime(2025, 1, 1 + i % 3, 8, i)) for i in range(9)])
+
+    stats = refresh_daily_stats(pg_conn, days=1, today=date(2025, 1, 3))
+    assert stats == {'since': None, 'updated': 3, 'removed': 0}
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("DELETE FROM articles WHERE \"publishDate\" < '2025-01-02'")
+        cursor.execute("UPDATE articles SET section = 'Climate' WHERE url = 'https://example.com/article-2'")
+    pg_conn.commit()
+
+    # day 1 is outside the window, so its deleted group stays until a full rebuild
+    stats = refresh_daily_stats(pg_conn, days=1, today=date(2025, 1, 3))
+    assert stats == {'since': '2025-01-02', 'updated': 2, 'removed': 0}
+    assert [(day.day, section, count) for day, section, _, count, _, _ in
+            get_daily_stats(pg_conn, date(2025, 1, 1), date(2025, 1, 3))] == [
+        (3, 'Climate', 1), (3, 'Environment', 2), (2, 'Environment', 3), (1, 'Environment', 3)
+    ]
+
+    stats = refresh_daily_stats(pg_conn, days=None)
+    assert stats == {'since': None, 'updated': 0, 'removed': 1}
+
+
+def test_groups_are_split_by_source(pg_conn, make_article):
+    load_articles(pg_conn, [
+        make_article(0, publishDate=datetime(2025, 1, 1, 8, 0), body='x' * 100),
+        make_article(1, publishDate=datetime(2025, 1, 1, 9, 0), body='x' * 300, source='nyt_api'),
+    ], run_id='r1')
+    assert update_run_stats(pg_conn, 'r1') == 2
+    assert get_daily_stats(pg_conn, date(2025, 1, 1), date(2025, 1, 1)) == [
+        (date(2025, 1, 1), 'Environment', 'guardian_api', 1, 100, datetime(2025, 1, 1, 8, 0)),
+        (date(2025, 1, 1), 'Environment', 'nyt_api', 1, 300, datetime(2025, 1, 1, 9, 0)),
+    ]
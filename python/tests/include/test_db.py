@@ -0,0 +1,101 @@
+"""Tests for the pooled connection layer and prepared batch upserts"""
+
+import os
+
+import pytest
+
+from include.news_etl.db import (
+    ConnectionPool,
+    iter_keyset_chunks,
+    prepare_sql,
+    prepared_round_trip,
+    prepared_statements_enabled,
+)
+from include.news_etl.loading import PREPARED_RESTORE, PREPARED_UPSERT, load_articles
+from include.news_etl.metrics import StageMetrics, track_connection
+
+
+def test_prepared_statements_switch():
+    assert prepared_statements_enabled('true')
+    assert prepared_statements_enabled(True)
+    assert not prepared_statements_enabled('False')
+    assert not prepared_statements_enabled(' off ')
+
+
+def test_pool_reuses_and_resets_connections():
+    dsn = os.environ.get("ETL_TEST_POSTGRES_DSN")
+    if not dsn:
+        pytest.skip("ETL_TEST_POSTGRES_DSN not set")
+    psycopg2 = pytest.importorskip("psycopg2")
+
+    pool = ConnectionPool(lambda: psycopg2.connect(dsn), max_idle=1)
+    try:
+        with pool.connection() as first:
+            with pool.connection() as second:
+                assert second is not first
+                with second.cursor() as cursor:
+                    # left open on purpose, the pool must roll it back
+                    cursor.execute('CREATE TEMP TABLE leaked (id INT)')
+        # only one idle slot, taken by the connection released first
+        assert first.closed
+
+        stage = StageMetrics('load')
+        with pool.connection() as conn:
+            assert conn is second
+            track_connection(track_connection(conn, StageMetrics('earlier')), stage)
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT to_regclass('pg_temp.leaked')")
+                assert cursor.fetchone() == (None,)
+        # counted once, for the latest borrower only
+        assert stage.db_round_trips == 1
+        assert (pool.created, pool.reused) == (2, 1)
+    finally:
+        pool.close()
+    assert second.closed
+
+
+def test_batches_prepare_once_per_connection(pg_conn, make_article):
+    stage = StageMetrics('load')
+    track_connection(pg_conn, stage)
+    summary = load_articles(pg_conn, [make_article(i) for i in range(25)], batch_size=10)
+    assert (summary['inserted'], stage.db_round_trips) == (25, 3)
+
+    # a second load on the same connection reuses its prepared statements
+    assert prepare_sql(pg_conn, PREPARED_UPSERT, [], 'SELECT 1') == ''
+    summary = load_articles(pg_conn, [make_article(i) for i in range(5)], batch_size=10)
+    assert summary['unchanged'] == 5
+    with pg_conn.cursor() as cursor:
+        cursor.execute('SELECT name FROM pg_prepared_statements ORDER BY name')
+        assert cursor.fetchall() == [(PREPARED_RESTORE,), (PREPARED_UPSERT,)]
+    pg_conn.commit()
+
+
+def test_failed_round_trip_does_not_record_unprepared_statements(pg_conn):
+    def attempt(before, after):
+        statement = prepare_sql(pg_conn, 'probe', ['int'], 'SELECT $1')
+        with pytest.raises(Exception, match='division by zero'):
+            with prepared_round_trip(pg_conn, 'probe'), pg_conn.cursor() as cursor:
+                cursor.execute(before + statement + after)
+        pg_conn.rollback()
+
+    # failed before its PREPARE ran: the next batch must prepare again
+    attempt('SELECT 1/0;', '')
+    assert prepare_sql(pg_conn, 'probe', ['int'], 'SELECT $1').startswith('PREPARE probe')
+
+    # failed after it: the statement outlived the rollback and is not prepared twice
+    attempt('', 'SELECT 1/0;')
+    assert prepare_sql(pg_conn, 'probe', ['int'], 'SELECT $1') == ''
+    with prepared_round_trip(pg_conn, 'probe'), pg_conn.cursor() as cursor:
+        cursor.execute('EXECUTE probe(7)')
+        assert cursor.fetchone() == (7,)
+    pg_conn.commit()
+
+
+def test_iter_keyset_chunks_pages_in_key_order(pg_conn, make_article):
+    load_articles(pg_conn, [make_article(i) for i in range(7)])
+    sql = 'SELECT url FROM articles WHERE url > %s ORDER BY url LIMIT %s'
+
+    chunks = list(iter_keyset_chunks(pg_conn, sql, 3))
+    assert [len(rows) for rows in chunks] == [3, 3, 1]
+    assert [url for rows in chunks for url, in rows] == [f'https://example.com/article-{i}' for i in range(7)]
+    assert [len(rows) for rows in iter_keyset_chunks(pg_conn, sql, 3, max_rows=5)] == [3, 2]
@@ -0,0 +1,109 @@
+"""Tests for dead-lettered articles, their replay and resumable loads"""
+
+from datetime import datetime
+
+import pytest
+
+from include.news_etl.checkpoints import LoadCheckpoint
+from include.news_etl.dead_letters import replay_dead_letters
+from include.news_etl.loading import copy_load_articles, load_articles
+
+
+def dead_letters(conn):
+    with conn.cursor() as cursor:
+        cursor.execute(
+            'SELECT url, attempts, error LIKE %s, payload->>\'body\', "resolvedAt" IS NOT NULL '
+            'FROM article_dead_letters ORDER BY id', ('%no_rejected_body%',)
+        )
+        rows = cursor.fetchall()
+    conn.commit()
+    return rows
+
+
+def set_rejecting(conn, rejecting):
+    with conn.cursor() as cursor:
+        if rejecting:
+            cursor.execute("ALTER TABLE articles ADD CONSTRAINT no_rejected_body CHECK (body NOT LIKE 'Rejected%')")
+        else:
+            cursor.execute('ALTER TABLE articles DROP CONSTRAINT no_rejected_body')
+    conn.commit()
+
+
+def test_failed_rows_are_dead_lettered_and_replayed(pg_conn, make_article):
+    set_rejecting(pg_conn, True)
+
+    rows = [make_article(i) for i in range(6)]
+    rows[2] = make_article(2, body='Rejected 2')
+    summary = load_articles(pg_conn, rows, batch_size=4, run_id='r1')
+    assert (summary['loaded'], summary['errors']) == (5, 1)
+    assert dead_letters(pg_conn) == [('https://example.com/article-2', 1, True, 'Rejected 2', False)]
+
+    def load(articles):
+        return load_articles(pg_conn, articles, run_id='replay')
+
+    # still rejected: the same entry stays open with one more attempt
+    stats = replay_dead_letters(pg_conn, load)
+    assert (stats['replayed'], stats['resolved'], stats['errors']) == (1, 0, 1)
+    assert dead_letters(pg_conn) == [('https://example.com/article-2', 2, True, 'Rejected 2', False)]
+    assert replay_dead_letters(pg_conn, load, max_attempts=2) == {'superseded': 0, 'replayed': 0, 'resolved': 0}
+
+    set_rejecting(pg_conn, False)
+    stats = replay_dead_letters(pg_conn, load)
+    assert (stats['replayed'], stats['resolved'], stats['inserted']) == (1, 1, 1)
+    assert dead_letters(pg_conn)[0][-1] is True
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT etl_run_id FROM articles WHERE url = 'https://example.com/article-2'")
+        assert cursor.fetchone() == ('replay',)
+    pg_conn.commit()
+
+
+@pytest.mark.parametrize('loader', [load_articles, copy_load_articles])
+def test_newer_load_resolves_and_replay_never_writes_older_payloads(pg_conn, make_article, loader):
+    set_rejecting(pg_conn, True)
+    old = make_article(1, body='Rejected v1', extractedDate=datetime(2025, 1, 2))
+    load_articles(pg_conn, [old, make_article(2)], batch_size=10)
+    assert dead_letters(pg_conn)[0][-1] is False
+
+    # the next day's version loads, which closes the entry for the failed one
+    loader(pg_conn, [make_article(1, body='v2 new', extractedDate=datetime(2025, 1, 3))])
+    assert dead_letters(pg_conn)[0][-1] is True
+
+    # an entry left open anyway (e.g. recorded before the url loaded elsewhere) is superseded, not replayed
+    with pg_conn.cursor() as cursor:
+        cursor.execute('UPDATE article_dead_letters SET "resolvedAt" = NULL')
+    pg_conn.commit()
+    set_rejecting(pg_conn, False)
+    stats = replay_dead_letters(pg_conn, lambda articles: pytest.fail(f"replayed {articles}"))
+    assert stats == {'superseded': 1, 'replayed': 0, 'resolved': 0}
+    assert dead_letters(pg_conn)[0][-1] is True
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT body FROM articles WHERE url = 'https://example.com/article-1'")
+        assert cursor.fetchone() == ('v2 new',)
+    pg_conn.commit()
+
+
+def interrupted(rows, after):
+    for position, row in enumerate(rows):
+        if position == after:
+            raise RuntimeError('worker lost')
+        yield row
+
+
+def test_retried_load_resumes_after_last_committed_batch(pg_conn, make_article):
+    rows = [make_article(i) for i in range(25)]
+    checkpoint = LoadCheckpoint.open(pg_conn, 'dag/run/load_sources/-1', 'input-a')
+    try:
+        load_articles(pg_conn, interrupted(rows, 23), batch_size=10, checkpoint=checkpoint)
+    except RuntimeError:
+        pass
+
+    checkpoint = LoadCheckpoint.open(pg_conn, 'dag/run/load_sources/-1', 'input-a')
+    assert checkpoint.position == 20
+    # copy mode resumes through the batched loader
+    summary = copy_load_articles(pg_conn, rows, checkpoint=checkpoint)
+    assert (summary['resumed'], summary['loaded'], summary['inserted']) == (20, 5, 5)
+
+    # different input, no resuming
+    assert LoadCheckpoint.open(pg_conn, 'dag/run/load_sources/-1', 'input-b').position == 0
+    checkpoint.clear(pg_conn)
+    assert LoadCheckpoint.open(pg_conn, 'dag/run/load_sources/-1', 'input-a').position == 0
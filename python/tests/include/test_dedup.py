@@ -0,0 +1,127 @@
+"""Tests for MinHash/LSH near-duplicate detection"""
+
+from datetime import datetime
+import hashlib
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from include.news_etl.dedup import (
+    BANDS,
+    BUCKET_ARRAY_DDL,
+    LSHIndex,
+    DedupStats,
+    article_signature,
+    band_buckets,
+    deduplicate,
+    prune_index,
+    shingles,
+    similarity,
+)
+
+WORDS = [f'word{i}' for i in range(300)]
+BODY = ' '.join(WORDS)
+OTHER_BODY = ' '.join(f'other{i}' for i in range(300))
+
+
+def edit_word(words, position):
+    return ' '.join(words[:position] + ['edited'] + words[position + 1:])
+
+
+def make_row(i, body=BODY, **overrides):
+    row = {
+        'publishDate': datetime(2025, 1, 1, 12, 0),
+        'extractedDate': datetime(2025, 1, 2, 8, 0),
+        'url': f'https://example.com/article-{i}',
+        'headline': 'Wire story',
+        'body': body,
+        'section': 'Environment',
+        'source': 'guardian_api',
+    }
+    row.update(overrides)
+    return row
+
+
+def test_signatures_are_deterministic_and_estimate_jaccard():
+    original = article_signature(make_row(1))
+    assert (original == article_signature(make_row(2))).all()
+
+    edited = article_signature(make_row(3, body=edit_word(WORDS, 150)))
+    unrelated = article_signature(make_row(4, body=OTHER_BODY))
+    assert similarity(original, edited) > 0.9
+    assert similarity(original, unrelated) < 0.1
+    assert article_signature(make_row(5, headline='', body='')) is None
+    assert np.array_equal(shingles('One two'), shingles('one   TWO'))
+
+
+def test_lsh_index_only_returns_colliding_keys():
+    index = LSHIndex()
+    index.add('a', article_signature(make_row(1)))
+    index.add('b', article_signature(make_row(2, body=OTHER_BODY)))
+    buckets = band_buckets(article_signature(make_row(3, body=edit_word(WORDS, 7))))
+    assert len(buckets) == BANDS
+    assert index.candidates(buckets) == {'a'}
+    # the band number keeps equal rows in different bands apart
+    assert len({bucket >> 60 for bucket in buckets}) == BANDS
+
+
+@pytest.mark.parametrize("mode, loaded", [('flag', 4), ('merge', 2)])
+def test_deduplicate_against_stored_and_in_batch_rows(pg_conn, mode, loaded):
+    list(deduplicate(pg_conn, [make_row(0)], mode=mode))
+
+    rows = [
+        make_row(0),  # same url as the stored row, not a duplicate of itself
+        make_row(1, body=edit_word(WORDS, 10)),
+        make_row(2, body=OTHER_BODY),
+        make_row(3, body=OTHER_BODY + ' with a new ending'),
+    ]
+    stats = DedupStats()
+    output = list(deduplicate(pg_conn, rows, mode=mode, chunk_size=2, stats=stats))
+    assert len(output) == loaded
+    assert (stats.seen, stats.duplicates) == (4, 2)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT url, duplicate_of FROM article_duplicates ORDER BY url")
+        assert cursor.fetchall() == [
+            ('https://example.com/article-1', 'https://example.com/article-0'),
+            ('https://example.com/article-3', 'https://example.com/article-2'),
+        ]
+
+
+def test_prune_index_forgets_old_signatures(pg_conn):
+    list(deduplicate(pg_conn, [make_row(0, publishDate=datetime(2024, 1, 1)), make_row(1, body=OTHER_BODY)]))
+    prune_index(pg_conn, datetime(2025, 1, 1))
+    output = list(deduplicate(pg_conn, [make_row(2)], mode='merge'))
+    assert len(output) == 1
+
+
+def test_bucket_rows_are_folded_into_signature_arrays(pg_conn):
+    # the index as it was before buckets moved onto the signature rows
+    signature = article_signature(make_row(0))
+    with pg_conn.cursor() as cursor:
+        cursor.execute("ALTER TABLE article_signatures DROP COLUMN buckets")
+        cursor.execute(
+            'CREATE TABLE article_lsh_buckets (band SMALLINT, bucket BIGINT, url TEXT, "publishDate" TIMESTAMP(3))'
+        )
+        cursor.execute(
+            'INSERT INTO article_signatures (url, signature, "publishDate") VALUES (%s, %s, %s), (%s, %s, %s)',
+            ('https://example.com/article-0', signature.tobytes(), datetime(2025, 1, 1),
+             'https://example.com/unbucketed', signature.tobytes(), datetime(2025, 1, 1)),
+        )
+        for band, values in enumerate(signature.reshape(BANDS, -1)):
+            bucket = int.from_bytes(hashlib.blake2b(values.tobytes(), digest_size=8).digest(), 'big', signed=True)
+            cursor.execute(
+                'INSERT INTO article_lsh_buckets VALUES (%s, %s, %s, %s)',
+                (band, bucket, 'https://example.com/article-0', datetime(2025, 1, 1)),
+            )
+        cursor.execute(BUCKET_ARRAY_DDL)
+        cursor.execute("SELECT url, buckets FROM article_signatures")
+        assert cursor.fetchall() == [('https://example.com/article-0', band_buckets(signature))]
+        cursor.execute("SELECT to_regclass('article_lsh_buckets')")
+        assert cursor.fetchone() == (None,)
+    pg_conn.commit()
+
+    stats = DedupStats()
+    list(deduplicate(pg_conn, [make_row(1, body=edit_word(WORDS, 10))], stats=stats))
+    assert stats.duplicates == 1
@@ -0,0 +1,63 @@
+"""Tests for paginated Guardian extraction against the local stub server"""
+
+import pytest
+import requests
+
+from include.news_etl.guardian import SEARCH_ENDPOINT, fetch_all_pages, mount_connection_pool
+from include.news_etl.stubs import GuardianStubServer
+
+
+@pytest.fixture
+def session():
+    with mount_connection_pool(requests.Session(), 4) as s:
+        yield s
+
+
+@pytest.mark.parametrize("total", [0, 1, 200, 201, 1000])
+def test_fetch_all_pages_returns_every_article_in_order(session, total):
+    with GuardianStubServer(total_articles=total) as stub:
+        data = fetch_all_pages(session, stub.url + SEARCH_ENDPOINT, {'section': 'environment'}, max_workers=4)
+
+    results = data['response']['results']
+    assert len(results) == total
+    assert [r['webUrl'] for r in results] == [
+        f'https://www.theguardian.com/environment/2025/synthetic-{i}' for i in range(total)
+    ]
+
+
+def test_fetch_all_pages_respects_max_pages(session):
+    with GuardianStubServer(total_articles=50) as stub:
+        data = fetch_all_pages(
+            session, stub.url + SEARCH_ENDPOINT, {'page-size': '10'}, max_workers=2, max_pages=3
+        )
+        assert stub.request_count == 3
+
+    assert len(data['response']['results']) == 30
+    assert data['response']['pages'] == 5
+
+
+def test_fetch_all_pages_raises_on_http_error(session):
+    with GuardianStubServer(total_articles=10) as stub:
+        with pytest.raises(Exception, match="404"):
+            fetch_all_pages(session, stub.url + '/missing', {})
+
+
+def test_fetch_all_pages_reuses_checkpointed_pages(session, tmp_path):
+    pytest.importorskip("airflow.sdk")
+    from include.news_etl.artifacts import PageCheckpoint
+
+    checkpoint = PageCheckpoint(f"file://{tmp_path}/pages")
+    params = {'page-size': '10', 'api-key': 'secret'}
+    # an attempt that got through the first three pages
+    with GuardianStubServer(total_articles=50) as stub:
+        fetch_all_pages(session, stub.url + SEARCH_ENDPOINT, params, max_workers=2, max_pages=3, checkpoint=checkpoint)
+
+    with GuardianStubServer(total_articles=50) as stub:
+        data = fetch_all_pages(session, stub.url + SEARCH_ENDPOINT, params, max_workers=2, checkpoint=checkpoint)
+        assert stub.request_count == 2
+
+    assert len(data['response']['results']) == 50
+    assert checkpoint.loaded == 3
+    assert 'secret' not in ''.join(str(path) for path in tmp_path.rglob('*'))
+    checkpoint.clear()
+    assert not (tmp_path / 'pages').exists()
@@ -0,0 +1,161 @@
+"""Tests for the rate-limited, retrying, caching transport adapter"""
+
+from datetime import datetime, timezone
+import os
+import random
+import time
+
+import pytest
+import requests
+
+from include.news_etl.guardian import SEARCH_ENDPOINT, fetch_all_pages, mount_connection_pool
+from include.news_etl.http_client import (
+    HTTP_CACHE_ENV,
+    HTTP_CACHE_MAX_AGE_ENV,
+    HTTP_CACHE_MAX_MB_ENV,
+    ResponseCache,
+    TokenBucket,
+    backoff_delay,
+    cache_key,
+    default_cache,
+    parse_retry_after,
+)
+from include.news_etl.stubs import GuardianStubServer
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def make_session(sleeps, **options):
+    session = requests.Session()
+    mount_connection_pool(session, 4, sleep=sleeps.append, **options)
+    return session
+
+
+def test_token_bucket_allows_bursts_then_paces():
+    clock = FakeClock()
+    bucket = TokenBucket(2, capacity=2, clock=clock, sleep=clock.sleep)
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.sleeps == [0.5, 0.5]
+
+    bucket.pause(3)
+    bucket.acquire()
+    assert clock.now == pytest.approx(4.5)
+
+
+def test_parse_retry_after():
+    now = datetime(2025, 1, 1, 12, 0, tzinfo=timezone.utc)
+    assert parse_retry_after('7') == 7
+    assert parse_retry_after('Wed, 01 Jan 2025 12:00:30 GMT', now=now) == 30
+    assert parse_retry_after('soon') is None
+    assert parse_retry_after(None) is None
+
+
+def test_backoff_delay_is_jittered_capped_and_honours_retry_after():
+    rng = random.Random(1)
+    delays = [backoff_delay(attempt, base=1, cap=8, rng=rng) for attempt in range(10)]
+    assert all(0 <= d <= min(8, 2 ** a) for a, d in enumerate(delays))
+    assert backoff_delay(0, base=1, retry_after=5, rng=rng) == 5
+
+
+def test_cache_key_ignores_param_order_and_api_key():
+    assert cache_key('http://h/search?page=2&api-key=a&q=x') == cache_key('http://h/search?q=x&page=2&api-key=b')
+    assert cache_key('http://h/search?page=2') != cache_key('http://h/search?page=3')
+
+
+def test_retries_429_with_retry_after():
+    sleeps = []
+    with GuardianStubServer(total_articles=50, throttle_requests=3, retry_after=2) as stub:
+        session = make_session(sleeps)
+        data = fetch_all_pages(session, stub.url + SEARCH_ENDPOINT, {'page-size': '10'}, max_workers=2)
+        assert stub.throttled_count == 3
+        assert session.get_adapter(stub.url).stats['throttled'] == 3
+
+    assert len(data['response']['results']) == 50
+    assert len(sleeps) == 3 and min(sleeps) >= 2
+
+
+def test_gives_up_after_max_attempts_or_long_retry_after():
+    sleeps = []
+    with GuardianStubServer(total_articles=10, throttle_requests=100) as stub:
+        with pytest.raises(Exception, match="429"):
+            fetch_all_pages(make_session(sleeps, max_attempts=3), stub.url + SEARCH_ENDPOINT, {})
+        assert stub.request_count == 3
+
+    with GuardianStubServer(total_articles=10, throttle_requests=1, retry_after=3600) as stub:
+        with pytest.raises(Exception, match="429"):
+            fetch_all_pages(make_session(sleeps), stub.url + SEARCH_ENDPOINT, {})
+        assert stub.request_count == 1
+
+
+def test_conditional_requests_serve_unchanged_pages_from_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'http'))
+    params = {'page-size': '10', 'api-key': 'secret'}
+    with GuardianStubServer(total_articles=35) as stub:
+        first = fetch_all_pages(make_session([], cache=cache), stub.url + SEARCH_ENDPOINT, params)
+        second = fetch_all_pages(make_session([], cache=cache), stub.url + SEARCH_ENDPOINT, dict(params, **{'api-key': 'rotated'}))
+        assert stub.not_modified_count == 4
+
+    assert second == first
+
+
+def _age(cache, key, seconds):
+    stamp = time.time() - seconds
+    os.utime(cache._path(key), (stamp, stamp))
+
+
+def test_response_cache_expires_unused_entries(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'http'), max_age=3600)
+    cache.put('aa1', {'etag': '"1"'}, b'body')
+    assert cache.get('aa1') == ({'etag': '"1"'}, b'body')
+
+    _age(cache, 'aa1', 7200)
+    assert cache.get('aa1') is None
+    assert not os.path.exists(cache._path('aa1'))
+
+    # reopening the store sweeps entries nobody asked for again
+    cache.put('bb1', {}, b'body')
+    _age(cache, 'bb1', 7200)
+    assert ResponseCache(cache.directory, max_age=3600).get('bb1') is None
+    assert not os.path.exists(cache._path('bb1'))
+
+
+def test_response_cache_evicts_least_recently_used_over_size(tmp_path):
+    # every entry is 3 bytes of metadata plus a 100 byte body, two of them fit
+    cache = ResponseCache(str(tmp_path / 'http'), max_bytes=250)
+    cache.put('aa1', {}, b'a' * 100)
+    _age(cache, 'aa1', 30)
+    cache.put('bb1', {}, b'b' * 100)
+    _age(cache, 'bb1', 20)
+    assert cache.get('aa1') is not None
+
+    cache.put('cc1', {}, b'c' * 100)
+
+    assert cache.get('bb1') is None
+    assert cache.get('aa1') == ({}, b'a' * 100)
+    assert cache.get('cc1') == ({}, b'c' * 100)
+    # overwriting an entry does not count it twice
+    cache.put('cc1', {}, b'd' * 100)
+    assert cache.get('aa1') is not None
+
+
+def test_default_cache_reads_bounds_from_environment(monkeypatch, tmp_path):
+    monkeypatch.delenv(HTTP_CACHE_ENV, raising=False)
+    assert default_cache() is None
+
+    monkeypatch.setenv(HTTP_CACHE_ENV, str(tmp_path / 'http'))
+    monkeypatch.setenv(HTTP_CACHE_MAX_MB_ENV, '0.5')
+    monkeypatch.setenv(HTTP_CACHE_MAX_AGE_ENV, '2')
+    cache = default_cache()
+    assert (cache.max_bytes, cache.max_age) == (512 * 1024, 2 * 86400)
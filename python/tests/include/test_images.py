@@ -0,0 +1,83 @@
+"""Tests for og:image enrichment"""
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from include.news_etl.images import enrich_images, extract_og_image, fetch_og_images
+from include.news_etl.loading import load_articles
+from include.news_etl.stubs import ArticlePageStubServer
+
+pytest.importorskip("aiohttp")
+
+
+def test_extract_og_image():
+    page = ('<html><head><meta name="twitter:image" content="/t.jpg">'
+            '<meta property="og:image" content="img/og.jpg"></head>'
+            '<body><meta property="og:image:secure_url" content="https://x/late.jpg"></body></html>')
+    assert extract_og_image(page, 'https://example.com/a/b') == 'https://example.com/a/img/og.jpg'
+    assert extract_og_image('<head><meta name="twitter:image" content="/t.jpg">', 'https://x/a') == 'https://x/t.jpg'
+    assert extract_og_image('<head><meta property="og:image" content="data:image/png;base64,AA"></head>', 'https://x/') is None
+    assert extract_og_image('<p>no head</p>', 'https://x/') is None
+
+
+def test_fetch_og_images_caps_concurrency():
+    pages = {f'/p{i}': f'https://img/{i}.jpg' for i in range(12)}
+    with ArticlePageStubServer(pages=dict(pages, **{'/gone': None}), latency=0.05) as stub:
+        urls = [stub.url + path for path in pages] + [stub.url + '/gone']
+        images, errors = asyncio.run(fetch_og_images(urls, concurrency=3))
+
+        assert images == {stub.url + path: image for path, image in pages.items()}
+        assert list(errors) == [stub.url + '/gone']
+    assert stub.max_in_flight == 3
+
+
+def test_enrich_images_caches_pages(pg_conn, make_article):
+    with ArticlePageStubServer(pages={'/a': '/a.jpg', '/b': '', '/c': None}) as stub:
+        load_articles(pg_conn, [make_article(path, url=stub.url + path) for path in ('/a', '/b', '/c')]
+                      + [make_article('d', url=stub.url + '/d', imageUrl='https://thumb/d.jpg')])
+
+        stats = enrich_images(pg_conn, chunk_size=2)
+        assert stats.pop('bytes') > 0
+        assert stats == {'rows': 3, 'filled': 1, 'fetched': 2, 'cached': 0, 'failed': 1}
+        assert sorted(stub.requested) == ['/a', '/b', '/c']
+
+        # /b is known to have no image and /c failed recently, neither is fetched again
+        assert enrich_images(pg_conn)['cached'] == 2
+        assert sorted(stub.requested) == ['/a', '/b', '/c']
+        with pg_conn.cursor() as cursor:
+            cursor.execute("SELECT error IS NOT NULL FROM article_image_cache WHERE url = %s", (stub.url + '/c',))
+            assert cursor.fetchone() == (True,)
+        pg_conn.commit()
+
+        # a failure is retried once its shorter TTL has passed
+        assert enrich_images(pg_conn, failure_ttl=timedelta(0))['failed'] == 1
+        assert sorted(stub.requested) == ['/a', '/b', '/c', '/c']
+
+        # an expired entry is fetched again
+        stub.pages['/b'] = '/b.jpg'
+        assert enrich_images(pg_conn, ttl=timedelta(0))['filled'] == 1
+
+        with pg_conn.cursor() as cursor:
+            cursor.execute('SELECT url, image_url FROM articles ORDER BY url')
+            assert [image for _, image in cursor.fetchall()] == [
+                stub.url + '/a.jpg', stub.url + '/b.jpg', None, 'https://thumb/d.jpg'
+            ]
+
+
+def test_enrich_images_fetches_outside_a_transaction(pg_conn, monkeypatch, make_article):
+    from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+    from include.news_etl import images
+
+    statuses = []
+
+    async def fetch(urls, *args):
+        statuses.append(pg_conn.get_transaction_status())
+        return {url: 'https://img/x.jpg' for url in urls}, {}
+
+    monkeypatch.setattr(images, 'fetch_og_images', fetch)
+    load_articles(pg_conn, [make_article(i) for i in range(3)])
+    assert enrich_images(pg_conn, chunk_size=2)['filled'] == 3
+    assert statuses == [TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_IDLE]
@@ -0,0 +1,144 @@
+"""Tests for batched article upserts"""
+
+from datetime import datetime
+
+import pytest
+
+from include.news_etl.loading import (
+    build_copy_buffer,
+    choose_load_mode,
+    chunked,
+    content_hash,
+    copy_load_articles,
+    dedupe_by_url,
+    load_articles,
+)
+
+
+def test_chunked_splits_into_bounded_slices():
+    assert [len(c) for c in chunked(list(range(7)), 3)] == [3, 3, 1]
+    with pytest.raises(ValueError):
+        list(chunked([1], 0))
+
+
+def test_dedupe_by_url_keeps_last_occurrence(make_article):
+    rows = [make_article(1), make_article(2), make_article(1, headline='newer')]
+    deduped = dedupe_by_url(rows)
+    assert [r['url'] for r in deduped] == ['https://example.com/article-1', 'https://example.com/article-2']
+    assert deduped[0]['headline'] == 'newer'
+
+
+@pytest.mark.parametrize("prepared", [True, False])
+def test_load_articles_upserts_in_batches(pg_conn, prepared, make_article):
+    summary = load_articles(pg_conn, [make_article(i) for i in range(25)], batch_size=10, prepared=prepared)
+    assert (summary["loaded"], summary["errors"]) == (25, 0)
+
+    summary = load_articles(pg_conn, [make_article(0, headline='updated')], batch_size=10, prepared=prepared)
+    assert (summary["loaded"], summary["errors"]) == (1, 0)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*), COUNT(*) FILTER (WHERE headline = 'updated') FROM articles")
+        assert cursor.fetchone() == (25, 1)
+
+
+@pytest.mark.parametrize("prepared", [True, False])
+def test_load_articles_isolates_failing_rows(pg_conn, prepared, make_article):
+    rows = [make_article(i) for i in range(10)]
+    rows[3]['publishDate'] = None  # violates NOT NULL
+    summary = load_articles(pg_conn, rows, batch_size=4, prepared=prepared)
+    assert (summary["loaded"], summary["errors"]) == (9, 1)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM articles")
+        assert cursor.fetchone()[0] == 9
+
+
+def test_choose_load_mode():
+    assert choose_load_mode(10, threshold=100) == 'batch'
+    assert choose_load_mode(100, threshold=100) == 'copy'
+    assert choose_load_mode(10, mode='copy') == 'copy'
+    with pytest.raises(ValueError):
+        choose_load_mode(10, mode='bulk')
+
+
+def test_build_copy_buffer_escapes_text_format(make_article):
+    article = make_article(1, body='tab\there\nnew line \\ slash', publishDate=None, imageUrl=None,
+                           contentHash='h', etlRunId=None)
+    line = build_copy_buffer([article]).getvalue()
+    assert line.endswith('\n') and line.count('\n') == 1
+    assert '\\N\t2025-01-02T08:00:00\t' in line
+    assert 'tab\\there\\nnew line \\\\ slash' in line
+
+
+def test_copy_load_articles_merges_staging_rows(pg_conn, make_article):
+    load_articles(pg_conn, [make_article(0)])
+    rows = [make_article(i, body=f'multi\nline\tbody {i}') for i in range(30)]
+    summary = copy_load_articles(pg_conn, rows, chunk_size=7)
+    assert (summary["loaded"], summary["errors"]) == (30, 0)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*), MIN(body) FROM articles")
+        assert cursor.fetchone() == (30, 'multi\nline\tbody 0')
+
+
+def test_copy_load_articles_falls_back_on_failure(pg_conn, make_article):
+    rows = [make_article(i) for i in range(5)]
+    rows[2]['headline'] = None
+    summary = copy_load_articles(pg_conn, rows)
+    assert (summary["loaded"], summary["errors"]) == (4, 1)
+
+
+def test_copy_load_articles_streams_and_keeps_last_duplicate(pg_conn, make_article):
+    rows = (make_article(i % 10, headline=f'v{i}') for i in range(20))
+    summary = copy_load_articles(pg_conn, rows, chunk_size=6)
+    assert (summary["loaded"], summary["errors"]) == (10, 0)
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT headline FROM articles WHERE url = 'https://example.com/article-3'")
+        assert cursor.fetchone() == ('v13',)
+
+
+def test_content_hash_tracks_updatable_fields(make_article):
+    article = make_article(1)
+    assert content_hash(article) == content_hash(dict(article, extractedDate=datetime(2030, 1, 1)))
+    assert content_hash(article) != content_hash(dict(article, body='changed'))
+
+
+@pytest.mark.parametrize("loader", [load_articles, copy_load_articles])
+def test_unchanged_rows_are_not_rewritten(pg_conn, loader, make_article):
+    load_articles(pg_conn, [make_article(i) for i in range(5)])
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT url, xmin::text FROM articles ORDER BY url")
+        before = cursor.fetchall()
+
+    rows = [make_article(i, extractedDate=datetime(2025, 2, 1)) for i in range(5)]
+    rows[1]['body'] = 'changed'
+    rows.append(make_article(5))
+    summary = loader(pg_conn, rows)
+    assert summary == {"loaded": 6, "errors": 0, "inserted": 1, "updated": 1, "unchanged": 4}
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT url, xmin::text FROM articles WHERE url <> 'https://example.com/article-5' ORDER BY url")
+        after = cursor.fetchall()
+    changed = [url for (url, x1), (_, x2) in zip(before, after) if x1 != x2]
+    assert changed == ['https://example.com/article-1']
+
+
+@pytest.mark.parametrize("loader", [load_articles, copy_load_articles])
+def test_unchanged_text_still_takes_a_first_image(pg_conn, loader, make_article):
+    load_articles(pg_conn, [make_article(i) for i in range(2)])
+    with pg_conn.cursor() as cursor:
+        cursor.execute("UPDATE articles SET ai_summary = 'Summary'")
+    pg_conn.commit()
+
+    rows = [make_article(0, imageUrl='https://example.com/a.jpg'), make_article(1)]
+    assert loader(pg_conn, rows) == {"loaded": 2, "errors": 0, "inserted": 0, "updated": 1, "unchanged": 1}
+    # the image is stored, the summary of the unchanged text survives
+    rows = [make_article(0, imageUrl=None), make_article(1, imageUrl=None)]
+    assert loader(pg_conn, rows)['unchanged'] == 2
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT url, image_url, ai_summary FROM articles ORDER BY url")
+        assert cursor.fetchall() == [
+            ('https://example.com/article-0', 'https://example.com/a.jpg', 'Summary'),
+            ('https://example.com/article-1', None, 'Summary'),
+        ]
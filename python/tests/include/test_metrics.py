@@ -0,0 +1,67 @@
+"""Tests for stage instrumentation"""
+
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from include.news_etl import metrics
+from include.news_etl.loading import load_articles
+from include.news_etl.metrics import LogSampler, StageMetrics, instrument, render_openmetrics, track_connection
+
+TI = SimpleNamespace(dag_id='env_etl_pipeline_dag', task_id='extract_source', map_index=0)
+
+
+@pytest.fixture
+def exported(monkeypatch, tmp_path):
+    sent = []
+    monkeypatch.setattr(metrics, 'emit_stage_metrics', sent.append)
+    monkeypatch.setenv(metrics.METRICS_DIR_ENV, str(tmp_path))
+    return sent
+
+
+def test_instrument_exports_stage_metrics(exported, tmp_path):
+    with instrument(TI, source='guardian') as stage:
+        stage.rows_in = 10
+        stage.add_http({'requests': 3, 'bytes': 2048, 'retries': 1})
+
+    assert exported == [stage]
+    assert stage.duration_seconds > 0 and stage.peak_memory_bytes > 0
+    text = (tmp_path / 'env_etl_pipeline_dag_extract_source_0.prom').read_text()
+    labels = 'dag_id="env_etl_pipeline_dag",map_index="0",source="guardian",stage="extract_source"'
+    assert f'news_etl_stage_rows_in{{{labels}}} 10\n' in text
+    assert f'news_etl_stage_http_calls{{{labels}}} 3\n' in text
+    assert '# UNIT news_etl_stage_duration_seconds seconds\n' in text
+    assert text.endswith('# EOF\n')
+
+
+def test_instrument_marks_failed_stages(exported):
+    with pytest.raises(RuntimeError):
+        with instrument(stage='load'):
+            raise RuntimeError('boom')
+    assert exported[0].failed == 1
+
+
+def test_render_openmetrics_escapes_labels():
+    text = render_openmetrics(StageMetrics('load', {'source': 'a"b\\c'}))
+    assert 'source="a\\"b\\\\c"' in text
+
+
+def test_track_connection_counts_statements(pg_conn, make_article):
+    stage = StageMetrics('load')
+    track_connection(pg_conn, stage)
+    load_articles(pg_conn, [make_article(i) for i in range(25)], batch_size=10)
+    # one multi-row upsert per batch
+    assert stage.db_round_trips == 3
+
+
+def test_log_sampler_logs_first_and_every_nth(caplog):
+    sampler = LogSampler(logging.getLogger('sampled'), first=2, every=10)
+    with caplog.at_level(logging.WARNING, logger='sampled'):
+        for i in range(25):
+            sampler(f'row {i} failed')
+    assert [r.getMessage() for r in caplog.records] == [
+        'row 0 failed (occurrence 1)', 'row 1 failed (occurrence 2)',
+        'row 9 failed (occurrence 10)', 'row 19 failed (occurrence 20)',
+    ]
+    assert (sampler.count, sampler.suppressed) == (25, 21)
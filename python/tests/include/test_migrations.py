@@ -0,0 +1,43 @@
+"""Tests for versioned schema migrations"""
+
+import pytest
+
+from include.news_etl import migrations
+
+
+@pytest.fixture
+def reset_cache(monkeypatch):
+    monkeypatch.setattr(migrations, '_verified_version', 0)
+
+
+def test_migrations_are_applied_once(pg_conn, reset_cache):
+    # the pg_conn fixture already migrated the schema
+    assert migrations.current_version(pg_conn) == migrations.LATEST_VERSION
+    assert migrations.migrate(pg_conn) == []
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM etl_schema_version")
+        assert cursor.fetchone()[0] == len(migrations.MIGRATIONS)
+        cursor.execute("SELECT column_default FROM information_schema.columns "
+                       "WHERE table_schema = current_schema() AND table_name = 'articles' AND column_name = 'updatedAt'")
+        assert cursor.fetchone()[0] == 'CURRENT_TIMESTAMP'
+
+
+def test_ensure_schema_migrates_only_when_behind(pg_conn, reset_cache, monkeypatch):
+    with pg_conn.cursor() as cursor:
+        cursor.execute("DELETE FROM etl_schema_version WHERE version = %s", (migrations.LATEST_VERSION,))
+    pg_conn.commit()
+
+    assert migrations.ensure_schema(pg_conn) == [migrations.LATEST_VERSION]
+    # cached: no further queries once the process has seen the latest version
+    monkeypatch.setattr(migrations, 'current_version', lambda conn: pytest.fail("queried the database"))
+    assert migrations.ensure_schema(pg_conn) == []
+
+
+def test_migrate_requires_articles_table(pg_conn, reset_cache):
+    with pg_conn.cursor() as cursor:
+        cursor.execute("DROP TABLE articles CASCADE")
+    pg_conn.commit()
+
+    with pytest.raises(Exception, match="Table 'articles' not found"):
+        migrations.migrate(pg_conn)
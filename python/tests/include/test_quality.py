@@ -0,0 +1,51 @@
+"""Tests for the set-based data quality checks"""
+
+from datetime import datetime
+
+import pytest
+
+from include.news_etl.loading import load_articles
+from include.news_etl.quality import QUALITY_CHECKS, build_quality_query, run_quality_checks
+
+
+def test_build_quality_query_is_a_single_scoped_pass():
+    sql = build_quality_query('etl_run_id = %(run_id)s')
+    assert sql.count('FROM articles') == 1
+    assert sql.count('FILTER') == len(QUALITY_CHECKS)
+    assert 'DATE(' not in sql
+
+
+def test_run_quality_checks_requires_one_scope():
+    with pytest.raises(ValueError):
+        run_quality_checks(None)
+    with pytest.raises(ValueError):
+        run_quality_checks(None, run_id='r', ids=['a'])
+
+
+def test_run_quality_checks_counts_only_the_runs_rows(pg_conn, pg_hook, make_article):
+    load_articles(pg_conn, [make_article(i, body='') for i in range(3)], run_id='dag/earlier')
+    load_articles(pg_conn, [
+        make_article(10, body='x' * 300),
+        make_article(11, body='too short'),
+        make_article(12, body='x' * 300, publishDate=datetime(2025, 1, 2, 12, 0)),
+    ], run_id='dag/current')
+
+    results = run_quality_checks(pg_hook, run_id='dag/current')
+    assert results == {
+        'rows': 3,
+        'checks': {'missing_fields': 0, 'short_body': 1, 'publish_date_skew': 1, 'null_image': 3},
+    }
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT id FROM articles WHERE body = ''")
+        ids = [row[0] for row in cursor.fetchall()]
+    assert run_quality_checks(pg_hook, ids=ids)['checks']['missing_fields'] == 3
+
+
+def test_quality_scope_uses_the_run_id_index(pg_conn):
+    with pg_conn.cursor() as cursor:
+        cursor.execute('SET LOCAL enable_seqscan = off')
+        cursor.execute('EXPLAIN ' + build_quality_query('etl_run_id = %(run_id)s'),
+                       {'run_id': 'r', 'min_body_length': 1, 'max_publish_skew': '1 hour'})
+        plan = '\n'.join(row[0] for row in cursor.fetchall())
+    assert 'idx_articles_etl_run_id' in plan
@@ -0,0 +1,50 @@
+"""Tests for the full-text search column"""
+
+from datetime import datetime
+
+from include.news_etl.loading import copy_load_articles, load_articles
+from include.news_etl.search import backfill_search_vectors, plan_backfill_ranges, search_articles
+
+
+def test_plan_backfill_ranges_cover_the_id_space():
+    assert plan_backfill_ranges(1) == [{'lower': '', 'upper': None}]
+    assert plan_backfill_ranges(4) == [
+        {'lower': '', 'upper': '40000000'},
+        {'lower': '40000000', 'upper': '80000000'},
+        {'lower': '80000000', 'upper': 'c0000000'},
+        {'lower': 'c0000000', 'upper': None},
+    ]
+
+
+def test_upsert_maintains_weighted_search_vector(pg_conn, make_article):
+    load_articles(pg_conn, [
+        make_article(0, headline='Glaciers retreat', body='Ice sheets melted faster this summer.'),
+        make_article(1, headline='Ocean heat record', body='Scientists say glaciers and ice shelves are thinning.'),
+    ])
+    copy_load_articles(pg_conn, [make_article(2, headline='Forest fires', body='Wildfires burned across the north.')])
+
+    # headline matches (weight A) rank above body matches (weight B)
+    assert [headline for _, headline, _ in search_articles(pg_conn, 'glacier')] == [
+        'Glaciers retreat', 'Ocean heat record'
+    ]
+    assert [headline for _, headline, _ in search_articles(pg_conn, 'wildfire')] == ['Forest fires']
+
+    load_articles(pg_conn, [make_article(0, headline='Glaciers retreat', body='Coral reefs bleached.')])
+    assert [headline for _, headline, _ in search_articles(pg_conn, 'coral -ocean')] == ['Glaciers retreat']
+
+
+def test_backfill_fills_missing_vectors_without_touching_updated_at(pg_conn, make_article):
+    load_articles(pg_conn, [make_article(i, headline=f'Headline {i}', body=f'Solar panel story {i}') for i in range(30)])
+    with pg_conn.cursor() as cursor:
+        cursor.execute('UPDATE articles SET search_vector = NULL, "updatedAt" = %s', (datetime(2025, 1, 3),))
+    pg_conn.commit()
+    assert search_articles(pg_conn, 'solar') == []
+
+    filled = sum(backfill_search_vectors(pg_conn, batch_size=4, **bounds) for bounds in plan_backfill_ranges(3))
+    assert filled == 30
+    assert backfill_search_vectors(pg_conn) == 0
+    assert len(search_articles(pg_conn, 'solar panels', limit=50)) == 30
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute('SELECT DISTINCT "updatedAt" FROM articles')
+        assert cursor.fetchall() == [(datetime(2025, 1, 3),)]
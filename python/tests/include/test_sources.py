@@ -0,0 +1,93 @@
+"""Tests for the source adapter registry and the Guardian adapter"""
+
+from datetime import datetime
+
+import pytest
+import requests
+
+from include.news_etl import sources
+from include.news_etl.sources import (
+    SourceAdapter,
+    get_source,
+    parse_source_names,
+    register_source,
+)
+from include.news_etl.stubs import GuardianStubServer
+
+WINDOW = {'from_date': '2025-01-01', 'to_date': '2025-01-01'}
+
+
+class StubHttpHook:
+    """The parts of HttpHook an adapter uses, pointed at a local stub"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def get_conn(self, headers=None):
+        session = requests.Session()
+        session.headers.update(headers or {})
+        return session
+
+    def url_from_endpoint(self, endpoint):
+        return self.base_url + endpoint
+
+
+def test_parse_source_names():
+    assert parse_source_names(' guardian, ') == ['guardian']
+    with pytest.raises(ValueError):
+        parse_source_names('guardian,nytimes')
+    with pytest.raises(ValueError):
+        parse_source_names(' , ')
+
+
+def test_register_source(monkeypatch):
+    monkeypatch.setattr(sources, 'SOURCE_ADAPTERS', dict(sources.SOURCE_ADAPTERS))
+
+    @register_source
+    class OtherAdapter(SourceAdapter):
+        name = 'other'
+
+        def fetch(self, http_hook, window, api_key, checkpoint=None):
+            return [], 0, 0
+
+        def transform(self, results, extraction_date, mode='rows'):
+            return iter(())
+
+    assert isinstance(get_source('other'), OtherAdapter)
+    assert parse_source_names('guardian,other') == ['guardian', 'other']
+    with pytest.raises(ValueError):
+        register_source(type('Nameless', (SourceAdapter,), {}))
+
+
+def test_adapter_must_implement_fetch_and_transform(monkeypatch):
+    monkeypatch.setattr(sources, 'SOURCE_ADAPTERS', dict(sources.SOURCE_ADAPTERS))
+
+    @register_source
+    class FetchOnlyAdapter(SourceAdapter):
+        name = 'fetch_only'
+
+        def fetch(self, http_hook, window, api_key, checkpoint=None):
+            return [], 0, 0
+
+    with pytest.raises(TypeError, match='transform'):
+        get_source('fetch_only')
+
+
+def test_guardian_adapter_fetches_and_maps_rows():
+    adapter = get_source('guardian')
+    with GuardianStubServer(total_articles=450) as stub:
+        results, total, pages = adapter.fetch(StubHttpHook(stub.url), WINDOW, 'test')
+
+    assert (len(results), total, pages) == (450, 450, 3)
+    rows = list(adapter.transform(results[:2], datetime(2025, 1, 2)))
+    assert rows[0]['source'] == 'guardian_api'
+
+
+def test_guardian_adapter_columnar_transform_matches_rows():
+    pytest.importorskip("pyarrow")
+    adapter = get_source('guardian')
+    with GuardianStubServer(total_articles=2) as stub:
+        results, _, _ = adapter.fetch(StubHttpHook(stub.url), WINDOW, 'test')
+
+    rows = list(adapter.transform(results, datetime(2025, 1, 2), mode='columnar'))
+    assert rows == list(adapter.transform(results, datetime(2025, 1, 2)))
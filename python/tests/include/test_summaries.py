@@ -0,0 +1,58 @@
+"""Tests for offline summary generation"""
+
+import pytest
+
+from include.news_etl.loading import load_articles
+from include.news_etl.summaries import SummaryBackend, TextRankBackend, get_backend, split_sentences, summarize_pending
+
+pytest.importorskip("numpy")
+
+BODY = (
+    "Sea levels rose again this year. "
+    "Scientists say rising sea levels threaten coastal cities. "
+    "The mayor opened a new library. "
+    "Coastal cities are planning sea walls as sea levels rise. "
+    "A local team won the cup."
+)
+
+
+def test_split_sentences():
+    assert split_sentences('One. Two? "Three!" 4 four. e.g. five') == ['One.', 'Two?', '"Three!"', '4 four. e.g. five']
+    assert split_sentences(None) == []
+
+
+def test_textrank_keeps_central_sentences_in_order():
+    summary = TextRankBackend(sentences=2).summarize(BODY)
+    assert summary == (
+        "Scientists say rising sea levels threaten coastal cities. "
+        "Coastal cities are planning sea walls as sea levels rise."
+    )
+    assert TextRankBackend(sentences=3).summarize('Short. Text.') == 'Short. Text.'
+    with pytest.raises(ValueError):
+        get_backend('gpt')
+
+
+def test_backend_must_implement_summarize():
+    with pytest.raises(TypeError, match='summarize'):
+        type('Incomplete', (SummaryBackend,), {'name': 'incomplete'})()
+
+
+def test_summarize_pending_batches_and_memoizes(pg_conn, make_article):
+    other = "Wind farms expanded. Offshore wind farms now power homes. Prices fell. Offshore wind grows."
+    load_articles(pg_conn, [make_article(i, headline='Sea levels', body=BODY) for i in range(4)]
+                  + [make_article(4, headline='Sea levels', body=other)])
+
+    stats = summarize_pending(pg_conn, workers=1, chunk_size=2, sentences=2)
+    # five rows, two distinct texts
+    assert stats == {'summarized': 2, 'cached': 3, 'chunks': 3}
+    assert summarize_pending(pg_conn, workers=1)['chunks'] == 0
+
+    # changed text clears the summary, reverting it hits the cache
+    load_articles(pg_conn, [make_article(0, headline='Sea levels', body=other), make_article(1, headline='Sea levels', body=BODY + " Extra.")])
+    assert summarize_pending(pg_conn, workers=1, sentences=2) == {'summarized': 1, 'cached': 1, 'chunks': 1}
+
+    with pg_conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM articles WHERE ai_summary IS NULL")
+        assert cursor.fetchone() == (0,)
+        cursor.execute("SELECT COUNT(*) FROM article_summary_cache")
+        assert cursor.fetchone() == (3,)
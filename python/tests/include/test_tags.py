@@ -0,0 +1,89 @@
+"""Tests for keyword and topic tagging"""
+
+from collections import Counter
+import math
+
+import pytest
+
+from include.news_etl import tags
+from include.news_etl.loading import load_articles
+from include.news_etl.tags import fit_vocabulary, tag_pending, tag_texts, tfidf_matrix, tokenize
+
+np = pytest.importorskip("numpy")
+
+CORPUS = [
+    "Coral reefs bleach as the ocean warms",
+    "Offshore wind and solar power overtake coal",
+    "Farmers warn drought will ruin crops",
+    "Coral reef fishing bans to protect marine life",
+    "Solar farms spread across farmland as farmers diversify",
+    "Drought leaves rivers low and farmers short of water",
+    "Wind turbines built near the reef",
+    "The ocean heatwave threatens coral",
+]
+
+
+def test_tfidf_matrix_matches_per_document_weights():
+    vocabulary = fit_vocabulary(CORPUS)
+    assert 'the' not in vocabulary.index and 'coral' in vocabulary.index
+    texts = CORPUS + ['', 'nothing known here', 'coral coral coral reef']
+    matrix = tfidf_matrix(vocabulary, texts)
+
+    assert matrix.shape == (len(texts), len(vocabulary))
+    for row, text in enumerate(texts):
+        counts = Counter(term for term in tokenize(text) if term in vocabulary.index)
+        weights = {term: (1 + math.log(n)) * vocabulary.idf[vocabulary.index[term]] for term, n in counts.items()}
+        norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        stored = dict(zip((vocabulary.terms[i] for i in matrix.indices[start:end]), matrix.data[start:end]))
+        assert stored == pytest.approx({term: weight / norm for term, weight in weights.items()})
+
+
+def test_tag_texts_ranks_keywords_and_labels_topics():
+    vocabulary = fit_vocabulary(CORPUS)
+    found = tag_texts(vocabulary, ['Coral reef fishing in the warm ocean', 'The report'], keywords=2)
+
+    keywords = [(row, tag) for row, kind, tag, _ in found if kind == tags.KEYWORD]
+    topics = {(row, tag): score for row, kind, tag, score in found if kind == tags.TOPIC}
+    # equal weights rank by term
+    assert keywords == [(0, 'ocean'), (0, 'reef')]
+    # every known term of the first text is an ocean term, the second has none
+    assert topics == {(0, 'oceans'): pytest.approx(1.0)}
+
+
+def test_tag_pending_writes_tags_and_caches_the_vocabulary(pg_conn, monkeypatch, make_article):
+    monkeypatch.setattr(tags, '_cached_vocabulary', None)
+    load_articles(pg_conn, [make_article(i, body=body) for i, body in enumerate(CORPUS)])
+
+    stats = tag_pending(pg_conn, keywords=3, chunk_size=3)
+    assert (stats['tagged'], stats['chunks'], stats['fitted']) == (8, 3, True)
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT a.url FROM articles a JOIN article_tags t ON t.article_id = a.id "
+            "WHERE t.kind = 'topic' AND t.tag = 'oceans' ORDER BY a.url"
+        )
+        assert [url for url, in cursor.fetchall()] == [
+            'https://example.com/article-0', 'https://example.com/article-3', 'https://example.com/article-6',
+            'https://example.com/article-7',
+        ]
+    pg_conn.commit()
+
+    # nothing pending and the stored vocabulary is reused, not refitted
+    monkeypatch.setattr(tags, 'fit_vocabulary', lambda *args, **kwargs: pytest.fail("refitted"))
+    assert tag_pending(pg_conn) == {'tagged': 0, 'tags': 0, 'chunks': 0, 'vocabulary': stats['vocabulary'], 'fitted': False}
+
+    # changed text is retagged, deleted articles take their tags with them
+    load_articles(pg_conn, [make_article(0, body='Farmers and drought')])
+    assert tag_pending(pg_conn)['tagged'] == 1
+    with pg_conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT t.tag FROM article_tags t JOIN articles a ON a.id = t.article_id "
+            "WHERE t.kind = 'topic' AND a.url = 'https://example.com/article-0' ORDER BY t.tag"
+        )
+        assert cursor.fetchall() == [('farming',), ('water',)]
+        cursor.execute("DELETE FROM articles WHERE url = 'https://example.com/article-1'")
+        cursor.execute("SELECT COUNT(DISTINCT article_id) FROM article_tags")
+        assert cursor.fetchone() == (7,)
+        cursor.execute("SELECT COUNT(*) FROM article_tag_state")
+        assert cursor.fetchone() == (7,)
+    pg_conn.commit()
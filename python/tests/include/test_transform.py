@@ -0,0 +1,70 @@
+"""Tests for the streaming and columnar transforms"""
+
+from datetime import datetime
+import types
+
+import pytest
+
+from include.news_etl.stubs import synthetic_article
+from include.news_etl.transform import (
+    TransformStats,
+    choose_transform_mode,
+    iter_transform,
+    iter_transform_columnar,
+    transform_article,
+)
+
+EXTRACTED = datetime(2025, 1, 2, 8, 0)
+
+ODD_ARTICLES = [
+    {'webPublicationDate': 'not a date', 'webUrl': 'https://x/' + 'u' * 2500,
+     'fields': {'headline': '  Spaced \n\t out  ' + 'h' * 1200, 'bodyText': ' body\n\ntext '}},
+    {'webPublicationDate': '', 'sectionName': 'S' * 150},
+    {'webPublicationDate': '2025-01-15T10:30:00+01:00', 'webUrl': 'https://x/tz'},
+    {'webPublicationDate': '2025-01-15T10:30:00.250Z',
+     'fields': {'headline': '\u00a0Caf\u00e9\u2009 \x0bnews\u3000', 'bodyText': 'a\x1cb\u2028\u2029c'}},
+]
+
+
+def test_transform_article_normalizes_and_truncates():
+    row = transform_article(ODD_ARTICLES[0], EXTRACTED)
+    assert row['publishDate'] is None
+    assert len(row['url']) == 2000
+    assert row['headline'].startswith('Spaced out hhh') and len(row['headline']) == 1000
+    assert row['body'] == 'body text'
+    assert row['imageUrl'] is None
+    assert transform_article(synthetic_article(1), EXTRACTED)['imageUrl'].endswith('/synthetic-1/500.jpg')
+
+    row = transform_article(ODD_ARTICLES[1], EXTRACTED)
+    assert (row['headline'], row['body'], len(row['section'])) == ('No headline available', 'No content available', 100)
+
+    assert transform_article(ODD_ARTICLES[2], EXTRACTED)['publishDate'] == datetime(2025, 1, 15, 9, 30)
+
+
+def test_normalize_whitespace_handles_unicode_spaces():
+    row = transform_article(ODD_ARTICLES[3], EXTRACTED)
+    assert (row['headline'], row['body']) == ('Caf\u00e9 news', 'a b c')
+
+
+def test_iter_transform_is_lazy():
+    assert isinstance(iter_transform(ODD_ARTICLES, EXTRACTED), types.GeneratorType)
+
+
+def test_columnar_matches_row_path():
+    pytest.importorskip("pyarrow")
+    articles = [synthetic_article(i) for i in range(25)] + ODD_ARTICLES
+    assert list(iter_transform_columnar(articles, EXTRACTED, chunk_size=7)) == list(iter_transform(articles, EXTRACTED))
+
+
+def test_transform_stats_tracks_latest_publish_date():
+    stats = TransformStats()
+    rows = list(stats.track(iter_transform([synthetic_article(i) for i in (3, 9, 1)] + ODD_ARTICLES[:1], EXTRACTED)))
+    assert stats.count == len(rows) == 4
+    assert stats.max_publish_date == datetime(2025, 1, 1, 0, 9)
+
+
+def test_choose_transform_mode():
+    assert choose_transform_mode(10, threshold=100) == 'rows'
+    assert choose_transform_mode(100, threshold=100) == 'columnar'
+    with pytest.raises(ValueError):
+        choose_transform_mode(1, mode='fast')
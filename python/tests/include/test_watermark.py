@@ -0,0 +1,53 @@
+"""Tests for the per-source extraction watermark"""
+
+from datetime import datetime
+
+from include.news_etl.watermark import (
+    advance_watermark,
+    filter_after_watermark,
+    get_watermark,
+    narrow_window,
+)
+
+WINDOW = {'from_date': '2025-03-01', 'to_date': '2025-03-03'}
+
+
+def test_narrow_window():
+    assert narrow_window(WINDOW, None) == (WINDOW, None)
+    assert narrow_window(WINDOW, datetime(2025, 2, 27)) == (WINDOW, datetime(2025, 2, 27))
+    assert narrow_window(WINDOW, datetime(2025, 3, 2, 10)) == (
+        {'from_date': '2025-03-02', 'to_date': '2025-03-03'}, datetime(2025, 3, 2, 10)
+    )
+
+
+def test_retried_older_run_fetches_its_whole_window():
+    # the 2025-03-11 run loaded first, then the 2025-03-10 run is retried
+    window = {'from_date': '2025-03-10', 'to_date': '2025-03-10'}
+    watermark = datetime(2025, 3, 11, 22)
+    assert narrow_window(window, watermark) == (window, None)
+
+    window, watermark = narrow_window(window, watermark)
+    results = [{'webPublicationDate': '2025-03-10T09:00:00Z'}]
+    assert filter_after_watermark(results, watermark) == (results, 0)
+
+
+def test_filter_after_watermark():
+    results = [
+        {'webPublicationDate': '2025-03-02T09:00:00Z'},
+        {'webPublicationDate': '2025-03-02T10:00:00Z'},
+        {'webPublicationDate': '2025-03-02T11:00:00Z'},
+        {'webPublicationDate': ''},
+    ]
+    kept, skipped = filter_after_watermark(results, datetime(2025, 3, 2, 10))
+    assert skipped == 2
+    assert [r['webPublicationDate'] for r in kept] == ['2025-03-02T11:00:00Z', '']
+    assert filter_after_watermark(results, None) == (results, 0)
+
+
+def test_watermark_only_moves_forward(pg_hook):
+    assert get_watermark(pg_hook, 'guardian_api') is None
+
+    advance_watermark(pg_hook, 'guardian_api', '2025-03-02T10:00:00')
+    advance_watermark(pg_hook, 'guardian_api', '2025-03-01T00:00:00')
+    advance_watermark(pg_hook, 'guardian_api', None)
+    assert get_watermark(pg_hook, 'guardian_api') == datetime(2025, 3, 2, 10)
@@ -454,62 +454,132 @@ export const getArticlesBySource = async (
   }
 };
 
+type ArticleStatistics = {
+  // "all": every article the pipeline loaded, archived ones included, as of
+  // its last run; "live": only rows currently in the articles table
+  scope: "all" | "live";
+  overview: { totalArticles: number; recentArticles: number };
+  distribution: {
+    bySection: { section: string; count: number }[];
+    bySource: { source: string; count: number }[];
+  };
+};
+
+const RECENT_DAYS = 7;
+
+/**
+ * Statistics from the ETL's article_daily_stats rollup (one row per publish
+ * day, section and source), so no request groups the articles table. Recent
+ * articles are counted by whole publish days.
+ */
+const getRollupStatistics = async (): Promise<ArticleStatistics> => {
+  const [overview, bySection, bySource] = await Promise.all([
+    prisma.$queryRaw<{ totalArticles: number; recentArticles: number }[]>`
+      SELECT
+        COALESCE(SUM(article_count), 0)::int AS "totalArticles",
+        COALESCE(SUM(article_count) FILTER (
+          WHERE day >= CURRENT_DATE - ${RECENT_DAYS}::int
+        ), 0)::int AS "recentArticles"
+      FROM article_daily_stats
+    `,
+    prisma.$queryRaw<{ section: string; count: number }[]>`
+      SELECT section, SUM(article_count)::int AS count
+      FROM article_daily_stats
+      GROUP BY section
+      ORDER BY count DESC, section
+      LIMIT 10
+    `,
+    prisma.$queryRaw<{ source: string; count: number }[]>`
+      SELECT source, SUM(article_count)::int AS count
+      FROM article_daily_stats
+      GROUP BY source
+      ORDER BY count DESC, source
+      LIMIT 10
+    `,
+  ]);
+
+  return {
+    scope: "all",
+    overview: {
+      totalArticles: overview[0]?.totalArticles ?? 0,
+      recentArticles: overview[0]?.recentArticles ?? 0,
+    },
+    distribution: { bySection, bySource },
+  };
+};
+
+/**
+ * Statistics grouped from the live articles table, for databases the ETL has
+ * not migrated yet
+ */
+const getLiveStatistics = async (): Promise<ArticleStatistics> => {
+  const [totalArticles, articlesBySection, articlesBySource, recentArticles] =
+    await Promise.all([
+      // Total articles count
+      prisma.article.count(),
+
+      // Group by section
+      prisma.article.groupBy({
+        by: ["section"],
+        _count: { section: true },
+        orderBy: { _count: { section: "desc" } },
+        take: 10,
+      }),
+
+      // Group by source
+      prisma.article.groupBy({
+        by: ["source"],
+        _count: { source: true },
+        orderBy: { _count: { source: "desc" } },
+        take: 10,
+      }),
+
+      // Recent articles (last 7 days)
+      prisma.article.count({
+        where: {
+          publishDate: {
+            gte: new Date(Date.now() - RECENT_DAYS * 24 * 60 * 60 * 1000),
+          },
+        },
+      }),
+    ]);
+
+  return {
+    scope: "live",
+    overview: {
+      totalArticles,
+      recentArticles,
+    },
+    distribution: {
+      bySection: articlesBySection.map((item) => ({
+        section: item.section,
+        count: item._count.section,
+      })),
+      bySource: articlesBySource.map((item) => ({
+        source: item.source,
+        count: item._count.source,
+      })),
+    },
+  };
+};
+
 /**
  * Get article statistics
  * GET /articles/statistics
+ * Totals and distributions always come from one source; `scope` says which.
  */
 export const getArticleStatistics = async (
   _req: Request,
   res: Response
 ): Promise<void> => {
   try {
-    const [totalArticles, articlesBySection, articlesBySource, recentArticles] =
-      await Promise.all([
-        // Total articles count
-        prisma.article.count(),
-
-        // Group by section
-        prisma.article.groupBy({
-          by: ["section"],
-          _count: { section: true },
-          orderBy: { _count: { section: "desc" } },
-          take: 10,
-        }),
-
-        // Group by source
-        prisma.article.groupBy({
-          by: ["source"],
-          _count: { source: true },
-          orderBy: { _count: { source: "desc" } },
-          take: 10,
-        }),
-
-        // Recent articles (last 7 days)
-        prisma.article.count({
-          where: {
-            publishDate: {
-              gte: new Date(Date.now() - 7 * 24 * 60 * 60 * 1000),
-            },
-          },
-        }),
-      ]);
-
-    const statistics = {
-      overview: {
-        totalArticles,
-        recentArticles,
-      },
-      distribution: {
-        bySection: articlesBySection.map((item) => ({
-          section: item.section,
-          count: item._count.section,
-        })),
-        bySource: articlesBySource.map((item) => ({
-          source: item.source,
-          count: item._count.source,
-        })),
-      },
-    };
+    let statistics: ArticleStatistics;
+    try {
+      statistics = await getRollupStatistics();
+    } catch (error) {
+      console.warn("Article daily stats unavailable, grouping articles:", error);
+      statistics = await getLiveStatistics();
+    }
 
     sendSuccessResponse(
       res,